@@ -0,0 +1,227 @@
+# bench/db.py
+"""
+Микробенчмарки функций dogbot.db на засеянной БД (см. bench.seed).
+
+Для каждой функции: p50/p99 по N вызовам со случайными ключами и план
+запроса (EXPLAIN QUERY PLAN в SQLite, EXPLAIN в Postgres). SQL берём не из
+исходников, а перехватываем событием engine на первом вызове — план
+всегда соответствует тому, что функция реально выполняет.
+
+    python -m bench.db --db sqlite+aiosqlite:////tmp/big.db --save-baseline bench/baseline.json
+    python -m bench.db --db sqlite+aiosqlite:////tmp/big.db --baseline bench/baseline.json
+
+С --baseline сравниваем p50 с сохранённым и выходим с кодом 1 при регрессии.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import event, text
+
+from bench.seed import CITY_CENTER, CITY_SPAN, CLIENT_BASE, WALKER_BASE
+from dogbot.areas import normalize
+from dogbot.settings import Settings
+
+
+@dataclass
+class Result:
+    func: str
+    p50_ms: float
+    p99_ms: float
+    calls: int
+    plan: List[str] = field(default_factory=list)
+    full_scan: bool = False
+
+
+def _pct(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+
+def _cases(db, bounds: Dict[str, Any], rnd: random.Random) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    areas = bounds["areas"] or ["Центр"]
+    now = dt.datetime.now(dt.timezone.utc)
+
+    def walker() -> int:
+        return WALKER_BASE + rnd.randrange(max(bounds["walkers"], 1))
+
+    def client() -> int:
+        # как в seed: частые клиенты — с маленькими номерами
+        return CLIENT_BASE + int(max(bounds["clients"], 1) * rnd.random() ** 3)
+
+    def order() -> int:
+        return rnd.randint(1, max(bounds["orders"], 1))
+
+    def point() -> Tuple[float, float]:
+        return (CITY_CENTER[0] + rnd.uniform(-CITY_SPAN[0], CITY_SPAN[0]),
+                CITY_CENTER[1] + rnd.uniform(-CITY_SPAN[1], CITY_SPAN[1]))
+
+    return {
+        "list_walkers_by_area": lambda: db.list_walkers_by_area(rnd.choice(areas)),
+        "list_feed": lambda: db.list_feed(normalize(rnd.choice(areas)), now, now + dt.timedelta(days=14)),
+        # опечатка в последней букве — путь через триграммы
+        "list_walkers_by_area_typo": lambda: db.list_walkers_by_area(rnd.choice(areas)[:-1] + "ы"),
+        "list_walkers_near": lambda: db.list_walkers_near(*point()),
+        "list_proposals": lambda: db.list_proposals(order()),
+        "list_orders_by_client": lambda: db.list_orders_by_client(client()),
+        # /my_orders: страница из 10 с подглядыванием в архив
+        "list_orders_by_client_page": lambda: db.list_orders_by_client(client(), limit=10),
+        "list_pending_walkers": lambda: db.list_pending_walkers(),
+        "list_walkers_ids": lambda: db.list_walkers_ids(),
+        "list_open_orders": lambda: db.list_open_orders(),
+        "get_order": lambda: db.get_order(order()),
+        # /stats: 30 дней по всем районам — до 30 строк по PK, сколько бы ни было заказов
+        "get_order_stats": lambda: db.get_order_stats((now - dt.timedelta(days=29)).strftime("%Y-%m-%d")),
+        "get_assignment": lambda: db.get_assignment(order()),
+        "get_walker_profile": lambda: db.get_walker_profile(walker()),
+        "get_user_role": lambda: db.get_user_role(walker()),
+    }
+
+
+async def _bounds(engine) -> Dict[str, Any]:
+    async with engine.connect() as conn:
+        q = lambda sql: conn.execute(text(sql))
+        walkers = (await q("SELECT COUNT(*) FROM walker_profiles")).scalar_one()
+        clients = (await q(f"SELECT COUNT(*) FROM users WHERE tg_id >= {CLIENT_BASE}")).scalar_one()
+        orders = (await q("SELECT COALESCE(MAX(id), 0) FROM orders")).scalar_one()
+        # районы берём из самих профилей — не зависим от параметров seed
+        rows = (await q("SELECT areas FROM walker_profiles WHERE areas IS NOT NULL LIMIT 2000")).scalars()
+        areas = sorted({a.strip() for row in rows for a in row.split(",") if a.strip()})
+    return {"walkers": walkers, "clients": clients, "orders": orders, "areas": areas}
+
+
+class _Capture:
+    """Запоминает (statement, parameters) SELECT'ов, выполненных на engine."""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements: List[Tuple[str, Any]] = []
+
+    def _on(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on)
+
+
+async def explain(engine, statement: str, parameters: Any) -> List[str]:
+    sqlite = engine.url.get_backend_name() == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    async with engine.connect() as conn:
+        res = await conn.exec_driver_sql(prefix + statement, parameters)
+        rows = res.fetchall()
+    # SQLite: (id, parent, notused, detail); Postgres: одна колонка текста
+    return [str(r[-1]) for r in rows]
+
+
+def is_full_scan(plan: List[str]) -> bool:
+    for line in plan:
+        s = line.strip()
+        # «SCAN t» без индекса в SQLite, «Seq Scan» в Postgres
+        if (s.startswith("SCAN ") and "USING" not in s) or "Seq Scan" in s:
+            return True
+    return False
+
+
+async def bench(db_url: str, calls: int = 200, seed: int = 1,
+                only: List[str] | None = None) -> Dict[str, Result]:
+    from dogbot import db
+
+    db.configure(Settings(DATABASE_URL=db_url, SLOW_QUERY_MS=1e9))
+    engine = db.get_engine()
+    rnd = random.Random(seed)
+    results: Dict[str, Result] = {}
+    try:
+        bounds = await _bounds(engine)
+        for name, call in _cases(db, bounds, rnd).items():
+            if only and name not in only:
+                continue
+            with _Capture(engine) as cap:
+                await call()  # прогрев + перехват SQL
+            plan: List[str] = []
+            for statement, params in cap.statements:
+                plan += await explain(engine, statement, params)
+            n = max(1, calls // 10) if name in ("list_pending_walkers", "list_walkers_ids") else calls
+            lat = []
+            for _ in range(n):
+                t = time.perf_counter()
+                await call()
+                lat.append(time.perf_counter() - t)
+            results[name] = Result(name, _pct(lat, 50) * 1000, _pct(lat, 99) * 1000, n, plan, is_full_scan(plan))
+    finally:
+        await db.dispose_engine()
+    return results
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Any],
+            tolerance: float = 0.25, floor_ms: float = 0.2) -> List[str]:
+    """Регрессии: p50 вырос больше чем на tolerance (и больше чем на floor_ms — шум), или план стал full scan."""
+    out = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if r.p50_ms > base["p50_ms"] * (1 + tolerance) and r.p50_ms - base["p50_ms"] > floor_ms:
+            out.append(f"{name}: p50 {base['p50_ms']:.2f} → {r.p50_ms:.2f} ms")
+        if r.full_scan and not base.get("full_scan"):
+            out.append(f"{name}: план стал full scan")
+    return out
+
+
+def report(results: Dict[str, Result], verbose: bool = False) -> None:
+    print(f"{'function':24s} {'p50 ms':>9s} {'p99 ms':>9s} {'calls':>6s}  plan")
+    for r in results.values():
+        flag = "FULL SCAN" if r.full_scan else "index"
+        print(f"{r.func:24s} {r.p50_ms:9.2f} {r.p99_ms:9.2f} {r.calls:6d}  {flag}")
+        if verbose:
+            for line in r.plan:
+                print(f"{'':26s}{line}")
+
+
+async def main(a: argparse.Namespace) -> int:
+    results = await bench(a.db, a.calls, only=a.only)
+    report(results, a.plans)
+    key = "sqlite" if a.db.startswith("sqlite") else "postgresql"
+    if a.save_baseline:
+        try:
+            with open(a.save_baseline, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = {}
+        stored[key] = {name: asdict(r) for name, r in results.items()}
+        with open(a.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(stored, f, ensure_ascii=False, indent=2)
+        print(f"\nbaseline ({key}) → {a.save_baseline}")
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f).get(key, {}), a.tolerance)
+        if regressions:
+            print("\nРЕГРЕССИИ:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nрегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True, help="DATABASE_URL засеянной БД")
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--only", nargs="*", help="только эти функции")
+    ap.add_argument("--plans", action="store_true", help="печатать планы целиком")
+    ap.add_argument("--baseline", help="JSON с baseline для сравнения")
+    ap.add_argument("--save-baseline", help="записать результаты как baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="допустимый рост p50, доля")
+    sys.exit(asyncio.run(main(ap.parse_args())))
@@ -0,0 +1,109 @@
+# bench/fake_api.py
+"""
+Локальный фейковый Bot API на aiohttp для бенчмарков.
+Отвечает на sendMessage/sendPhoto/... валидными объектами, считает вызовы, байты запросов
+по методам и загрузки файлов (multipart-части с файлом — то, что file_id должен исключать).
+Для отправок умеет подмешивать 429 (RetryAfter) и 403 (бот заблокирован) с заданной вероятностью.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+from aiohttp.web_request import FileField
+
+TOKEN = "12345:BENCH"
+SEND_METHODS = frozenset({"sendMessage", "sendPhoto", "sendMediaGroup", "sendDocument"})
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.0, retry_after: float = 0.0, forbidden: float = 0.0,
+                 retry_after_s: int = 1, seed: int | None = None):
+        self.latency = latency
+        self.retry_after = retry_after      # доля отправок, получающих 429
+        self.forbidden = forbidden          # доля отправок, получающих 403
+        self.retry_after_s = retry_after_s
+        self._rnd = random.Random(seed)
+        self.calls: Counter[str] = Counter()
+        self.injected: Counter[int] = Counter()
+        self.bytes_in = 0
+        self.bytes_by_method: Counter[str] = Counter()
+        self.uploads: Counter[str] = Counter()   # метод → число загруженных файлов
+        self._runner: web.AppRunner | None = None
+        self._msg_id = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _message(self, chat_id, **extra) -> dict:
+        self._msg_id += 1
+        return {
+            "message_id": self._msg_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or 0), "type": "private"},
+            **extra,
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        size = request.content_length or 0
+        self.bytes_in += size
+        self.bytes_by_method[method] += size
+        form = await request.post()
+        uploads = sum(isinstance(v, FileField) for v in form.values())
+        if uploads:
+            self.uploads[method] += uploads
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method in SEND_METHODS:
+            error = self._inject()
+            if error is not None:
+                return web.json_response(error, status=error["error_code"])
+
+        chat_id = form.get("chat_id")
+        if method == "sendMessage":
+            result = self._message(chat_id, text=form.get("text", ""))
+        elif method == "sendPhoto":
+            result = self._message(chat_id, photo=[{"file_id": "f", "file_unique_id": "u", "width": 1, "height": 1}])
+        elif method == "sendMediaGroup":
+            media = json.loads(form.get("media") or "[]")
+            result = [self._message(chat_id, media_group_id="g",
+                                    photo=[{"file_id": "f", "file_unique_id": "u", "width": 1, "height": 1}])
+                      for _ in media]
+        elif method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "bench"}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def _inject(self) -> dict | None:
+        roll = self._rnd.random()
+        if roll < self.retry_after:
+            self.injected[429] += 1
+            return {"ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after_s}",
+                    "parameters": {"retry_after": self.retry_after_s}}
+        if roll < self.retry_after + self.forbidden:
+            self.injected[403] += 1
+            return {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        return None
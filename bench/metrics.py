@@ -0,0 +1,57 @@
+# bench/metrics.py
+"""
+Накладные расходы инструментирования на горячем пути:
+feed_update через Dispatcher с MetricsMiddleware и без.
+
+    python -m bench.metrics --updates 20000
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import time
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+
+from dogbot.metrics import HandlerNameMiddleware, MetricsMiddleware
+
+
+async def noop(m: Message):
+    return None
+
+
+def build(instrumented: bool) -> Dispatcher:
+    router = Router()
+    router.message.register(noop)
+    dp = Dispatcher()
+    if instrumented:
+        dp.update.outer_middleware(MetricsMiddleware())
+        dp.message.middleware(HandlerNameMiddleware())
+    dp.include_router(router)
+    return dp
+
+
+async def main(n: int) -> None:
+    bot = Bot("12345:BENCH")
+    user = User(id=1, is_bot=False, first_name="u")
+    msg = Message(message_id=1, date=dt.datetime.now(), chat=Chat(id=1, type="private"), from_user=user, text="hi")
+    update = Update(update_id=1, message=msg)
+    res = {}
+    for name in ("plain", "instrumented"):
+        dp = build(name == "instrumented")
+        for _ in range(1000):
+            await dp.feed_update(bot, update)
+        t = time.perf_counter()
+        for _ in range(n):
+            await dp.feed_update(bot, update)
+        res[name] = (time.perf_counter() - t) / n * 1e6
+        print(f"{name:13s} {res[name]:8.2f} us/update")
+    print(f"overhead      {res['instrumented'] - res['plain']:8.2f} us/update")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=20000)
+    asyncio.run(main(ap.parse_args().updates))
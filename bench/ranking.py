@@ -0,0 +1,77 @@
+# bench/ranking.py
+"""
+Время ранжирования откликов (dogbot.ranking) на N синтетических откликах
+в форме строк list_proposals: features, scores и rank целиком, с numpy и
+на чистом Python.
+
+    python -m bench.ranking --proposals 1000 --budget-ms 1
+
+Выходим с кодом 1, если p50 rank() с numpy дольше --budget-ms.
+"""
+
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from dogbot import ranking
+
+AREAS = ["Центр", "Купчино", "Невский, Центр", "Арбат", "Савёловский, Арбат"]
+
+
+def proposals(n: int, rnd: random.Random) -> List[Dict[str, Any]]:
+    return [{
+        "id": i, "walker_id": 1_000_000 + i, "price": rnd.randint(300, 1500), "rate": rnd.choice([0, 500, 800]),
+        "areas": rnd.choice(AREAS), "is_approved": rnd.random() < 0.8, "response_min": rnd.uniform(0, 120),
+        "rating_sum": rnd.randint(0, 200), "rating_count": rnd.randint(0, 40),
+    } for i in range(n)]
+
+
+def p50_ms(fn: Callable[[], Any], runs: int) -> float:
+    xs = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn()
+        xs.append(time.perf_counter() - t)
+    return sorted(xs)[len(xs) // 2] * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--proposals", type=int, default=1000)
+    ap.add_argument("--runs", type=int, default=500)
+    ap.add_argument("--budget-ms", type=float, default=1.0)
+    args = ap.parse_args()
+
+    rnd = random.Random(1)
+    props = proposals(args.proposals, rnd)
+    # история — у каждого третьего, как после walker_completion_stats
+    stats = {p["walker_id"]: (rnd.randint(1, 20), rnd.randint(0, 20)) for p in props[::3]}
+    order = {"area": "Центр", "budget": 1000}
+
+    numpy = ranking.np
+    results = {}
+    for backend in ("numpy", "python"):
+        if backend == "numpy" and numpy is None:
+            continue
+        ranking.np = numpy if backend == "numpy" else None
+        cols = ranking.features(order, props, stats)
+        results[backend] = {
+            "features": p50_ms(lambda: ranking.features(order, props, stats), args.runs),
+            "scores": p50_ms(lambda: ranking.scores(cols, order["budget"]), args.runs),
+            "rank": p50_ms(lambda: ranking.rank(order, props, stats), args.runs),
+        }
+    ranking.np = numpy
+
+    print(f"{args.proposals} proposals, p50 over {args.runs} runs")
+    for backend, r in results.items():
+        print(f"  {backend:6s}  " + "  ".join(f"{k} {v:.3f}ms" for k, v in r.items()))
+    if "numpy" in results and results["numpy"]["rank"] > args.budget_ms:
+        print(f"rank() over budget: {results['numpy']['rank']:.3f}ms > {args.budget_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
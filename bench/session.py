@@ -0,0 +1,55 @@
+# bench/session.py
+"""
+Сообщений в секунду через Bot API: дефолтная сессия aiogram против make_session().
+
+    python -m bench.session --messages 5000 --concurrency 100
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from bench.fake_api import FakeBotAPI, TOKEN
+from dogbot.http import make_session
+from dogbot.settings import Settings
+
+
+async def _run(bot: Bot, messages: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            await bot.send_message(i % 1000 + 1, "Заказ #1: выгул, Купчино, 19:00")
+
+    t = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return messages / (time.perf_counter() - t)
+
+
+async def main(messages: int, concurrency: int, latency: float) -> None:
+    api = FakeBotAPI(latency=latency)
+    base = await api.start()
+    try:
+        default = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
+        tuned = Bot(TOKEN, session=make_session(Settings(BOT_API_URL=base, HTTP_POOL_LIMIT=concurrency)))
+        for name, bot in (("default", default), ("tuned", tuned)):
+            await _run(bot, min(messages, 200), concurrency)  # прогрев пула
+            rate = await _run(bot, messages, concurrency)
+            print(f"{name:8s} {rate:10.0f} msg/s")
+            await bot.session.close()
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.0, help="искусственная задержка API, сек")
+    args = ap.parse_args()
+    asyncio.run(main(args.messages, args.concurrency, args.latency))
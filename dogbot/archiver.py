@@ -0,0 +1,81 @@
+# dogbot/archiver.py
+"""
+Фоновый перенос закрытых заказов в архив (db.archive_orders).
+
+orders/proposals только растут, а done/cancelled нужны лишь истории клиента
+и статистике исполнителя — их читают и из *_archive. Раз в ARCHIVE_INTERVAL
+секунд переносим заказы старше ARCHIVE_AFTER_DAYS пачками по ARCHIVE_BATCH:
+каждая пачка — своя короткая транзакция, между пачками пауза ARCHIVE_PAUSE,
+чтобы не занимать БД и блокировки надолго.
+
+    archiver = Archiver.from_settings(settings)
+    archiver.start()
+    ...
+    await archiver.stop()
+"""
+
+from __future__ import annotations
+import asyncio
+import datetime as dt
+import logging
+from typing import Callable, Optional
+
+from dogbot import db
+from dogbot.metrics import ARCHIVED_ORDERS
+from dogbot.settings import Settings
+
+log = logging.getLogger(__name__)
+
+
+class Archiver:
+    def __init__(self, after_days: int, batch: int = 500, interval: float = 3600.0, pause: float = 0.1,
+                 clock: Callable[[], dt.datetime] = lambda: dt.datetime.now(dt.timezone.utc)):
+        self.after_days = after_days
+        self.batch = batch
+        self.interval = interval
+        self.pause = pause
+        self.clock = clock
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Archiver":
+        return cls(settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH,
+                   settings.ARCHIVE_INTERVAL, settings.ARCHIVE_PAUSE)
+
+    async def run_once(self) -> int:
+        """Перенести всё, что созрело к этому моменту. Возвращает число заказов."""
+        before = self.clock() - dt.timedelta(days=self.after_days)
+        total = 0
+        while True:
+            moved = await db.archive_orders(before, self.batch)
+            total += moved
+            ARCHIVED_ORDERS.inc(moved)
+            if moved < self.batch:
+                return total
+            await asyncio.sleep(self.pause)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                moved = await self.run_once()
+                if moved:
+                    log.info("archived %d orders", moved)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # БД недоступна и т.п. — попробуем в следующий раз
+                log.exception("archiver failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="archiver")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
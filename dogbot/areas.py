@@ -0,0 +1,132 @@
+# dogbot/areas.py
+"""
+Нормализация названий районов и нечёткий поиск по триграммам.
+
+normalize() приводит ввод к каноническому виду: регистр, ё → е, латиница →
+кириллица, без «район»/«р-н», синонимы из ALIASES. Walker'ы хранятся по
+нормализованным районам (таблица walker_areas), заказ ищется сначала точно,
+а если точного нет — по триграммному сходству (как pg_trgm): «Купчина»
+найдёт «купчино», «Savelovskiy» — «савеловский».
+
+    normalize("Савёловский р-н")        # 'савеловский'
+    split_areas("Купчино, центр")       # ['купчино', 'центр']
+    NgramIndex(names).search("купчина") # ['купчино']
+"""
+
+from __future__ import annotations
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+SIMILARITY_THRESHOLD = 0.4
+
+# разговорные и сокращённые названия → каноническое (после нормализации)
+ALIASES: Dict[str, str] = {
+    "петроградка": "петроградский",
+    "петроградская": "петроградский",
+    "васька": "василеостровский",
+    "во": "василеостровский",
+    "васильевский остров": "василеостровский",
+    "центральный": "центр",
+    "пресня": "пресненский",
+}
+
+_STOPWORDS = {"район", "р", "н", "рн", "мкр", "микрорайон", "округ"}
+
+# латиница → кириллица: сначала диграфы, потом буквы
+_TRANSLIT = (
+    ("shch", "щ"), ("sch", "щ"), ("iy", "ий"), ("yy", "ый"), ("ij", "ий"),
+    ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("yu", "ю"), ("ya", "я"), ("yo", "е"), ("ye", "е"),
+    ("a", "а"), ("b", "б"), ("v", "в"), ("g", "г"), ("d", "д"), ("e", "е"),
+    ("z", "з"), ("i", "и"), ("j", "й"), ("k", "к"), ("l", "л"), ("m", "м"),
+    ("n", "н"), ("o", "о"), ("p", "п"), ("r", "р"), ("s", "с"), ("t", "т"),
+    ("u", "у"), ("f", "ф"), ("h", "х"), ("c", "к"), ("w", "в"), ("x", "кс"),
+    ("q", "к"), ("y", "ы"),
+)
+_TRANSLIT_RE = re.compile("|".join(re.escape(k) for k, _ in _TRANSLIT))
+_TRANSLIT_MAP = dict(_TRANSLIT)
+_NON_WORD = re.compile(r"[^0-9a-zа-я]+")
+
+
+def normalize(name: str | None) -> str:
+    s = (name or "").lower().replace("ё", "е")
+    if re.search("[a-z]", s):
+        s = _TRANSLIT_RE.sub(lambda m: _TRANSLIT_MAP[m.group(0)], s)
+    words = [w for w in _NON_WORD.sub(" ", s).split() if w not in _STOPWORDS]
+    s = " ".join(words)
+    return ALIASES.get(s, s)
+
+
+def split_areas(text: str | None) -> List[str]:
+    """«Купчино, савёловский; центр» → нормализованные районы без повторов."""
+    out = []
+    for part in re.split(r"[,;/\n]", text or ""):
+        norm = normalize(part)
+        if norm and norm not in out:
+            out.append(norm)
+    return out
+
+
+def trigrams(s: str) -> FrozenSet[str]:
+    """Триграммы как в pg_trgm: по словам, с двумя пробелами в начале и одним в конце."""
+    grams: Set[str] = set()
+    for word in s.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class NgramIndex:
+    """
+    Инвертированный индекс триграмма → названия. Названий районов сотни,
+    так что индекс целиком в памяти; similarity считаем только для тех,
+    у кого есть общие триграммы с запросом.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._grams: Dict[str, Set[str]] = {}
+        self._names: Dict[str, FrozenSet[str]] = {}
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str) -> None:
+        if name in self._names:
+            return
+        grams = self._names[name] = trigrams(name)
+        for g in grams:
+            self._grams.setdefault(g, set()).add(name)
+
+    def search(self, query: str, threshold: float = SIMILARITY_THRESHOLD) -> List[str]:
+        """
+        Точное совпадение — только оно; иначе самые похожие (при равенстве
+        сходства — все): «купчина» не должна собрать «купчино 2», «купчино 3», ...
+        """
+        if query in self._names:
+            return [query]
+        q = trigrams(query)
+        candidates: Set[str] = set()
+        for g in q:
+            candidates |= self._grams.get(g, set())
+        scored = []
+        for name in candidates:
+            grams = self._names[name]
+            score = len(q & grams) / len(q | grams)
+            if score >= threshold:
+                scored.append((score, name))
+        if not scored:
+            return []
+        best = max(score for score, _ in scored)
+        return sorted(name for score, name in scored if score == best)
@@ -0,0 +1,78 @@
+# dogbot/broadcast.py
+"""Рассылка карточки заказа исполнителям в личку."""
+
+import time
+
+from aiogram import Bot
+from aiogram.types import InputMediaPhoto
+
+from dogbot.keyboards import kb_respond
+from dogbot.metrics import BROADCAST_DURATION, BROADCAST_FAILED, BROADCAST_RECIPIENTS, BROADCAST_SENT
+from dogbot.sender import send_paced
+from dogbot.tracing import tracer
+from dogbot import db
+
+
+Photos = str | list[str] | None  # file_id или альбом file_id'ов
+
+
+def _photo_list(photos: Photos) -> list[str]:
+    if not photos:
+        return []
+    return [photos] if isinstance(photos, str) else list(photos)
+
+async def _send_card(bot: Bot, wid: int, card_text: str, photos: list[str], order_id: int):
+    """
+    Отправка карточки одному walker'у. Фото — только по file_id: файл уже на
+    серверах Telegram, по сети уходит строка, а не байты картинки.
+    """
+    if len(photos) == 1:
+        return await bot.send_photo(wid, photo=photos[0], caption=card_text, reply_markup=kb_respond(order_id))
+    if photos:
+        # у альбома нет inline-клавиатуры: альбом, затем карточка с кнопкой
+        await bot.send_media_group(wid, media=[InputMediaPhoto(media=f) for f in photos])
+    return await bot.send_message(wid, card_text, reply_markup=kb_respond(order_id))
+
+async def _send_in_batches(bot: Bot, walker_ids: list[int], card_text: str, photo_file_id: Photos, order_id: int):
+    with tracer.span("broadcast", order_id=order_id, recipients=len(walker_ids)):
+        await _send_batches(bot, walker_ids, card_text, photo_file_id, order_id)
+
+async def _send_batches(bot: Bot, walker_ids: list[int], card_text: str, photo_file_id: Photos, order_id: int):
+    BROADCAST_RECIPIENTS.inc(len(walker_ids))
+    started = time.perf_counter()
+    photos = _photo_list(photo_file_id)
+    # лимит Telegram — на сообщения, а не на получателей: альбом из N фото + карточка — N + 1
+    cost = len(photos) + 1 if len(photos) > 1 else 1
+    results = await send_paced(walker_ids, lambda wid: _send_card(bot, wid, card_text, photos, order_id), cost=cost)
+    delivered = [wid for wid, r in zip(walker_ids, results) if not isinstance(r, BaseException)]
+    BROADCAST_FAILED.inc(len(results) - len(delivered))
+    BROADCAST_SENT.inc(len(delivered))
+    # счётчик «заказов за день» для walker_prefs.max_per_day
+    await db.record_deliveries(delivered)
+    BROADCAST_DURATION.observe(time.perf_counter() - started)
+
+async def send_order_to_walkers(bot: Bot, card_text: str, photo_file_id: Photos, order_id: int,
+                                order: dict | None = None):
+    """Рассылка заказа всем walker'ам в личку (вариант B), с учётом их фильтров (walker_prefs)."""
+    if order is None:
+        order = await db.get_order(order_id)
+    walker_ids = await db.list_walkers_ids(order)
+    if not walker_ids:
+        return
+    await _send_in_batches(bot, walker_ids, card_text, photo_file_id, order_id)
+
+async def send_order_to_walkers_by_area(bot: Bot, card_text: str, photo_file_id: Photos, order_id: int,
+                                        area: str | None, location: tuple[float, float] | None = None):
+    """
+    Рассылка только тем walker'ам, кому заказ по пути: есть точка — по радиусу
+    walker'а (dogbot.geo, индекс по ячейкам), иначе по совпадению района.
+    """
+    # фильтры walker'ов (услуга, размер, часы, бюджет, лимит в день) — прямо в запросе
+    order = await db.get_order(order_id)
+    ids = await db.list_walkers_near(*location, order=order) if location else []
+    if not ids and area:
+        ids = await db.list_walkers_by_area(area, order)
+    if not ids:
+        # fallback: если нет совпадений, шлём всем
+        return await send_order_to_walkers(bot, card_text, photo_file_id, order_id, order)
+    await _send_in_batches(bot, ids, card_text, photo_file_id, order_id)
@@ -0,0 +1,113 @@
+# dogbot/callbacks.py
+"""
+Типизированные callback_data и таблица диспетчеризации по префиксу.
+Вместо цепочки F.data.startswith(...) — один хендлер и один dict-lookup.
+"""
+
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters import Filter
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+
+
+class ProposalCb(CallbackData, prefix="pr"):
+    order_id: int
+
+
+class CandidatesCb(CallbackData, prefix="cands"):
+    order_id: int
+
+
+class ChooseCb(CallbackData, prefix="choose"):
+    order_id: int
+    walker_id: int
+
+
+class ProfileCb(CallbackData, prefix="prof"):
+    order_id: int
+    walker_id: int
+
+
+class AutoAssignCb(CallbackData, prefix="auto"):
+    order_id: int
+
+
+class RateCb(CallbackData, prefix="rate"):
+    order_id: int
+    stars: int
+
+
+class FeedCb(CallbackData, prefix="feed"):
+    # keyset-курсор ленты: (when_at, epoch-микросекунды; id) последнего просмотренного заказа
+    t: int
+    oid: int
+
+
+class OpenOrdersCb(CallbackData, prefix="oo"):
+    # страница /orders_open: keyset-курсор как у FeedCb; all — и заказы с откликами
+    t: int
+    oid: int
+    all: bool = False
+
+
+class PendingCb(CallbackData, prefix="pend"):
+    # страница /pending: keyset по tg_id — показать тех, у кого tg_id > after
+    after: int
+
+
+class ModerateCb(CallbackData, prefix="mod"):
+    # кнопка ✅/❌ у walker'а в /pending; after — страница, которую перерисовать
+    wid: int
+    ok: bool
+    after: int
+
+
+class CallbackTable:
+    """
+    prefix → (фабрика CallbackData, хендлер).
+    Хендлер получает распакованный объект в аргументе `callback_data`
+    плюс обычные зависимости aiogram (state, bot, ...), как у @router.callback_query.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Tuple[Type[CallbackData], CallableObject]] = {}
+
+    def add(self, factory: Type[CallbackData], handler: Callable[..., Awaitable[Any]]) -> None:
+        prefix = factory.__prefix__
+        if prefix in self._routes:
+            raise ValueError(f"callback prefix {prefix!r} уже занят")
+        self._routes[prefix] = (factory, CallableObject(callback=handler))
+
+    def resolve(self, data: str | None) -> Dict[str, Any] | None:
+        if not data:
+            return None
+        route = self._routes.get(data.split(":", 1)[0])
+        if route is None:
+            return None
+        factory, handler = route
+        try:
+            cb = factory.unpack(data)
+        except (TypeError, ValueError):
+            return None
+        return {"callback_data": cb, "callback_route": handler}
+
+    def router(self) -> Router:
+        router = Router(name="callbacks")
+        router.callback_query.register(_dispatch, _PrefixFilter(self))
+        return router
+
+
+class _PrefixFilter(Filter):
+    def __init__(self, table: CallbackTable):
+        self.table = table
+
+    async def __call__(self, cq: CallbackQuery) -> bool | Dict[str, Any]:
+        return self.table.resolve(cq.data) or False
+
+
+async def _dispatch(cq: CallbackQuery, callback_route: CallableObject, **data: Any) -> Any:
+    return await callback_route.call(cq, **data)
@@ -5,24 +5,51 @@ Async слой доступа к БД (SQLAlchemy Core + async engine).
 
 from __future__ import annotations
 import datetime as dt
-from typing import Any, Dict, List, Optional
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncConnection
-from sqlalchemy import text
-from dogbot.settings import settings
+from sqlalchemy import bindparam, inspect, text
+from dogbot.settings import Settings, get_settings
+from dogbot import areas as area_names, geo, prefs as walker_prefs
+from dogbot.dbstats import instrument_engine, instrumented
+from dogbot.events import journal
 from sqlalchemy.exc import OperationalError
 
 # ленивый engine
 _engine: Optional[AsyncEngine] = None
+_settings: Optional[Settings] = None
+# SQLite: триграммный индекс названий из walker_areas (в Postgres — pg_trgm)
+_area_index: Optional[area_names.NgramIndex] = None
+
+
+def configure(settings: Settings) -> None:
+    """Привязать слой БД к настройкам приложения. Engine пересоздастся при первом запросе."""
+    global _engine, _settings, _area_index
+    if settings is _settings:
+        return
+    _settings = settings
+    _engine = None
+    _area_index = None
 
 
 def get_engine() -> AsyncEngine:
     global _engine
     if _engine is None:
+        settings = _settings or get_settings()
         _engine = create_async_engine(settings.DATABASE_URL, future=True, pool_pre_ping=True)
+        instrument_engine(_engine, slow_ms=settings.SLOW_QUERY_MS)
     return _engine
 
 
+async def dispose_engine() -> None:
+    global _engine, _area_index
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+    _area_index = None
+
+
 # --------------------- DDL ---------------------
 INIT_SQL_POSTGRES = """
 CREATE TABLE IF NOT EXISTS users (
@@ -45,11 +72,20 @@ CREATE TABLE IF NOT EXISTS orders (
     address      TEXT    NOT NULL,
     budget       INT,
     area         TEXT,
+    area_norm    TEXT,  -- dogbot.areas.normalize(area), для ленты /feed
+    photos       TEXT,  -- JSON-список file_id фото из мастера заказа
+    lat          DOUBLE PRECISION,  -- точка заказа, если клиент прислал геопозицию
+    lon          DOUBLE PRECISION,
     comment      TEXT,
     status       TEXT    NOT NULL DEFAULT 'open',
+    first_proposal_at TIMESTAMPTZ,  -- первый отклик, для KPI (order_stats)
+    proposals_count INT NOT NULL DEFAULT 0,  -- ведёт add_proposal, для /orders_open
     created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 CREATE INDEX IF NOT EXISTS ix_orders_client_status ON orders (client_id, status);
+CREATE INDEX IF NOT EXISTS ix_orders_created ON orders (created_at);  -- выгрузка /export по датам
+-- частичный: только активные заказы, история в индекс не попадает
+CREATE INDEX IF NOT EXISTS ix_orders_open ON orders (when_at, id) WHERE status IN ('open', 'published');
 
 CREATE TABLE IF NOT EXISTS proposals (
     id         SERIAL PRIMARY KEY,
@@ -69,6 +105,7 @@ CREATE TABLE IF NOT EXISTS assignments (
     walker_id  BIGINT NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
     assigned_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
+CREATE INDEX IF NOT EXISTS ix_assignments_walker ON assignments (walker_id);
 CREATE TABLE IF NOT EXISTS walker_profiles (
     walker_id  BIGINT PRIMARY KEY REFERENCES users(tg_id) ON DELETE CASCADE,
     phone      TEXT,
@@ -78,8 +115,138 @@ CREATE TABLE IF NOT EXISTS walker_profiles (
     price_from INT,   -- базовая ставка от
     bio        TEXT,
     is_approved BOOLEAN NOT NULL DEFAULT FALSE,
+    rejected_at TIMESTAMPTZ,  -- отклонён модерацией; NULL и не is_approved — ждёт в очереди
+    rating_sum   INT NOT NULL DEFAULT 0,  -- сумма оценок из reviews, ведётся в add_review
+    rating_count INT NOT NULL DEFAULT 0,
+    home_lat   DOUBLE PRECISION,
+    home_lon   DOUBLE PRECISION,
+    radius_km  DOUBLE PRECISION,
+    geo_cell   TEXT,  -- геохеш точки дома (dogbot.geo.PRECISION), индекс в ленивых ALTER'ах
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
+
+CREATE TABLE IF NOT EXISTS walker_areas (
+    walker_id  BIGINT NOT NULL REFERENCES walker_profiles(walker_id) ON DELETE CASCADE,
+    area_norm  TEXT   NOT NULL,  -- dogbot.areas.normalize()
+    PRIMARY KEY (walker_id, area_norm)
+);
+CREATE INDEX IF NOT EXISTS ix_walker_areas_area ON walker_areas (area_norm);
+
+CREATE TABLE IF NOT EXISTS walker_prefs (
+    walker_id     BIGINT PRIMARY KEY REFERENCES walker_profiles(walker_id) ON DELETE CASCADE,
+    services_mask INT,  -- биты dogbot.prefs.SERVICES; NULL — любые
+    sizes_mask    INT,
+    hour_from     INT,  -- окно по часу начала заказа (UTC), может переходить через полночь
+    hour_to       INT,
+    min_budget    INT,
+    max_per_day   INT
+);
+
+CREATE TABLE IF NOT EXISTS walker_deliveries (
+    walker_id  BIGINT NOT NULL,
+    day        TEXT   NOT NULL,  -- YYYY-MM-DD (UTC)
+    sent       INT    NOT NULL DEFAULT 0,
+    PRIMARY KEY (walker_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id         SERIAL PRIMARY KEY,
+    order_id   INT    NOT NULL UNIQUE REFERENCES orders(id) ON DELETE CASCADE,
+    walker_id  BIGINT NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+    client_id  BIGINT NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+    rating     INT    NOT NULL CHECK (rating BETWEEN 1 AND 5),
+    text       TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_reviews_walker ON reviews (walker_id);
+
+-- KPI по дню создания заказа и району: счётчики ведут add_order/add_proposal/
+-- assign_walker/mark_done/cancel_order, area_norm='*' — сумма по всем районам
+CREATE TABLE IF NOT EXISTS order_stats (
+    day                 TEXT NOT NULL,  -- YYYY-MM-DD (UTC) создания заказа
+    area_norm           TEXT NOT NULL,  -- '' — без района
+    orders              INT  NOT NULL DEFAULT 0,
+    proposals           INT  NOT NULL DEFAULT 0,
+    first_proposals     INT  NOT NULL DEFAULT 0,  -- заказов хоть с одним откликом
+    first_proposal_sec  BIGINT NOT NULL DEFAULT 0,  -- сумма секунд до первого отклика
+    first_proposal_fast INT  NOT NULL DEFAULT 0,  -- из них уложились в KPI_FIRST_PROPOSAL_SEC
+    assigned            INT  NOT NULL DEFAULT 0,
+    done                INT  NOT NULL DEFAULT 0,
+    cancelled           INT  NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, area_norm)
+);
+
+-- холодный архив закрытых заказов (dogbot.archiver): те же колонки, без FK и лишних индексов
+CREATE TABLE IF NOT EXISTS orders_archive (
+    id           INT PRIMARY KEY,
+    client_id    BIGINT NOT NULL,
+    service      TEXT   NOT NULL,
+    walk_type    TEXT,
+    pet_name     TEXT   NOT NULL,
+    pet_size     TEXT   NOT NULL,
+    when_at      TIMESTAMPTZ NOT NULL,
+    duration_min INT    NOT NULL,
+    address      TEXT   NOT NULL,
+    budget       INT,
+    area         TEXT,
+    area_norm    TEXT,
+    photos       TEXT,
+    lat          DOUBLE PRECISION,
+    lon          DOUBLE PRECISION,
+    comment      TEXT,
+    status       TEXT   NOT NULL,
+    first_proposal_at TIMESTAMPTZ,
+    proposals_count INT NOT NULL DEFAULT 0,
+    created_at   TIMESTAMPTZ NOT NULL,
+    archived_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_orders_archive_client ON orders_archive (client_id, id);
+
+CREATE TABLE IF NOT EXISTS proposals_archive (
+    id         INT    PRIMARY KEY,
+    order_id   INT    NOT NULL,
+    walker_id  BIGINT NOT NULL,
+    price      INT    NOT NULL,
+    area       TEXT,
+    note       TEXT,
+    created_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_proposals_archive_order ON proposals_archive (order_id);
+
+CREATE TABLE IF NOT EXISTS assignments_archive (
+    order_id    INT    PRIMARY KEY,
+    walker_id   BIGINT NOT NULL,
+    assigned_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_assignments_archive_walker ON assignments_archive (walker_id);
+
+CREATE TABLE IF NOT EXISTS reviews_archive (
+    id         INT    PRIMARY KEY,
+    order_id   INT    NOT NULL UNIQUE,
+    walker_id  BIGINT NOT NULL,
+    client_id  BIGINT NOT NULL,
+    rating     INT    NOT NULL,
+    text       TEXT,
+    created_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS throttle_buckets (
+    key        TEXT PRIMARY KEY,
+    tokens     DOUBLE PRECISION NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL
+);
+
+-- журнал изменений (dogbot.events): только INSERT, без FK — переживает архив и удаление
+CREATE TABLE IF NOT EXISTS events (
+    id        BIGSERIAL PRIMARY KEY,
+    at        TIMESTAMPTZ NOT NULL,
+    kind      TEXT   NOT NULL,  -- 'order.cancelled', 'user.role', ...
+    entity    TEXT   NOT NULL,  -- 'order' | 'user' | 'walker'
+    entity_id BIGINT NOT NULL,
+    actor_id  BIGINT,           -- кто сделал; NULL — система/неизвестно
+    data      TEXT              -- JSON с новыми значениями
+);
+CREATE INDEX IF NOT EXISTS ix_events_entity ON events (entity, entity_id, id);
 """
 
 # SQLite не знает SERIAL/TIMESTAMPTZ/NOW(), делаем эквиваленты
@@ -106,12 +273,20 @@ INIT_SQL_SQLITE = [
         address      TEXT    NOT NULL,
         budget       INTEGER,
         area         TEXT,
+        area_norm    TEXT,
+        photos       TEXT,
+        lat          REAL,
+        lon          REAL,
         comment      TEXT,
         status       TEXT    NOT NULL DEFAULT 'open',
+        first_proposal_at TEXT,
+        proposals_count INTEGER NOT NULL DEFAULT 0,
         created_at   TEXT    NOT NULL DEFAULT (datetime('now'))
     );
     """,
     "CREATE INDEX IF NOT EXISTS ix_orders_client_status ON orders (client_id, status);",
+    "CREATE INDEX IF NOT EXISTS ix_orders_created ON orders (created_at);",
+    "CREATE INDEX IF NOT EXISTS ix_orders_open ON orders (when_at, id) WHERE status IN ('open', 'published');",
     """
     CREATE TABLE IF NOT EXISTS proposals (
         id         INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -132,6 +307,7 @@ INIT_SQL_SQLITE = [
         assigned_at TEXT NOT NULL DEFAULT (datetime('now'))
     );
     """,
+    "CREATE INDEX IF NOT EXISTS ix_assignments_walker ON assignments (walker_id);",
     """
     CREATE TABLE IF NOT EXISTS walker_profiles (
         walker_id   INTEGER PRIMARY KEY REFERENCES users(tg_id) ON DELETE CASCADE,
@@ -140,11 +316,147 @@ INIT_SQL_SQLITE = [
         areas       TEXT,
         experience  TEXT,
         is_approved INTEGER NOT NULL DEFAULT 0,
+        rejected_at TEXT,
         price_from  INTEGER,
         bio         TEXT,
+        rating_sum   INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0,
+        home_lat    REAL,
+        home_lon    REAL,
+        radius_km   REAL,
+        geo_cell    TEXT,
         created_at  TEXT NOT NULL DEFAULT (datetime('now'))
     );
     """,
+    """
+    CREATE TABLE IF NOT EXISTS walker_areas (
+        walker_id  INTEGER NOT NULL REFERENCES walker_profiles(walker_id) ON DELETE CASCADE,
+        area_norm  TEXT    NOT NULL,
+        PRIMARY KEY (walker_id, area_norm)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_walker_areas_area ON walker_areas (area_norm);",
+    """
+    CREATE TABLE IF NOT EXISTS walker_prefs (
+        walker_id     INTEGER PRIMARY KEY REFERENCES walker_profiles(walker_id) ON DELETE CASCADE,
+        services_mask INTEGER,
+        sizes_mask    INTEGER,
+        hour_from     INTEGER,
+        hour_to       INTEGER,
+        min_budget    INTEGER,
+        max_per_day   INTEGER
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS walker_deliveries (
+        walker_id  INTEGER NOT NULL,
+        day        TEXT    NOT NULL,
+        sent       INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (walker_id, day)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS reviews (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id   INTEGER NOT NULL UNIQUE REFERENCES orders(id) ON DELETE CASCADE,
+        walker_id  INTEGER NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+        client_id  INTEGER NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+        rating     INTEGER NOT NULL CHECK (rating BETWEEN 1 AND 5),
+        text       TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reviews_walker ON reviews (walker_id);",
+    """
+    CREATE TABLE IF NOT EXISTS order_stats (
+        day                 TEXT    NOT NULL,
+        area_norm           TEXT    NOT NULL,
+        orders              INTEGER NOT NULL DEFAULT 0,
+        proposals           INTEGER NOT NULL DEFAULT 0,
+        first_proposals     INTEGER NOT NULL DEFAULT 0,
+        first_proposal_sec  INTEGER NOT NULL DEFAULT 0,
+        first_proposal_fast INTEGER NOT NULL DEFAULT 0,
+        assigned            INTEGER NOT NULL DEFAULT 0,
+        done                INTEGER NOT NULL DEFAULT 0,
+        cancelled           INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, area_norm)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS orders_archive (
+        id           INTEGER PRIMARY KEY,
+        client_id    INTEGER NOT NULL,
+        service      TEXT    NOT NULL,
+        walk_type    TEXT,
+        pet_name     TEXT    NOT NULL,
+        pet_size     TEXT    NOT NULL,
+        when_at      TEXT    NOT NULL,
+        duration_min INTEGER NOT NULL,
+        address      TEXT    NOT NULL,
+        budget       INTEGER,
+        area         TEXT,
+        area_norm    TEXT,
+        photos       TEXT,
+        lat          REAL,
+        lon          REAL,
+        comment      TEXT,
+        status       TEXT    NOT NULL,
+        first_proposal_at TEXT,
+        proposals_count INTEGER NOT NULL DEFAULT 0,
+        created_at   TEXT    NOT NULL,
+        archived_at  TEXT    NOT NULL DEFAULT (datetime('now'))
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_orders_archive_client ON orders_archive (client_id, id);",
+    """
+    CREATE TABLE IF NOT EXISTS proposals_archive (
+        id         INTEGER PRIMARY KEY,
+        order_id   INTEGER NOT NULL,
+        walker_id  INTEGER NOT NULL,
+        price      INTEGER NOT NULL,
+        note       TEXT,
+        created_at TEXT    NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_proposals_archive_order ON proposals_archive (order_id);",
+    """
+    CREATE TABLE IF NOT EXISTS assignments_archive (
+        order_id    INTEGER PRIMARY KEY,
+        walker_id   INTEGER NOT NULL,
+        assigned_at TEXT    NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_assignments_archive_walker ON assignments_archive (walker_id);",
+    """
+    CREATE TABLE IF NOT EXISTS reviews_archive (
+        id         INTEGER PRIMARY KEY,
+        order_id   INTEGER NOT NULL UNIQUE,
+        walker_id  INTEGER NOT NULL,
+        client_id  INTEGER NOT NULL,
+        rating     INTEGER NOT NULL,
+        text       TEXT,
+        created_at TEXT    NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS throttle_buckets (
+        key        TEXT PRIMARY KEY,
+        tokens     REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id        INTEGER PRIMARY KEY AUTOINCREMENT,
+        at        TEXT    NOT NULL,
+        kind      TEXT    NOT NULL,
+        entity    TEXT    NOT NULL,
+        entity_id INTEGER NOT NULL,
+        actor_id  INTEGER,
+        data      TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_events_entity ON events (entity, entity_id, id);",
 ]
 
 
@@ -152,7 +464,107 @@ async def _exec(conn: AsyncConnection, sql: str, params: Dict[str, Any] | None =
     return await conn.execute(text(sql), params or {})
 
 
+# активные заказы со счётчиком откликов; условие по status совпадает с ix_orders_open
+ORDERS_OPEN_VIEW = """
+SELECT id, client_id, service, walk_type, pet_size, when_at, duration_min, area, budget,
+       status, proposals_count, created_at
+FROM orders
+WHERE status IN ('open', 'published')
+"""
+
+
+async def _sync_proposals_count(conn: AsyncConnection) -> None:
+    """
+    proposals_count для активных заказов, созданных до колонки (или записанных
+    мимо add_proposal, как в bench.seed). Идёт по ix_orders_open — на старте дёшево.
+    """
+    await _exec(conn, """
+        UPDATE orders SET proposals_count =
+            (SELECT COUNT(*) FROM proposals p WHERE p.order_id = orders.id)
+        WHERE status IN ('open', 'published') AND proposals_count = 0
+          AND EXISTS (SELECT 1 FROM proposals p WHERE p.order_id = orders.id);
+    """)
+
+
+# --------------------- KPI ---------------------
+KPI_FIRST_PROPOSAL_SEC = 600  # docs/plan.md: первый отклик быстрее 10 минут
+KPI_CONVERSION = 0.5          # и заявка→назначение не меньше 50%
+STAT_FIELDS = ("orders", "proposals", "first_proposals", "first_proposal_sec",
+               "first_proposal_fast", "assigned", "done", "cancelled")
+ALL_AREAS = "*"
+
+
+def _as_utc(value: Any) -> dt.datetime:
+    # SQLite отдаёт строку ('2024-05-01 10:00:00' из datetime('now') или ISO с зоной)
+    if isinstance(value, str):
+        value = dt.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt.timezone.utc)
+    return value
+
+
+def _ts_param(value: dt.datetime) -> dt.datetime:
+    """Момент для сравнения с created_at: в SQLite это 'YYYY-MM-DD HH:MM:SS' UTC без зоны."""
+    if get_engine().url.get_backend_name() == "sqlite":
+        return _as_utc(value).astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def _bump_stats(conn: AsyncConnection, created_at: Any, area_norm: Optional[str], **deltas: int) -> None:
+    """
+    Прибавить deltas к строке order_stats (день создания заказа, район) и к
+    строке «все районы» — в транзакции самого события, без пересчёта по заказам.
+    """
+    cols = [c for c in STAT_FIELDS if deltas.get(c)]
+    if not cols:
+        return
+    sql = f"""
+    INSERT INTO order_stats (day, area_norm, {", ".join(cols)})
+    VALUES (:day, :area, {", ".join(":" + c for c in cols)})
+    ON CONFLICT (day, area_norm) DO UPDATE SET
+        {", ".join(f"{c} = order_stats.{c} + EXCLUDED.{c}" for c in cols)};
+    """
+    day = _as_utc(created_at).strftime("%Y-%m-%d")
+    values = {c: deltas[c] for c in cols}
+    await conn.execute(text(sql), [
+        {"day": day, "area": area_norm or "", **values},
+        {"day": day, "area": ALL_AREAS, **values},
+    ])
+
+
+async def _rebuild_order_stats(conn: AsyncConnection) -> None:
+    """Полный пересчёт order_stats по заказам — только для миграции старой БД."""
+    await _exec(conn, """
+        UPDATE orders SET first_proposal_at =
+            (SELECT MIN(p.created_at) FROM proposals p WHERE p.order_id = orders.id)
+        WHERE first_proposal_at IS NULL
+          AND EXISTS (SELECT 1 FROM proposals p WHERE p.order_id = orders.id);
+    """)
+    res = await _exec(conn, """
+        SELECT o.created_at, o.area, o.status, o.first_proposal_at,
+               (SELECT COUNT(*) FROM proposals p WHERE p.order_id = o.id) AS proposals,
+               EXISTS (SELECT 1 FROM assignments a WHERE a.order_id = o.id) AS assigned
+        FROM orders o;
+    """)
+    await _exec(conn, "DELETE FROM order_stats;")
+    totals: Dict[tuple, Dict[str, int]] = {}
+    for r in res.mappings().all():
+        key = (_as_utc(r["created_at"]).strftime("%Y-%m-%d"), area_names.normalize(r["area"]))
+        acc = totals.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+        deltas = {"orders": 1, "proposals": r["proposals"], "assigned": int(bool(r["assigned"])),
+                  "done": int(r["status"] == "done"), "cancelled": int(r["status"] == "cancelled")}
+        if r["first_proposal_at"] is not None:
+            sec = max(0, int((_as_utc(r["first_proposal_at"]) - _as_utc(r["created_at"])).total_seconds()))
+            deltas.update(first_proposals=1, first_proposal_sec=sec,
+                          first_proposal_fast=int(sec <= KPI_FIRST_PROPOSAL_SEC))
+        for c, v in deltas.items():
+            acc[c] += v
+    for (day, area), acc in totals.items():
+        await _bump_stats(conn, day, area, **acc)
+
+
 # --------------------- API ---------------------
+@instrumented
 async def init_db() -> None:
     """
     Создать таблицы, если их нет.
@@ -180,10 +592,43 @@ async def init_db() -> None:
             "ALTER TABLE orders ADD COLUMN area TEXT;",
             # walker_profiles.is_approved (по умолчанию 0)
             "ALTER TABLE walker_profiles ADD COLUMN is_approved INTEGER NOT NULL DEFAULT 0;",
+            # walker_profiles: агрегаты отзывов
+            "ALTER TABLE walker_profiles ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0;",
+            "ALTER TABLE walker_profiles ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0;",
+            # геопозиция: точка заказа, дом и радиус walker'а
+            "ALTER TABLE orders ADD COLUMN lat REAL;",
+            "ALTER TABLE orders ADD COLUMN lon REAL;",
+            "ALTER TABLE walker_profiles ADD COLUMN home_lat REAL;",
+            "ALTER TABLE walker_profiles ADD COLUMN home_lon REAL;",
+            "ALTER TABLE walker_profiles ADD COLUMN radius_km REAL;",
+            "ALTER TABLE walker_profiles ADD COLUMN geo_cell TEXT;",
+            # после ALTER'а: в старой БД колонки geo_cell до него нет
+            "CREATE INDEX IF NOT EXISTS ix_walker_profiles_geo_cell ON walker_profiles (geo_cell);",
+            # лента: published-заказы района по времени, keyset по (when_at, id)
+            "ALTER TABLE orders ADD COLUMN area_norm TEXT;",
+            "CREATE INDEX IF NOT EXISTS ix_orders_feed ON orders (status, area_norm, when_at, id);",
+            "ALTER TABLE orders ADD COLUMN photos TEXT;",
+            f"ALTER TABLE orders ADD COLUMN first_proposal_at {'TEXT' if backend == 'sqlite' else 'TIMESTAMPTZ'};",
+            "ALTER TABLE orders ADD COLUMN proposals_count INTEGER NOT NULL DEFAULT 0;",
+            # отказ модерации отдельно от «ещё не смотрели»
+            f"ALTER TABLE walker_profiles ADD COLUMN rejected_at {'TEXT' if backend == 'sqlite' else 'TIMESTAMPTZ'};",
+            # сводка для /orders_open; после ALTER'а — ссылается на proposals_count
+            ("CREATE VIEW IF NOT EXISTS" if backend == "sqlite" else "CREATE OR REPLACE VIEW") + f" orders_open AS {ORDERS_OPEN_VIEW};",
         ]
+        if backend != "sqlite":
+            # нечёткий поиск района: % по GIN-индексу; без прав на расширение — только точный
+            alters += [
+                "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+                "CREATE INDEX IF NOT EXISTS ix_walker_areas_trgm ON walker_areas USING gin (area_norm gin_trgm_ops);",
+                # proposals.area есть только в Postgres-схеме; архив создавался без неё
+                "ALTER TABLE proposals_archive ADD COLUMN area TEXT;",
+            ]
         for sql in alters:
             try:
-                await _exec(conn, sql)
+                # на Postgres упавший запрос обрывает всю транзакцию («current transaction
+                # is aborted») — каждый ALTER в своём SAVEPOINT, откатывается только он
+                async with conn.begin_nested():
+                    await _exec(conn, sql)
             except OperationalError:
                 # колонка уже есть — ок
                 pass
@@ -191,14 +636,40 @@ async def init_db() -> None:
                 # не роняем приложение
                 pass
 
+        # профили до появления walker_areas: разложим их районы один раз
+        res = await _exec(conn, """
+            SELECT walker_id, areas FROM walker_profiles wp
+            WHERE areas IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM walker_areas wa WHERE wa.walker_id = wp.walker_id);
+        """)
+        rows = [{"wid": wid, "a": a} for wid, text_ in res.fetchall() for a in area_names.split_areas(text_)]
+        if rows:
+            await conn.execute(text("INSERT INTO walker_areas (walker_id, area_norm) VALUES (:wid, :a);"), rows)
+        # и заказы, опубликованные до area_norm, — чтобы попали в ленту
+        res = await _exec(conn, """
+            SELECT id, area FROM orders
+            WHERE status='published' AND area IS NOT NULL AND area_norm IS NULL;
+        """)
+        rows = [{"oid": oid, "a": area_names.normalize(a)} for oid, a in res.fetchall()]
+        if rows:
+            await conn.execute(text("UPDATE orders SET area_norm=:a WHERE id=:oid;"), rows)
+        await _sync_proposals_count(conn)
+        # order_stats появилась позже заказов — пересчитаем её один раз
+        res = await _exec(conn, "SELECT EXISTS (SELECT 1 FROM orders), EXISTS (SELECT 1 FROM order_stats);")
+        has_orders, has_stats = res.one()
+        if has_orders and not has_stats:
+            await _rebuild_order_stats(conn)
 
 
+
+@instrumented
 async def upsert_user(
     tg_id: int,
     username: Optional[str],
     full_name: Optional[str],
     phone: Optional[str] = None,
     role: str = "client",
+    actor: Optional[int] = None,
 ) -> None:
     sql = """
     INSERT INTO users (tg_id, role, username, full_name, phone)
@@ -211,6 +682,8 @@ async def upsert_user(
     """
     engine = get_engine()
     async with engine.begin() as conn:
+        # прежняя роль — для журнала: client→walker в онбординге тоже переход
+        was = (await _exec(conn, "SELECT role FROM users WHERE tg_id=:tg_id;", {"tg_id": tg_id})).scalar()
         await _exec(conn, sql, {
             "tg_id": tg_id,
             "role": role,
@@ -218,9 +691,31 @@ async def upsert_user(
             "full_name": full_name,
             "phone": phone,
         })
+    if role != (was or "client"):  # новый клиент — не переход
+        journal.record("user.role", "user", tg_id, actor, role=role, was=was)
 
 
+@instrumented
+async def upsert_users_batch(rows: List[Dict[str, Any]]) -> None:
+    """
+    Пачка (tg_id, username, full_name) одним executemany — для dogbot.writebehind.
+    Роль не трогаем: новые получают 'client' по умолчанию, у старых она своя.
+    """
+    if not rows:
+        return
+    sql = """
+    INSERT INTO users (tg_id, username, full_name)
+    VALUES (:tg_id, :username, :full_name)
+    ON CONFLICT (tg_id) DO UPDATE SET
+        username = COALESCE(EXCLUDED.username, users.username),
+        full_name = COALESCE(EXCLUDED.full_name, users.full_name);
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(sql), rows)
 
+
+@instrumented
 async def add_order(
     client_id: int,
     service: str,
@@ -233,13 +728,16 @@ async def add_order(
     comment: Optional[str],
     walk_type: Optional[str] = None,
     area: Optional[str] = None,   # <— НОВОЕ
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    photos: Optional[List[str]] = None,
 ) -> int:
     sql = """
     INSERT INTO orders (client_id, service, walk_type, pet_name, pet_size,
-                        when_at, duration_min, address, budget, comment, area)
+                        when_at, duration_min, address, budget, comment, area, area_norm, lat, lon, photos)
     VALUES (:client_id, :service, :walk_type, :pet_name, :pet_size,
-            :when_at, :duration_min, :address, :budget, :comment, :area)
-    RETURNING id;
+            :when_at, :duration_min, :address, :budget, :comment, :area, :area_norm, :lat, :lon, :photos)
+    RETURNING id, created_at;
     """
     engine = get_engine()
     async with engine.begin() as conn:
@@ -255,31 +753,54 @@ async def add_order(
             "budget": budget,
             "comment": comment,
             "area": area,  # <— НОВОЕ
+            "area_norm": area_names.normalize(area) or None,
+            "lat": lat,
+            "lon": lon,
+            "photos": json.dumps(photos) if photos else None,
         })
-        return int(res.scalar_one())
+        order_id, created_at = res.one()
+        await _bump_stats(conn, created_at, area_names.normalize(area), orders=1)
+    journal.record("order.created", "order", order_id, client_id)
+    return int(order_id)
 
 
-async def publish_order(order_id: int) -> None:
-    sql = "UPDATE orders SET status='published' WHERE id=:oid;"
+@instrumented
+async def publish_order(order_id: int, actor: Optional[int] = None) -> None:
+    sql = "UPDATE orders SET status='published' WHERE id=:oid AND status <> 'published' RETURNING id;"
     engine = get_engine()
     async with engine.begin() as conn:
-        await _exec(conn, sql, {"oid": order_id})
+        row = (await _exec(conn, sql, {"oid": order_id})).first()
+    if row:
+        journal.record("order.published", "order", order_id, actor)
 
 
-async def list_orders_by_client(client_id: int) -> List[Dict[str, Any]]:
-    sql = """
-    SELECT id, service, walk_type, pet_name, pet_size,
-           when_at, duration_min, address, budget, comment, status
-    FROM orders
-    WHERE client_id=:cid
-    ORDER BY id DESC;
+@instrumented
+async def list_orders_by_client(client_id: int, limit: Optional[int] = None,
+                                before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Заказы клиента, новые первыми (id DESC), вместе с архивными (archived=True).
+    Страница: limit строк с id < before_id. Архив читается по индексу
+    (client_id, id) и только в пределах страницы: если горячих заказов
+    хватило на страницу, из архива нужны лишь id новее последнего из них.
     """
+    cols = "id, service, walk_type, pet_name, pet_size, when_at, duration_min, address, budget, comment, status"
+    where = "client_id=:cid" + (" AND id < :before" if before_id is not None else "")
+    page = f" LIMIT {int(limit)}" if limit is not None else ""
+    params = {"cid": client_id, "before": before_id}
     engine = get_engine()
     async with engine.connect() as conn:
-        res = await _exec(conn, sql, {"cid": client_id})
-        return [dict(row) for row in res.mappings().all()]
+        res = await _exec(conn, f"SELECT {cols} FROM orders WHERE {where} ORDER BY id DESC{page};", params)
+        rows = [dict(r, archived=False) for r in res.mappings().all()]
+        if limit is not None and len(rows) == limit:
+            where += " AND id > :floor"
+            params["floor"] = rows[-1]["id"]
+        res = await _exec(conn, f"SELECT {cols} FROM orders_archive WHERE {where} ORDER BY id DESC{page};", params)
+        rows += [dict(r, archived=True) for r in res.mappings().all()]
+    rows.sort(key=lambda r: r["id"], reverse=True)
+    return rows[:limit] if limit is not None else rows
 
 
+@instrumented
 async def get_order(order_id: int) -> dict | None:
     sql = "SELECT * FROM orders WHERE id=:oid;"
     engine = get_engine()
@@ -288,7 +809,166 @@ async def get_order(order_id: int) -> dict | None:
         row = res.mappings().first()
         return dict(row) if row else None
     
-# кто назначен
+@instrumented
+async def list_feed(area_norm: str, since: dt.datetime, until: dt.datetime,
+                    after: tuple | None = None, limit: int = 20) -> list[dict]:
+    """
+    Опубликованные заказы района с when_at в [since, until), по (when_at, id).
+    after — keyset-курсор (when_at, id) последней показанной строки: без OFFSET,
+    каждая страница — range scan по ix_orders_feed.
+    """
+    cursor = ""
+    params: Dict[str, Any] = {"a": area_norm, "since": since, "until": until, "limit": limit}
+    if after is not None:
+        cursor = "AND (when_at > :after_t OR (when_at = :after_t AND id > :after_id))"
+        params.update(after_t=after[0], after_id=after[1])
+    sql = f"""
+    SELECT id, service, walk_type, pet_size, when_at, duration_min, budget, area
+    FROM orders
+    WHERE status='published' AND area_norm=:a
+      AND when_at >= :since AND when_at < :until
+      {cursor}
+    ORDER BY when_at, id
+    LIMIT :limit;
+    """
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, params)
+        return [dict(r) for r in res.mappings().all()]
+
+@instrumented
+async def get_walker_areas(walker_id: int) -> list[str]:
+    sql = "SELECT area_norm FROM walker_areas WHERE walker_id=:wid ORDER BY area_norm;"
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, {"wid": walker_id})
+        return [r[0] for r in res.fetchall()]
+
+@instrumented
+async def list_open_orders(after: Optional[tuple[dt.datetime, int]] = None, limit: int = 10,
+                           only_empty: bool = True) -> list[dict]:
+    """
+    Страница активных заказов для диспетчера (/orders_open), по возрастанию
+    (when_at, id): просроченные — первыми. only_empty — только без откликов.
+    Идёт по частичному ix_orders_open, объём истории на запрос не влияет.
+    """
+    where, params = [], {"n": limit}
+    if only_empty:
+        where.append("proposals_count = 0")
+    if after is not None:
+        where.append("(when_at > :t OR (when_at = :t AND id > :id))")
+        params.update(t=after[0], id=after[1])
+    sql = f"""
+    SELECT id, client_id, service, walk_type, pet_size, when_at, duration_min, area, budget,
+           status, proposals_count
+    FROM orders_open
+    {"WHERE " + " AND ".join(where) if where else ""}
+    ORDER BY when_at, id
+    LIMIT :n;
+    """
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, params)
+        return [dict(r) for r in res.mappings().all()]
+
+
+# выгрузка для бухгалтерии: таблица → колонки; строки отбираются по дате создания заказа
+EXPORT_COLUMNS: Dict[str, tuple[str, ...]] = {
+    "orders": ("id", "client_id", "service", "walk_type", "pet_name", "pet_size", "when_at",
+               "duration_min", "address", "budget", "area", "comment", "status", "proposals_count",
+               "first_proposal_at", "created_at"),
+    "proposals": ("id", "order_id", "walker_id", "price", "note", "created_at"),
+    "assignments": ("order_id", "walker_id", "assigned_at"),
+}
+EXPORT_BATCH = 1000
+
+
+@instrumented
+async def export_rows(table: str, since: dt.datetime, until: dt.datetime,
+                      sink: Callable[[Sequence[Sequence[Any]]], Awaitable[None]],
+                      batch: int = EXPORT_BATCH) -> int:
+    """
+    Строки table (EXPORT_COLUMNS) для заказов, созданных в [since, until),
+    пачками по batch в sink. Серверный курсор (stream + yield_per): в памяти
+    одна пачка, сколько бы строк ни было. Возвращает число строк.
+    Заказы, уже унесённые архиватором, читаются из *_archive (UNION ALL).
+    """
+    cols = EXPORT_COLUMNS[table]
+    parts = []
+    for suffix in ("", "_archive"):
+        if table == "orders":
+            select = ", ".join(f"o.{c}" for c in cols)
+            parts.append(f"SELECT {select} FROM orders{suffix} o "
+                         "WHERE o.created_at >= :since AND o.created_at < :until")
+        else:
+            select = ", ".join(f"t.{c}" for c in cols)
+            parts.append(f"SELECT {select} FROM orders{suffix} o JOIN {table}{suffix} t ON t.order_id = o.id "
+                         "WHERE o.created_at >= :since AND o.created_at < :until")
+    # колонка из списка выборки — ORDER BY после UNION ALL видит только её
+    sql = " UNION ALL ".join(parts) + f" ORDER BY {'id' if table == 'orders' else 'order_id'}"
+    engine = get_engine()
+    total = 0
+    async with engine.connect() as conn:
+        result = await conn.stream(text(sql).execution_options(yield_per=batch),
+                                   {"since": _ts_param(since), "until": _ts_param(until)})
+        async for rows in result.partitions(batch):
+            await sink(rows)
+            total += len(rows)
+    return total
+
+
+# сначала дочерние: на Postgres у них FK на orders
+_ARCHIVE_ORDER = ("reviews", "proposals", "assignments", "orders")
+
+
+async def _archive_columns(conn: AsyncConnection, table: str) -> list[str]:
+    """
+    Колонки живой таблицы — список не зашит в код: колонка, добавленная
+    ALTER'ом (proposals.area на Postgres), иначе молча терялась бы при переносе.
+    Если в *_archive её нет — отказываемся переносить, а не теряем данные.
+    """
+    def columns(sync_conn, name):
+        return [c["name"] for c in inspect(sync_conn).get_columns(name)]
+
+    hot = await conn.run_sync(columns, table)
+    missing = set(hot) - set(await conn.run_sync(columns, f"{table}_archive"))
+    if missing:
+        raise RuntimeError(f"{table}_archive: нет колонок {', '.join(sorted(missing))}")
+    return hot
+
+
+@instrumented
+async def archive_orders(created_before: dt.datetime, batch: int = 500) -> int:
+    """
+    Перенести до batch закрытых (done/cancelled) заказов, созданных раньше
+    created_before, вместе с откликами, назначением и отзывом в *_archive.
+    Одна короткая транзакция на пачку; на Postgres SKIP LOCKED — не ждём
+    строки, которые сейчас кто-то держит. Возвращает число перенесённых заказов.
+    """
+    engine = get_engine()
+    lock = "" if engine.url.get_backend_name() == "sqlite" else " FOR UPDATE SKIP LOCKED"
+    async with engine.begin() as conn:
+        res = await _exec(conn, f"""
+            SELECT id FROM orders
+            WHERE created_at < :before AND status IN ('done', 'cancelled')
+            ORDER BY created_at
+            LIMIT :n{lock};
+        """, {"before": _ts_param(created_before), "n": batch})
+        ids = [r[0] for r in res.fetchall()]
+        if not ids:
+            return 0
+        for table in _ARCHIVE_ORDER:
+            cols = ", ".join(await _archive_columns(conn, table))
+            key = "id" if table == "orders" else "order_id"
+            await conn.execute(text(f"""
+                INSERT INTO {table}_archive ({cols}) SELECT {cols} FROM {table} WHERE {key} IN :ids;
+            """).bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+            await conn.execute(text(f"DELETE FROM {table} WHERE {key} IN :ids;")
+                               .bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+        return len(ids)
+
+
+@instrumented
 async def get_assignment(order_id: int) -> dict | None:
     sql = "SELECT order_id, walker_id, assigned_at FROM assignments WHERE order_id=:oid;"
     engine = get_engine()
@@ -298,20 +978,33 @@ async def get_assignment(order_id: int) -> dict | None:
         return dict(row) if row else None
 
 # отмена заказа (клиентом/админом)
-async def cancel_order(order_id: int) -> None:
-    sql = "UPDATE orders SET status='cancelled' WHERE id=:oid AND status <> 'cancelled';"
+@instrumented
+async def cancel_order(order_id: int, actor: Optional[int] = None) -> None:
+    sql = """
+    UPDATE orders SET status='cancelled' WHERE id=:oid AND status <> 'cancelled'
+    RETURNING created_at, area_norm;
+    """
     engine = get_engine()
     async with engine.begin() as conn:
-        await _exec(conn, sql, {"oid": order_id})
+        res = await _exec(conn, sql, {"oid": order_id})
+        row = res.first()
+        if row:
+            await _bump_stats(conn, *row, cancelled=1)
+    if row:
+        journal.record("order.cancelled", "order", order_id, actor)
 
 # правка времени/длительности
-async def update_order_time(order_id: int, when_at: dt.datetime, duration_min: int) -> None:
+@instrumented
+async def update_order_time(order_id: int, when_at: dt.datetime, duration_min: int,
+                            actor: Optional[int] = None) -> None:
     sql = "UPDATE orders SET when_at=:t, duration_min=:d WHERE id=:oid;"
     engine = get_engine()
     async with engine.begin() as conn:
         await _exec(conn, sql, {"oid": order_id, "t": when_at, "d": duration_min})
+    journal.record("order.rescheduled", "order", order_id, actor, when_at=when_at, duration_min=duration_min)
 
 # правка адреса
+@instrumented
 async def update_order_address(order_id: int, address: str) -> None:
     sql = "UPDATE orders SET address=:a WHERE id=:oid;"
     engine = get_engine()
@@ -319,44 +1012,110 @@ async def update_order_address(order_id: int, address: str) -> None:
         await _exec(conn, sql, {"oid": order_id, "a": address})
 
 
+@instrumented
 async def add_proposal(order_id: int, walker_id: int, price: int, note: Optional[str]) -> int:
-    sql = """
-    INSERT INTO proposals (order_id, walker_id, price, note)
-    VALUES (:oid, :wid, :price, :note)
-    ON CONFLICT (order_id, walker_id)
-    DO UPDATE SET price=EXCLUDED.price, note=EXCLUDED.note
-    RETURNING id;
     """
+    Отклик walker'а; повторный — перезапись цены/комментария. Новый отклик
+    увеличивает orders.proposals_count и order_stats, первый на заказ ещё и
+    фиксирует first_proposal_at.
+    """
+    params = {"oid": order_id, "wid": walker_id, "price": price, "note": note}
     engine = get_engine()
     async with engine.begin() as conn:
-        res = await _exec(conn, sql, {"oid": order_id, "wid": walker_id, "price": price, "note": note})
-        return int(res.scalar_one())
+        # вставка или правка: DO NOTHING ничего не вернёт, если отклик уже был
+        res = await _exec(conn, """
+            INSERT INTO proposals (order_id, walker_id, price, note)
+            VALUES (:oid, :wid, :price, :note)
+            ON CONFLICT (order_id, walker_id) DO NOTHING
+            RETURNING id;
+        """, params)
+        proposal_id = res.scalar()
+        if proposal_id is None:
+            res = await _exec(conn, """
+                UPDATE proposals SET price=:price, note=:note
+                WHERE order_id=:oid AND walker_id=:wid
+                RETURNING id;
+            """, params)
+            return int(res.scalar_one())
+
+        now = dt.datetime.now(dt.timezone.utc)
+        # UPDATE берёт блокировку строки: из двух одновременных откликов первым окажется один
+        res = await _exec(conn, """
+            UPDATE orders SET proposals_count = proposals_count + 1,
+                              first_proposal_at = COALESCE(first_proposal_at, :now)
+            WHERE id=:oid
+            RETURNING created_at, area_norm, proposals_count;
+        """, {"oid": order_id, "now": now})
+        o = res.one()
+        if o.proposals_count == 1:
+            sec = max(0, int((now - _as_utc(o.created_at)).total_seconds()))
+            await _bump_stats(conn, o.created_at, o.area_norm, proposals=1, first_proposals=1,
+                              first_proposal_sec=sec, first_proposal_fast=int(sec <= KPI_FIRST_PROPOSAL_SEC))
+        else:
+            await _bump_stats(conn, o.created_at, o.area_norm, proposals=1)
+        return int(proposal_id)
 
 
+@instrumented
 async def list_proposals(order_id: int) -> list[dict]:
-    sql = """
+    engine = get_engine()
+    # минуты от создания заказа до отклика — для ранжирования (dogbot.ranking)
+    if engine.url.get_backend_name() == "sqlite":
+        response = "(julianday(p.created_at) - julianday(o.created_at)) * 1440"
+    else:
+        response = "EXTRACT(EPOCH FROM p.created_at - o.created_at) / 60"
+    sql = f"""
     SELECT p.id, p.price, p.note, p.walker_id,
            u.username, u.full_name,
-           wp.phone, wp.price_from AS rate, wp.areas, wp.is_approved
+           wp.phone, COALESCE(wp.price_from, 0) AS rate, wp.areas,
+           -- без NULL: ranking.features снимает числа одним проходом
+           COALESCE(wp.is_approved, FALSE) AS is_approved,
+           COALESCE(wp.rating_sum, 0) AS rating_sum, COALESCE(wp.rating_count, 0) AS rating_count,
+           {response} AS response_min
     FROM proposals p
+    JOIN orders o ON o.id = p.order_id
     LEFT JOIN users u ON u.tg_id = p.walker_id
     LEFT JOIN walker_profiles wp ON wp.walker_id = p.walker_id
     WHERE p.order_id=:oid
     ORDER BY p.price ASC, p.id ASC;
     """
-    engine = get_engine()
     async with engine.connect() as conn:
         res = await _exec(conn, sql, {"oid": order_id})
         return [dict(r) for r in res.mappings().all()]
 
 
-async def assign_walker(order_id: int, walker_id: int) -> bool:
+@instrumented
+async def walker_completion_stats(walker_ids: list[int]) -> dict[int, tuple[int, int]]:
+    """walker_id → (сколько раз назначали, сколько доведено до done). Один запрос на всех."""
+    if not walker_ids:
+        return {}
+    # архивные заказы — все закрытые, без них доля выполненных просела бы
+    sql = text("""
+    SELECT walker_id, COUNT(*) AS assigned, SUM(done) AS done FROM (
+        SELECT a.walker_id, CASE WHEN o.status='done' THEN 1 ELSE 0 END AS done
+        FROM assignments a JOIN orders o ON o.id = a.order_id
+        WHERE a.walker_id IN :ids
+        UNION ALL
+        SELECT a.walker_id, CASE WHEN o.status='done' THEN 1 ELSE 0 END
+        FROM assignments_archive a JOIN orders_archive o ON o.id = a.order_id
+        WHERE a.walker_id IN :ids
+    ) t
+    GROUP BY walker_id;
+    """).bindparams(bindparam("ids", expanding=True))
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await conn.execute(sql, {"ids": list(walker_ids)})
+        return {r[0]: (int(r[1]), int(r[2] or 0)) for r in res.fetchall()}
+
+
+@instrumented
+async def assign_walker(order_id: int, walker_id: int, actor: Optional[int] = None) -> bool:
     engine = get_engine()
     backend = engine.url.get_backend_name()
     lock_sql = (
-        "SELECT status FROM orders WHERE id=:oid FOR UPDATE;"
+        "SELECT status, created_at, area_norm FROM orders WHERE id=:oid FOR UPDATE;"
         if backend != "sqlite"
-        else "SELECT status FROM orders WHERE id=:oid;"
+        else "SELECT status, created_at, area_norm FROM orders WHERE id=:oid;"
     )
 
     async with engine.begin() as conn:
@@ -375,14 +1134,91 @@ async def assign_walker(order_id: int, walker_id: int) -> bool:
             {"oid": order_id, "wid": walker_id},
         )
         await _exec(conn, "UPDATE orders SET status='assigned' WHERE id=:oid;", {"oid": order_id})
-        return True
+        await _bump_stats(conn, row["created_at"], row["area_norm"], assigned=1)
+    # в журнал — только после коммита
+    journal.record("order.assigned", "order", order_id, actor, walker_id=walker_id, was=row["status"])
+    return True
     
 
-async def mark_done(order_id: int) -> None:
+@instrumented
+async def mark_done(order_id: int, actor: Optional[int] = None) -> None:
     engine = get_engine()
     async with engine.begin() as conn:
-        await _exec(conn, "UPDATE orders SET status='done' WHERE id=:oid;", {"oid": order_id})
+        res = await _exec(conn, """
+            UPDATE orders SET status='done' WHERE id=:oid AND status <> 'done'
+            RETURNING created_at, area_norm;
+        """, {"oid": order_id})
+        row = res.first()
+        if row:
+            await _bump_stats(conn, *row, done=1)
+    if row:
+        journal.record("order.done", "order", order_id, actor)
 
+@instrumented
+async def add_review(order_id: int, client_id: int, rating: int, text_: Optional[str] = None) -> bool:
+    """
+    Отзыв клиента на выполненный заказ (один на заказ, повторная оценка — перезапись).
+    В той же транзакции двигаем rating_sum/rating_count исполнителя — средний
+    рейтинг потом читается из профиля без AVG() по reviews.
+    """
+    if not 1 <= rating <= 5:
+        raise ValueError("rating must be 1..5")
+    engine = get_engine()
+    lock = "" if engine.url.get_backend_name() == "sqlite" else " FOR UPDATE OF o"
+    async with engine.begin() as conn:
+        res = await _exec(conn, f"""
+            SELECT o.client_id, o.status, a.walker_id, r.rating AS prev
+            FROM orders o
+            JOIN assignments a ON a.order_id = o.id
+            LEFT JOIN reviews r ON r.order_id = o.id
+            WHERE o.id=:oid{lock};
+        """, {"oid": order_id})
+        row = res.mappings().first()
+        if not row or row["client_id"] != client_id or row["status"] != "done":
+            return False
+
+        if row["prev"] is None:
+            await _exec(conn, """
+                INSERT INTO reviews (order_id, walker_id, client_id, rating, text)
+                VALUES (:oid, :wid, :cid, :r, :t);
+            """, {"oid": order_id, "wid": row["walker_id"], "cid": client_id, "r": rating, "t": text_})
+            delta_sum, delta_count = rating, 1
+        else:
+            await _exec(conn, "UPDATE reviews SET rating=:r, text=COALESCE(:t, text) WHERE order_id=:oid;",
+                        {"oid": order_id, "r": rating, "t": text_})
+            delta_sum, delta_count = rating - row["prev"], 0
+
+        # профиля может не быть (walker без анкеты) — создадим
+        await _exec(conn, """
+            INSERT INTO walker_profiles (walker_id, rating_sum, rating_count)
+            VALUES (:wid, :s, :c)
+            ON CONFLICT (walker_id) DO UPDATE SET
+                rating_sum = walker_profiles.rating_sum + EXCLUDED.rating_sum,
+                rating_count = walker_profiles.rating_count + EXCLUDED.rating_count;
+        """, {"wid": row["walker_id"], "s": delta_sum, "c": delta_count})
+        return True
+
+@instrumented
+async def set_review_text(order_id: int, client_id: int, text_: str) -> None:
+    sql = "UPDATE reviews SET text=:t WHERE order_id=:oid AND client_id=:cid;"
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await _exec(conn, sql, {"oid": order_id, "cid": client_id, "t": text_})
+
+@instrumented
+async def get_order_stats(since_day: str, area_norm: str = ALL_AREAS) -> Dict[str, int]:
+    """
+    Суммы order_stats по дням создания заказа начиная с since_day (YYYY-MM-DD).
+    Читает не больше строки на день по первичному ключу — от объёма заказов не зависит.
+    """
+    sums = ", ".join(f"COALESCE(SUM({c}), 0) AS {c}" for c in STAT_FIELDS)
+    sql = f"SELECT {sums} FROM order_stats WHERE area_norm=:area AND day >= :since;"
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, {"area": area_norm, "since": since_day})
+        return {k: int(v) for k, v in res.mappings().one().items()}
+
+@instrumented
 async def get_user_role(tg_id: int) -> str | None:
     sql = "SELECT role FROM users WHERE tg_id=:uid;"
     engine = get_engine()
@@ -391,7 +1227,8 @@ async def get_user_role(tg_id: int) -> str | None:
         row = res.mappings().first()
         return row["role"] if row else None
 
-async def set_user_role(tg_id: int, role: str) -> None:
+@instrumented
+async def set_user_role(tg_id: int, role: str, actor: Optional[int] = None) -> None:
     # роль только из фиксированного списка
     if role not in ("client", "walker", "admin"):
         raise ValueError("bad role")
@@ -401,8 +1238,14 @@ async def set_user_role(tg_id: int, role: str) -> None:
     """
     engine = get_engine()
     async with engine.begin() as conn:
+        # в журнал — только смена роли, повтор той же не событие
+        was = (await _exec(conn, "SELECT role FROM users WHERE tg_id=:uid;", {"uid": tg_id})).scalar()
+        if was == role:
+            return
         await _exec(conn, sql, {"uid": tg_id, "role": role})
+    journal.record("user.role", "user", tg_id, actor, role=role, was=was)
 
+@instrumented
 async def upsert_walker_profile(
     walker_id: int,
     phone: str | None = None,
@@ -433,6 +1276,7 @@ async def upsert_walker_profile(
         is_approved=COALESCE(EXCLUDED.is_approved, walker_profiles.is_approved);
     """
     engine = get_engine()
+    norm = area_names.split_areas(areas)
     async with engine.begin() as conn:
         await _exec(conn, sql, {
             "wid": walker_id,
@@ -444,7 +1288,16 @@ async def upsert_walker_profile(
             "bio": bio,
             "is_approved": is_approved,
         })
+        # areas перезаписываются целиком — и нормализованный список тоже
+        await _exec(conn, "DELETE FROM walker_areas WHERE walker_id=:wid;", {"wid": walker_id})
+        if norm:
+            await conn.execute(text("INSERT INTO walker_areas (walker_id, area_norm) VALUES (:wid, :a);"),
+                               [{"wid": walker_id, "a": a} for a in norm])
+    if _area_index is not None:
+        for a in norm:
+            _area_index.add(a)
 
+@instrumented
 async def get_walker_profile(walker_id: int) -> dict | None:
     sql = """
     SELECT
@@ -452,7 +1305,11 @@ async def get_walker_profile(walker_id: int) -> dict | None:
         phone,
         bio,
         price_from AS rate,   -- 👈 алиас, чтобы в коде/тестах был ключ 'rate'
-        areas
+        areas,
+        rating_sum,
+        rating_count,
+        radius_km,
+        geo_cell
     FROM walker_profiles
     WHERE walker_id = :wid;
     """
@@ -462,86 +1319,364 @@ async def get_walker_profile(walker_id: int) -> dict | None:
         row = res.mappings().first()
         return dict(row) if row else None
 
-async def list_walkers_ids() -> list[int]:
+def _today() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d")
+
+def prefs_filter(order: dict | None, walker_col: str) -> tuple[str, str, dict]:
+    """
+    (JOIN, условие WHERE, параметры) — отсечь walker'ов, чьи walker_prefs
+    не пропускают заказ. Без заказа фильтра нет.
+    """
+    if not order:
+        return "", "", {}
+    join = f"""
+    LEFT JOIN walker_prefs wpf ON wpf.walker_id = {walker_col}
+    LEFT JOIN walker_deliveries wdl ON wdl.walker_id = {walker_col} AND wdl.day = :pf_day"""
+    # CAST — asyncpg не выводит тип у параметра, который сравнивают с NULL
+    where = """
+      AND (wpf.walker_id IS NULL OR (
+            (wpf.services_mask IS NULL OR (wpf.services_mask & :pf_service) <> 0)
+        AND (wpf.sizes_mask IS NULL OR (wpf.sizes_mask & :pf_size) <> 0)
+        AND (wpf.min_budget IS NULL OR CAST(:pf_budget AS INTEGER) IS NULL
+             OR CAST(:pf_budget AS INTEGER) >= wpf.min_budget)
+        AND (wpf.hour_from IS NULL OR CAST(:pf_hour AS INTEGER) IS NULL OR CASE
+               WHEN wpf.hour_from < wpf.hour_to
+                 THEN CAST(:pf_hour AS INTEGER) >= wpf.hour_from AND CAST(:pf_hour AS INTEGER) < wpf.hour_to
+               WHEN wpf.hour_from > wpf.hour_to
+                 THEN CAST(:pf_hour AS INTEGER) >= wpf.hour_from OR CAST(:pf_hour AS INTEGER) < wpf.hour_to
+               ELSE 1=1 END)
+        AND (wpf.max_per_day IS NULL OR COALESCE(wdl.sent, 0) < wpf.max_per_day)
+      ))"""
+    all_bits = lambda bits: sum(bits.values())
+    params = {
+        # неизвестная услуга/размер — пропускаем всем (все биты)
+        "pf_service": walker_prefs.SERVICES.get(order.get("service"), all_bits(walker_prefs.SERVICES)),
+        "pf_size": walker_prefs.SIZES.get(order.get("pet_size"), all_bits(walker_prefs.SIZES)),
+        "pf_budget": order.get("budget"),
+        "pf_hour": walker_prefs.order_hour(order.get("when_at")),
+        "pf_day": _today(),
+    }
+    return join, where, params
+
+@instrumented
+async def get_walker_prefs(walker_id: int) -> dict | None:
+    cols = ", ".join(walker_prefs.FIELDS)
+    sql = f"SELECT {cols} FROM walker_prefs WHERE walker_id=:wid;"
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, {"wid": walker_id})
+        row = res.mappings().first()
+        return dict(row) if row else None
+
+@instrumented
+async def set_walker_prefs(walker_id: int, **values: Any) -> None:
+    """Полная перезапись фильтров (поля dogbot.prefs.FIELDS, отсутствующие — NULL)."""
+    unknown = set(values) - set(walker_prefs.FIELDS)
+    if unknown:
+        raise ValueError(f"unknown prefs: {sorted(unknown)}")
+    cols = walker_prefs.FIELDS
+    sql = f"""
+    INSERT INTO walker_prefs (walker_id, {", ".join(cols)})
+    VALUES (:wid, {", ".join(":" + c for c in cols)})
+    ON CONFLICT (walker_id) DO UPDATE SET {", ".join(f"{c}=EXCLUDED.{c}" for c in cols)};
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        # FK на walker_profiles: анкеты может ещё не быть
+        await _exec(conn, "INSERT INTO walker_profiles (walker_id) VALUES (:wid) ON CONFLICT (walker_id) DO NOTHING;",
+                    {"wid": walker_id})
+        await _exec(conn, sql, {"wid": walker_id, **{c: values.get(c) for c in cols}})
+
+@instrumented
+async def record_deliveries(walker_ids: list[int]) -> None:
+    """+1 к счётчику заказов за сегодня (для max_per_day) — одним executemany."""
+    if not walker_ids:
+        return
+    sql = """
+    INSERT INTO walker_deliveries (walker_id, day, sent) VALUES (:wid, :day, 1)
+    ON CONFLICT (walker_id, day) DO UPDATE SET sent = walker_deliveries.sent + 1;
+    """
+    day = _today()
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(sql), [{"wid": wid, "day": day} for wid in walker_ids])
+
+@instrumented
+async def list_walkers_ids(order: dict | None = None) -> list[int]:
     # теперь только одобренные
-    sql = "SELECT walker_id FROM walker_profiles WHERE is_approved=1;"
+    join, where, params = prefs_filter(order, "wp.walker_id")
+    sql = f"SELECT wp.walker_id FROM walker_profiles wp{join} WHERE wp.is_approved=1{where};"
     engine = get_engine()
     async with engine.connect() as conn:
-        res = await _exec(conn, sql)
+        res = await _exec(conn, sql, params)
         return [r[0] for r in res.fetchall()]
 
-async def list_walkers_by_area(area: str) -> list[int]:
+async def _match_areas(conn: AsyncConnection, norm: str) -> list[str]:
+    """Нормализованные районы из walker_areas, подходящие под запрос: точный, иначе похожие."""
+    global _area_index
+    if conn.engine.url.get_backend_name() == "sqlite":
+        if _area_index is None:
+            res = await _exec(conn, "SELECT DISTINCT area_norm FROM walker_areas;")
+            _area_index = area_names.NgramIndex(r[0] for r in res.fetchall())
+        return _area_index.search(norm)
+    res = await _exec(conn, "SELECT 1 FROM walker_areas WHERE area_norm=:a LIMIT 1;", {"a": norm})
+    if res.first():
+        return [norm]
+    try:
+        # set_config(..., true) — только до конца транзакции этого соединения
+        await _exec(conn, "SELECT set_config('pg_trgm.similarity_threshold', :t, true);",
+                    {"t": str(area_names.SIMILARITY_THRESHOLD)})
+        res = await _exec(conn, """
+            SELECT DISTINCT area_norm, similarity(area_norm, :a) AS sim
+            FROM walker_areas WHERE area_norm % :a;
+        """, {"a": norm})
+    except Exception:
+        return []  # нет pg_trgm
+    rows = res.fetchall()
+    best = max((r[1] for r in rows), default=None)
+    # как NgramIndex.search: только самые похожие
+    return [r[0] for r in rows if r[1] == best]
+
+@instrumented
+async def list_walkers_by_area(area: str, order: dict | None = None) -> list[int]:
+    """
+    Одобренные walker'ы района. Район нормализуется (dogbot.areas), опечатки
+    находятся по триграммам — без скана всех профилей и без рассылки всем.
+    """
+    norm = area_names.normalize(area)
+    if not norm:
+        return []
+    join, where, params = prefs_filter(order, "wa.walker_id")
+    sql = text(f"""
+    SELECT DISTINCT wa.walker_id
+    FROM walker_areas wa
+    JOIN walker_profiles wp ON wp.walker_id = wa.walker_id
+    JOIN users u ON u.tg_id = wa.walker_id{join}
+    WHERE wa.area_norm IN :names
+      AND u.role='walker'
+      AND wp.is_approved{where};  -- is_approved без «=1»: в Postgres колонка BOOLEAN
+    """).bindparams(bindparam("names", expanding=True))
     engine = get_engine()
-    backend = engine.url.get_backend_name()
-    if backend == "sqlite":
-        sql = """
-        SELECT u.tg_id
-        FROM users u
-        JOIN walker_profiles wp ON wp.walker_id=u.tg_id
-        WHERE u.role='walker'
-          AND COALESCE(wp.is_approved,0)=1
-          AND lower(COALESCE(wp.areas,'')) LIKE lower(:a);
-        """
-    else:
-        sql = """
-        SELECT u.tg_id
-        FROM users u
-        JOIN walker_profiles wp ON wp.walker_id=u.tg_id
-        WHERE u.role='walker'
-          AND COALESCE(wp.is_approved,0)=1
-          AND wp.areas ILIKE :a;
-        """
-    a = f"%{area}%"
     async with engine.connect() as conn:
-        res = await _exec(conn, sql, {"a": a})
+        names = await _match_areas(conn, norm)
+        if not names:
+            return []
+        res = await conn.execute(sql, {"names": names, **params})
         return [row[0] for row in res.fetchall()]
 
-async def set_walker_approval(walker_id: int, approved: bool) -> None:
+@instrumented
+async def set_walker_location(walker_id: int, lat: float, lon: float, radius_km: float | None = None) -> None:
     """
-    Одобрить или отклонить профиль исполнителя.
+    Точка дома и рабочий радиус (None — оставить прежний или DEFAULT_RADIUS_KM).
+    geo_cell пересчитываем тут же, чтобы индекс не отставал от точки.
     """
+    radius = min(radius_km, geo.MAX_RADIUS_KM) if radius_km else None
     sql = """
-    INSERT INTO walker_profiles (walker_id, is_approved)
-    VALUES (:wid, :ap)
-    ON CONFLICT (walker_id) DO UPDATE SET is_approved=EXCLUDED.is_approved;
+    INSERT INTO walker_profiles (walker_id, home_lat, home_lon, radius_km, geo_cell)
+    VALUES (:wid, :lat, :lon, COALESCE(:r, :default_r), :cell)
+    ON CONFLICT (walker_id) DO UPDATE SET
+        home_lat=EXCLUDED.home_lat,
+        home_lon=EXCLUDED.home_lon,
+        radius_km=COALESCE(:r, walker_profiles.radius_km, EXCLUDED.radius_km),
+        geo_cell=EXCLUDED.geo_cell;
     """
     engine = get_engine()
     async with engine.begin() as conn:
-        await _exec(conn, sql, {
-            "wid": walker_id,
-            "ap": 1 if approved else 0   # ✅ конвертируем bool → int
-        })
+        await _exec(conn, sql, {"wid": walker_id, "lat": lat, "lon": lon, "r": radius,
+                                "default_r": geo.DEFAULT_RADIUS_KM, "cell": geo.encode(lat, lon)})
+
+@instrumented
+async def set_walker_radius(walker_id: int, radius_km: float) -> bool:
+    """False — точки дома ещё нет (радиус без неё бессмыслен)."""
+    sql = "UPDATE walker_profiles SET radius_km=:r WHERE walker_id=:wid AND geo_cell IS NOT NULL;"
+    engine = get_engine()
+    async with engine.begin() as conn:
+        res = await _exec(conn, sql, {"wid": walker_id, "r": min(radius_km, geo.MAX_RADIUS_KM)})
+        return res.rowcount > 0
 
+@instrumented
+async def list_walkers_near(lat: float, lon: float, order: dict | None = None) -> list[int]:
     """
-    Одобрение/отклонение профиля. Если профиля нет — создадим-заглушим.
+    Одобренные walker'ы, в чей рабочий радиус попадает точка.
+    Кандидаты — по индексу geo_cell (ячейки круга MAX_RADIUS_KM), затем точное расстояние.
+    """
+    join, where, params = prefs_filter(order, "wp.walker_id")
+    sql = text(f"""
+    SELECT u.tg_id, wp.home_lat, wp.home_lon, wp.radius_km
+    FROM walker_profiles wp
+    JOIN users u ON u.tg_id = wp.walker_id{join}
+    WHERE wp.geo_cell IN :cells
+      AND u.role='walker'
+      AND wp.is_approved{where};  -- is_approved без «=1»: в Postgres колонка BOOLEAN
+    """).bindparams(bindparam("cells", expanding=True))
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await conn.execute(sql, {"cells": geo.covering_cells(lat, lon, geo.MAX_RADIUS_KM), **params})
+        rows = res.fetchall()
+    return [wid for wid, wlat, wlon, radius in rows
+            if geo.haversine_km(lat, lon, wlat, wlon) <= (radius or geo.DEFAULT_RADIUS_KM)]
+
+@instrumented
+async def set_walker_approval(walker_id: int, approved: bool, actor: Optional[int] = None) -> None:
+    """
+    Одобрить или отклонить профиль исполнителя. Если профиля нет — создадим-заглушим.
+    Отказ помечаем rejected_at: из очереди модерации walker уходит.
     """
     sql = """
-    INSERT INTO walker_profiles (walker_id, is_approved)
-    VALUES (:wid, :appr)
-    ON CONFLICT (walker_id) DO UPDATE SET is_approved=EXCLUDED.is_approved;
+    INSERT INTO walker_profiles (walker_id, is_approved, rejected_at)
+    VALUES (:wid, CAST(:ap AS BOOLEAN), CASE WHEN CAST(:ap AS BOOLEAN) THEN NULL ELSE CURRENT_TIMESTAMP END)
+    ON CONFLICT (walker_id) DO UPDATE SET is_approved=EXCLUDED.is_approved, rejected_at=EXCLUDED.rejected_at;
     """
     engine = get_engine()
     async with engine.begin() as conn:
-        await _exec(conn, sql, {"wid": walker_id, "appr": 1 if approved else 0})
+        row = (await _exec(conn, "SELECT is_approved, rejected_at FROM walker_profiles WHERE walker_id=:wid;",
+                           {"wid": walker_id})).first()
+        was = None if row is None else "approved" if row[0] else "rejected" if row[1] is not None else "pending"
+        # как в _approve_set: повторное одобрение/отказ — не переход, ни записи, ни события
+        if was == ("approved" if approved else "rejected"):
+            return
+        await _exec(conn, sql, {"wid": walker_id, "ap": bool(approved)})
+    journal.record("walker.approval", "walker", walker_id, actor, approved=bool(approved), was=was)
 
-async def list_pending_walkers() -> list[dict]:
-    sql = """
+# ждут модерации: walker без профиля или не одобрен и не отклонён; FALSE одинаково понимают SQLite и Postgres
+_PENDING_WHERE = "u.role='walker' AND NOT COALESCE(wp.is_approved, FALSE) AND wp.rejected_at IS NULL"
+
+
+def _pending_area(area_norm: Optional[str]) -> str:
+    if not area_norm:
+        return ""
+    return " AND EXISTS (SELECT 1 FROM walker_areas wa WHERE wa.walker_id = u.tg_id AND wa.area_norm = :area)"
+
+
+@instrumented
+async def list_pending_walkers(after: Optional[int] = None, limit: Optional[int] = None,
+                               area_norm: Optional[str] = None) -> list[dict]:
+    """Очередь модерации по tg_id; after/limit — keyset-страница для /pending."""
+    params: Dict[str, Any] = {"after": after if after is not None else -1, "area": area_norm}
+    page = ""
+    if limit is not None:
+        page, params["lim"] = " LIMIT :lim", limit
+    sql = f"""
     SELECT u.tg_id, u.full_name, u.username,
            wp.phone, wp.price_from AS rate, wp.areas, wp.bio, wp.is_approved
     FROM users u
     LEFT JOIN walker_profiles wp ON wp.walker_id = u.tg_id
-    WHERE u.role='walker' AND COALESCE(wp.is_approved,0)=0
-    ORDER BY u.tg_id;
+    WHERE {_PENDING_WHERE} AND u.tg_id > :after{_pending_area(area_norm)}
+    ORDER BY u.tg_id{page};
     """
     engine = get_engine()
     async with engine.connect() as conn:
-        res = await _exec(conn, sql)
+        res = await _exec(conn, sql, params)
         return [dict(r) for r in res.mappings().all()]
-    
+
+
+async def _approve_set(where: str, params: Dict[str, Any], approved: bool, actor: Optional[int],
+                       ids: Optional[List[int]] = None) -> list[int]:
+    """
+    Одно INSERT ... SELECT ... ON CONFLICT DO UPDATE на всё множество (вместо
+    UPDATE ... = ANY(:ids) — профиля у новичка может ещё не быть). Уже
+    одобренных повторно не одобряем, уже отклонённых не отклоняем — им и
+    уведомление не нужно.
+    """
+    where += " AND NOT COALESCE(wp.is_approved, FALSE)" if approved else " AND wp.rejected_at IS NULL"
+    sql = text(f"""
+    INSERT INTO walker_profiles (walker_id, is_approved, rejected_at)
+    SELECT u.tg_id, CAST(:ap AS BOOLEAN), CASE WHEN CAST(:ap AS BOOLEAN) THEN NULL ELSE CURRENT_TIMESTAMP END
+    FROM users u
+    LEFT JOIN walker_profiles wp ON wp.walker_id = u.tg_id
+    WHERE {where}
+    ON CONFLICT (walker_id) DO UPDATE SET is_approved=EXCLUDED.is_approved, rejected_at=EXCLUDED.rejected_at
+    RETURNING walker_id;
+    """)
+    if ids is not None:
+        sql = sql.bindparams(bindparam("ids", expanding=True))
+        params = {**params, "ids": ids}
+    engine = get_engine()
+    async with engine.begin() as conn:
+        res = await conn.execute(sql, {**params, "ap": bool(approved)})
+        changed = sorted(r[0] for r in res.fetchall())
+    for wid in changed:
+        journal.record("walker.approval", "walker", wid, actor, approved=bool(approved))
+    return changed
+
+
+@instrumented
+async def set_walkers_approval(walker_ids: Sequence[int], approved: bool, actor: Optional[int] = None) -> list[int]:
+    """Одобрить/отклонить пачку walker'ов одним запросом. → кого коснулось (их и уведомляем)."""
+    ids = sorted(set(walker_ids))
+    if not ids:
+        return []
+    return await _approve_set("u.role='walker' AND u.tg_id IN :ids", {}, approved, actor, ids)
+
+
+@instrumented
+async def approve_pending_walkers(area_norm: Optional[str] = None, actor: Optional[int] = None) -> list[int]:
+    """Одобрить всю очередь модерации (или её часть по району) одним запросом; отклонённых не трогаем."""
+    return await _approve_set(_PENDING_WHERE + _pending_area(area_norm), {"area": area_norm}, True, actor)
+
+
+@instrumented
 async def get_user(tg_id: int) -> dict | None:
     sql = "SELECT tg_id, username, full_name FROM users WHERE tg_id=:uid;"
     engine = get_engine()
     async with engine.connect() as conn:
         res = await _exec(conn, sql, {"uid": tg_id})
         row = res.mappings().first()
-        return dict(row) if row else None
\ No newline at end of file
+        return dict(row) if row else None
+
+
+@instrumented
+async def take_throttle_token(key: str, rate: float, burst: int, now: float) -> bool:
+    """
+    Token bucket в общей таблице (для нескольких инстансов бота).
+    Один атомарный UPSERT: пополняем ведро по прошедшему времени и списываем токен.
+    Если токенов < 1 — WHERE не пропускает UPDATE и RETURNING ничего не вернёт.
+    """
+    refill = "throttle_buckets.tokens + (:now - throttle_buckets.updated_at) * :rate"
+    capped = f"CASE WHEN {refill} > :burst THEN :burst ELSE {refill} END"
+    sql = f"""
+    INSERT INTO throttle_buckets (key, tokens, updated_at)
+    VALUES (:key, :burst - 1, :now)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = {capped} - 1,
+        updated_at = :now
+    WHERE {capped} >= 1
+    RETURNING tokens;
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        res = await _exec(conn, sql, {"key": key, "rate": rate, "burst": burst, "now": now})
+        return res.first() is not None
+
+
+# --------------------- журнал событий ---------------------
+@instrumented
+async def insert_events(rows: List[Dict[str, Any]]) -> None:
+    """Пачка событий из dogbot.events одним executemany."""
+    if not rows:
+        return
+    sql = """
+    INSERT INTO events (at, kind, entity, entity_id, actor_id, data)
+    VALUES (:at, :kind, :entity, :entity_id, :actor_id, :data);
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(sql), [{**r, "at": _ts_param(r["at"])} for r in rows])
+
+
+@instrumented
+async def list_events(entity: str, entity_id: int, limit: int = 50) -> list[dict]:
+    """История сущности, новые сверху (по ix_events_entity)."""
+    sql = """
+    SELECT id, at, kind, entity, entity_id, actor_id, data FROM events
+    WHERE entity=:e AND entity_id=:eid
+    ORDER BY id DESC LIMIT :lim;
+    """
+    engine = get_engine()
+    async with engine.connect() as conn:
+        res = await _exec(conn, sql, {"e": entity, "eid": entity_id, "lim": limit})
+        rows = [dict(r) for r in res.mappings().all()]
+    for r in rows:
+        r["at"] = _as_utc(r["at"])
+        r["data"] = json.loads(r["data"]) if r["data"] else {}
+    return rows
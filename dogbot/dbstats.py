@@ -0,0 +1,152 @@
+# dogbot/dbstats.py
+"""
+Инструментирование слоя БД.
+
+- @instrumented на функциях dogbot.db: число вызовов, время, ошибки по имени функции;
+- события engine: время каждого SQL-запроса с привязкой к функции dogbot.db,
+  лог медленных запросов (телефоны в параметрах маскируются);
+- события пула: время от входа в функцию до соединения из пула, размер/overflow пула.
+"""
+
+from __future__ import annotations
+import functools
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from dogbot.metrics import REGISTRY
+from dogbot.tracing import tracer
+
+log = logging.getLogger("dogbot.db.slow")
+
+DB_CALL_SECONDS = REGISTRY.histogram(
+    "dogbot_db_call_seconds", "Время вызова функции dogbot.db", ("func",))
+DB_CALL_ERRORS = REGISTRY.counter(
+    "dogbot_db_call_errors_total", "Исключения в функциях dogbot.db", ("func",))
+DB_STATEMENT_SECONDS = REGISTRY.histogram(
+    "dogbot_db_statement_seconds", "Время SQL-запроса", ("func",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+DB_SLOW_STATEMENTS = REGISTRY.counter(
+    "dogbot_db_slow_statements_total", "SQL-запросы дольше порога", ("func",))
+# у пула нет события «начали ждать» — меряем от входа в функцию dogbot.db,
+# так что сюда входит и работа до первого запроса
+DB_TIME_TO_CHECKOUT = REGISTRY.histogram(
+    "dogbot_db_time_to_checkout_seconds", "От входа в функцию dogbot.db до соединения из пула", ("func",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+
+
+@dataclass
+class _Call:
+    func: str
+    started: float
+    checked_out: bool = False
+
+
+_current: ContextVar[_Call | None] = ContextVar("dogbot_db_call", default=None)
+
+
+def current_func() -> str:
+    call = _current.get()
+    return call.func if call else "other"
+
+
+def instrumented(fn):
+    """Помечает функцию dogbot.db: метрики вызова, спан трейса и контекст для SQL-событий."""
+    name = fn.__name__
+    span_name = f"db {name}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = _Call(name, time.perf_counter())
+        token = _current.set(call)
+        try:
+            if tracer.enabled:
+                with tracer.span(span_name):
+                    return await fn(*args, **kwargs)
+            return await fn(*args, **kwargs)
+        except Exception:
+            DB_CALL_ERRORS.labels(name).inc()
+            raise
+        finally:
+            DB_CALL_SECONDS.labels(name).observe(time.perf_counter() - call.started)
+            _current.reset(token)
+
+    return wrapper
+
+
+# +7 999 123-45-67, 8 (999) 123 45 67, +79991234567 ... — только форма телефона:
+# даты, время и id («2030-01-01 08:00:00», «1700000000») не трогаем
+_PHONE_RE = re.compile(r"(?<![\w\-:.+])(?:\+7|7|8)[\s(]*\d{3}[\s)]*\d{3}[\s\-]?\d{2}[\s\-]?\d{2}(?![\w\-:])")
+
+
+def _mask_phone(s: str) -> str:
+    return _PHONE_RE.sub(lambda m: re.sub(r"\d(?=(?:\D*\d){2})", "*", m.group(0)), s)
+
+
+def mask_params(params: Any) -> Any:
+    """Телефоны в параметрах запроса → +7*********67 (для логов)."""
+    if isinstance(params, dict):
+        return {k: mask_params(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return type(params)(mask_params(v) for v in params)
+    if isinstance(params, str):
+        return _mask_phone(params)
+    return params
+
+
+def _pool_stats(pool) -> Dict[str, float]:
+    stats = {}
+    for key in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, key, None)
+        if callable(fn):
+            try:
+                stats[key] = fn()
+            except Exception:
+                pass
+    return stats
+
+
+def instrument_engine(engine: AsyncEngine, slow_ms: float) -> None:
+    sync_engine = engine.sync_engine
+    slow_s = slow_ms / 1000.0
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("dogbot_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["dogbot_query_start"].pop()
+        func = current_func()
+        DB_STATEMENT_SECONDS.labels(func).observe(elapsed)
+        if elapsed >= slow_s:
+            DB_SLOW_STATEMENTS.labels(func).inc()
+            log.warning(
+                "slow query %.1fms in %s: %s params=%r",
+                elapsed * 1000, func, " ".join(statement.split()), mask_params(parameters),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(ctx):
+        # запрос упал — after_cursor_execute не будет, снимаем его отметку
+        starts = ctx.connection.info.get("dogbot_query_start") if ctx.connection is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        call = _current.get()
+        if call is not None and not call.checked_out:
+            call.checked_out = True
+            DB_TIME_TO_CHECKOUT.labels(call.func).observe(time.perf_counter() - call.started)
+
+    REGISTRY.add_collector(
+        "dogbot_db_pool", "Состояние пула соединений", "gauge", "stat",
+        lambda: _pool_stats(sync_engine.pool),
+    )
@@ -0,0 +1,126 @@
+# dogbot/events.py
+"""
+Журнал изменений состояния (таблица events): кто, когда и что поменял —
+роль, одобрение walker'а, создание, публикация, назначение, отмена, перенос
+и завершение заказа. Пишутся только настоящие переходы: повтор того же
+значения — не событие.
+
+Запись не на пути запроса: функции db кладут событие в кольцевой буфер
+в памяти (record — без await и без БД), фоновая задача раз в
+EVENTS_FLUSH_INTERVAL секунд пишет его пачками по EVENTS_BATCH одним
+executemany (db.insert_events).
+
+Потери ограничены и видны в метриках:
+  * буфер на EVENTS_BUFFER событий; переполнился — вытесняем самые старые
+    (stats["dropped"]), запросы не ждут журнал;
+  * пачка не записалась (БД недоступна) — возвращаем её в голову буфера,
+    сколько влезет, остальное тоже в dropped;
+  * shutdown() дожидается фоновой задачи и дописывает буфер перед
+    закрытием пула.
+
+    journal.record("order.cancelled", "order", oid, actor=uid)
+"""
+
+from __future__ import annotations
+import asyncio
+import datetime as dt
+import json
+import logging
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from dogbot.settings import Settings
+
+log = logging.getLogger(__name__)
+
+
+class EventLog:
+    def __init__(self, capacity: int = 10_000, batch: int = 500, flush_interval: float = 1.0):
+        self.capacity = capacity
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self._buf: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Counter[str] = Counter()  # recorded / flushed / dropped / failed_batches
+
+    @property
+    def depth(self) -> int:
+        return len(self._buf)
+
+    def record(self, kind: str, entity: str, entity_id: int, actor: Optional[int] = None, **data: Any) -> None:
+        if len(self._buf) == self._buf.maxlen:
+            self.stats["dropped"] += 1  # deque сам вытеснит самое старое
+        self._buf.append({
+            "at": dt.datetime.now(dt.timezone.utc),
+            "kind": kind,
+            "entity": entity,
+            "entity_id": entity_id,
+            "actor_id": actor,
+            "data": json.dumps(data, ensure_ascii=False, default=str) if data else None,
+        })
+        self.stats["recorded"] += 1
+
+    async def flush(self) -> int:
+        """Записать всё, что накопилось, пачками по batch. → сколько записано."""
+        from dogbot import db  # db сам пишет в журнал — импорт здесь, без цикла
+
+        total = 0
+        async with self._lock:
+            while self._buf:
+                rows: List[Dict[str, Any]] = [self._buf.popleft() for _ in range(min(self.batch, len(self._buf)))]
+                try:
+                    await db.insert_events(rows)
+                except BaseException as e:
+                    # и при отмене задачи (shutdown): снятые с буфера строки не теряем —
+                    # лучше редкий дубль, если INSERT всё же успел закоммититься
+                    self._requeue(rows)
+                    if not isinstance(e, Exception):
+                        raise
+                    self.stats["failed_batches"] += 1
+                    log.exception("events flush failed, %d events in buffer", len(self._buf))
+                    break
+                self.stats["flushed"] += len(rows)
+                total += len(rows)
+        return total
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        # старые события вперёд новых, но не больше ёмкости: лишнее — потеря
+        room = self.capacity - len(self._buf)
+        keep = rows[-room:] if room > 0 else []
+        self.stats["dropped"] += len(rows) - len(keep)
+        self._buf.extendleft(reversed(keep))
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="events")
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                # дождаться: прерванный flush вернёт свою пачку в буфер
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._buf:
+            log.warning("events: %d events lost on shutdown", len(self._buf))
+
+
+journal = EventLog()
+
+
+def configure(settings: Settings) -> EventLog:
+    """Размеры буфера и пачки глобального journal по settings."""
+    journal.capacity = settings.EVENTS_BUFFER
+    journal.batch = settings.EVENTS_BATCH
+    journal.flush_interval = settings.EVENTS_FLUSH_INTERVAL
+    journal._buf = deque(journal._buf, maxlen=settings.EVENTS_BUFFER)
+    return journal
@@ -0,0 +1,68 @@
+# dogbot/export.py
+"""
+Выгрузка для бухгалтерии (/export): orders, proposals, assignments за период,
+по файлу .csv.gz на таблицу.
+
+Строки приходят из db.export_rows пачками (серверный курсор) и сразу пишутся
+в gzip-файл на диске; CSV и сжатие — в потоке, чтобы не держать event loop.
+В памяти только текущая пачка, сколько бы строк ни было в таблицах.
+
+    since, until = parse_range("2024-05-01 2024-05-31")
+    path, rows = await export_csv("orders", since, until, tmpdir)
+"""
+
+from __future__ import annotations
+import asyncio
+import csv
+import datetime as dt
+import gzip
+from pathlib import Path
+from typing import Any, Sequence, Tuple
+
+from dogbot import db
+
+TABLES = tuple(db.EXPORT_COLUMNS)
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def parse_range(args: str, today: dt.date | None = None) -> Tuple[dt.datetime, dt.datetime]:
+    """
+    «» — последние DEFAULT_DAYS дней, «2024-05-01» — с даты по сегодня,
+    «2024-05-01 2024-05-31» — обе даты включительно. → [since, until) в UTC.
+    """
+    today = today or dt.datetime.now(dt.timezone.utc).date()
+    parts = args.split()
+    if len(parts) > 2:
+        raise ValueError("формат: /export [с YYYY-MM-DD [по YYYY-MM-DD]]")
+    try:
+        days = [dt.date.fromisoformat(p) for p in parts]
+    except ValueError:
+        raise ValueError("даты в формате YYYY-MM-DD") from None
+    start = days[0] if days else today - dt.timedelta(days=DEFAULT_DAYS - 1)
+    end = days[1] if len(days) == 2 else today
+    if end < start:
+        raise ValueError("конец периода раньше начала")
+    if (end - start).days >= MAX_DAYS:
+        raise ValueError(f"не больше {MAX_DAYS} дней за раз")
+    utc = dt.timezone.utc
+    since = dt.datetime.combine(start, dt.time(), utc)
+    return since, dt.datetime.combine(end + dt.timedelta(days=1), dt.time(), utc)
+
+
+async def export_csv(table: str, since: dt.datetime, until: dt.datetime, directory: Path | str) -> Tuple[Path, int]:
+    """Записать table за [since, until) в directory/<table>_<с>_<по>.csv.gz. → (путь, строк)."""
+    last = until - dt.timedelta(days=1)
+    path = Path(directory) / f"{table}_{since:%Y%m%d}_{last:%Y%m%d}.csv.gz"
+    out = gzip.open(path, "wt", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(out)
+        writer.writerow(db.EXPORT_COLUMNS[table])
+
+        async def sink(rows: Sequence[Sequence[Any]]) -> None:
+            await asyncio.to_thread(writer.writerows, rows)
+
+        count = await db.export_rows(table, since, until, sink)
+    finally:
+        out.close()
+    return path, count
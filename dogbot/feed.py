@@ -0,0 +1,135 @@
+# dogbot/feed.py
+"""
+Лента заказов для walker'а (/feed): pull вместо push.
+
+Страница собирается из страниц по районам walker'а (db.list_feed, keyset по
+(when_at, id)); страница района кешируется на CACHE_TTL секунд и общая для
+всех walker'ов района — первые страницы популярных районов не ходят в БД.
+Фильтры walker'а (dogbot.prefs) применяются уже к кешированным строкам.
+
+    page = await feed_page(walker_id)            # первая страница
+    page = await feed_page(walker_id, page.next) # следующая
+"""
+
+from __future__ import annotations
+import datetime as dt
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from dogbot import db, prefs
+
+PAGE_SIZE = 5
+AREA_BATCH = 20         # строк района за один запрос (с запасом на фильтры walker'а)
+CACHE_TTL = 30.0        # свежесть ленты: новый заказ появится не позже чем через TTL
+HORIZON_DAYS = 14
+
+Cursor = Tuple[int, int]  # (when_at в микросекундах epoch, id) — точно и влезает в callback_data
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+class TTLCache:
+    """dict с истечением по времени и ограничением размера (вытесняем самые старые)."""
+
+    def __init__(self, ttl: float, max_items: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.clock = clock
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None or item[0] <= self.clock():
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if len(self._data) >= self.max_items:
+            # dict хранит порядок вставки — первые ключи самые старые
+            for old in list(self._data)[: self.max_items // 10 or 1]:
+                del self._data[old]
+        self._data[key] = (self.clock() + self.ttl, value)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+_cache = TTLCache(CACHE_TTL)
+
+
+def when_utc(value: Any) -> dt.datetime:
+    # SQLite отдаёт ISO-строку, Postgres — datetime
+    if isinstance(value, str):
+        value = dt.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt.timezone.utc)
+    return value
+
+
+def _key(row: Dict[str, Any]) -> Tuple[dt.datetime, int]:
+    return when_utc(row["when_at"]), row["id"]
+
+
+def to_cursor(key: Tuple[dt.datetime, int]) -> Cursor:
+    # целые микросекунды, без float: усечение до секунд повторяло бы строки той же секунды
+    return (key[0] - _EPOCH) // dt.timedelta(microseconds=1), key[1]
+
+
+def from_cursor(cursor: Cursor) -> Tuple[dt.datetime, int]:
+    return _EPOCH + dt.timedelta(microseconds=cursor[0]), cursor[1]
+
+
+async def _area_batch(area: str, after: Optional[Cursor], now: dt.datetime) -> Tuple[List[Dict[str, Any]], bool]:
+    """(строки района после курсора, был ли батч полным — тогда за ним есть ещё)."""
+    key = (area, after)
+    rows = _cache.get(key)
+    if rows is None:
+        until = now + dt.timedelta(days=HORIZON_DAYS)
+        rows = await db.list_feed(area, now, until, from_cursor(after) if after else None, AREA_BATCH)
+        _cache.set(key, rows)
+    # кеш живёт дольше секунды: прошедшие заказы отрежем здесь
+    return [r for r in rows if when_utc(r["when_at"]) >= now], len(rows) >= AREA_BATCH
+
+
+@dataclass
+class FeedPage:
+    orders: List[Dict[str, Any]]
+    next: Optional[Cursor]  # None — дальше пусто
+
+
+async def feed_page(walker_id: int, after: Optional[Cursor] = None,
+                    now: Optional[dt.datetime] = None) -> FeedPage:
+    now = now or dt.datetime.now(dt.timezone.utc)
+    areas = await db.get_walker_areas(walker_id)
+    if not areas:
+        return FeedPage([], None)
+    p = await db.get_walker_prefs(walker_id)
+
+    merged: Dict[int, Dict[str, Any]] = {}
+    bound = None  # дальше этой точки у «полного» района могут быть непрочитанные строки
+    for area in areas:
+        rows, full = await _area_batch(area, after, now)
+        for r in rows:
+            merged[r["id"]] = r
+        if full and rows:
+            last = _key(rows[-1])
+            bound = last if bound is None else min(bound, last)
+
+    stream = sorted(merged.values(), key=_key)
+    if bound is not None:
+        stream = [r for r in stream if _key(r) <= bound]
+
+    out: List[Dict[str, Any]] = []
+    last_seen = None
+    for r in stream:
+        last_seen = _key(r)
+        if prefs.matches(p, r):
+            out.append(r)
+            if len(out) == PAGE_SIZE:
+                break
+    more = bound is not None or (last_seen is not None and stream and last_seen < _key(stream[-1]))
+    return FeedPage(out, to_cursor(last_seen) if more and last_seen else None)
@@ -0,0 +1,96 @@
+# dogbot/geo.py
+"""
+Геохеш и расстояния для подбора исполнителей по точке.
+
+Точка дома walker'а хранится вместе с ячейкой геохеша (PRECISION символов,
+≈0.6×0.6 км в средних широтах) в индексируемой колонке walker_profiles.geo_cell.
+Поиск по точке заказа: ячейки, покрывающие круг MAX_RADIUS_KM, → выборка
+по индексу `geo_cell IN (...)` → точная проверка haversine против радиуса
+самого walker'а.
+
+    cells = covering_cells(55.75, 37.62, 5.0)
+    haversine_km(55.75, 37.62, 55.76, 37.64)
+"""
+
+from __future__ import annotations
+import math
+from typing import List, Set, Tuple
+
+PRECISION = 6
+MAX_RADIUS_KM = 5.0       # больше — слишком много ячеек в IN и адресатов в рассылке
+DEFAULT_RADIUS_KM = 3.0
+EARTH_RADIUS_KM = 6371.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    out = []
+    bits = ch = 0
+    even = True  # биты чередуются: долгота, широта, долгота, ...
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch = ch << 1 | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = ch << 1 | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits = ch = 0
+    return "".join(out)
+
+
+def cell_size(precision: int = PRECISION) -> Tuple[float, float]:
+    """(высота, ширина) ячейки в градусах."""
+    total = 5 * precision
+    lon_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def covering_cells(lat: float, lon: float, radius_km: float, precision: int = PRECISION) -> List[str]:
+    """
+    Ячейки, пересекающие квадрат вокруг круга радиуса radius_km.
+    Обходим bbox с шагом в ячейку — по одной точке на ячейку, плюс края.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # у полюса cos → 0: ограничим, чтобы не обходить весь мир
+    dlon = min(180.0, dlat / max(math.cos(math.radians(lat)), 0.01))
+    h, w = cell_size(precision)
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    lon_lo, lon_hi = lon - dlon, lon + dlon
+
+    def steps(lo: float, hi: float, step: float) -> List[float]:
+        n = int((hi - lo) / step) + 1
+        return [lo + i * step for i in range(n)] + [hi]
+
+    cells: Set[str] = set()
+    for y in steps(lat_lo, lat_hi, h):
+        y = min(y, 90.0 - 1e-9)
+        for x in steps(lon_lo, lon_hi, w):
+            x = (x + 180.0) % 360.0 - 180.0  # через антимеридиан
+            cells.add(encode(y, x, precision))
+    return sorted(cells)
@@ -0,0 +1,58 @@
+# dogbot/http.py
+"""
+Общая HTTP-сессия для Bot API.
+Один пул keep-alive соединений на процесс: рассылки не открывают
+новое TCP/TLS-соединение на каждое сообщение.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Tuple
+
+from aiohttp import ClientTimeout
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer, PRODUCTION
+
+from dogbot.settings import Settings
+
+
+def _json_codec() -> Tuple[Callable[..., Any], Callable[..., str]]:
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return json.loads, json.dumps  # orjson не установлен — стандартный json
+    return orjson.loads, lambda obj: orjson.dumps(obj).decode()
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """AiohttpSession с настраиваемым коннектором и раздельным connect-таймаутом."""
+
+    def __init__(self, connect_timeout: float, keepalive_timeout: float, dns_ttl: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.connect_timeout = connect_timeout
+        self._connector_init.update(
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_ttl,
+            enable_cleanup_closed=True,
+        )
+
+    async def make_request(self, bot, method, timeout=None):
+        total = self.timeout if timeout is None else timeout
+        return await super().make_request(
+            bot, method, timeout=ClientTimeout(total=total, connect=min(self.connect_timeout, total)),
+        )
+
+
+def make_session(settings: Settings) -> AiohttpSession:
+    loads, dumps = _json_codec()
+    api = TelegramAPIServer.from_base(settings.BOT_API_URL) if settings.BOT_API_URL else PRODUCTION
+    return TunedAiohttpSession(
+        api=api,
+        limit=settings.HTTP_POOL_LIMIT,
+        timeout=settings.HTTP_TIMEOUT,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        keepalive_timeout=settings.HTTP_KEEPALIVE,
+        dns_ttl=settings.HTTP_DNS_TTL,
+        json_loads=loads,
+        json_dumps=dumps,
+    )
@@ -1,6 +1,12 @@
-
 # dogbot/keyboards.py
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import (
+    ReplyKeyboardMarkup,
+    KeyboardButton,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+)
+
+from dogbot.callbacks import ProposalCb, CandidatesCb, RateCb
 
 def main_menu() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
@@ -12,3 +18,41 @@ def main_menu() -> ReplyKeyboardMarkup:
         ],
         resize_keyboard=True
     )
+
+def kb_walk_types() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Обычный", callback_data="walk:normal")],
+        [InlineKeyboardButton(text="Активный", callback_data="walk:active")],
+        [InlineKeyboardButton(text="⬅️ Отмена", callback_data="back:main")],
+    ])
+
+def kb_services() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Выгул", callback_data="srv:walk")],
+        [InlineKeyboardButton(text="Передержка", callback_data="srv:boarding")],
+        [InlineKeyboardButton(text="Няня", callback_data="srv:nanny")],
+        [InlineKeyboardButton(text="⬅️ Отмена", callback_data="back:main")],
+    ])
+
+def kb_order_candidates(order_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="👀 Кандидаты", callback_data=CandidatesCb(order_id=order_id).pack())],
+    ])
+
+def kb_respond(order_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✋ Откликнуться", callback_data=ProposalCb(order_id=order_id).pack())],
+    ])
+
+def kb_rate(order_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"{n}⭐", callback_data=RateCb(order_id=order_id, stars=n).pack())
+         for n in range(1, 6)],
+    ])
+
+def kb_location(text: str = "📍 Отправить геопозицию") -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text=text, request_location=True)]],
+        resize_keyboard=True,
+        one_time_keyboard=True,
+    )
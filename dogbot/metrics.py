@@ -0,0 +1,256 @@
+# dogbot/metrics.py
+"""
+Метрики в формате Prometheus без внешних зависимостей.
+
+- задержка/ошибки/in-flight по хендлерам (middleware на апдейты);
+- метрики рассылок;
+- счётчики из других модулей (антифлуд, исходящие ошибки) — через collect-колбэки;
+- лёгкий HTTP /metrics на aiohttp.
+"""
+
+from __future__ import annotations
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: Dict[LabelValues, Any] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: LabelValues, child) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labelnames, values)} {child.value}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последний — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, values: LabelValues, child: _HistogramChild) -> List[str]:
+        names = self.labelnames + ("le",)
+        lines, acc = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+            acc += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_fmt_labels(names, values + (le,))} {acc}")
+        labels = _fmt_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Tuple[str, str, str, str, Callable[[], Mapping[str, float]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, name: str, help: str, kind: str, label: str,
+                      collect: Callable[[], Mapping[str, float]]) -> None:
+        """Значения считываются из чужого dict/Counter в момент скрейпа — без дублей на горячем пути."""
+        self._collectors = [c for c in self._collectors if c[0] != name]
+        self._collectors.append((name, help, kind, label, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for name, help, kind, label, collect in self._collectors:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for key, value in dict(collect()).items():
+                lines.append(f"{name}{_fmt_labels((label,), (key,))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_LATENCY = REGISTRY.histogram(
+    "dogbot_handler_latency_seconds", "Время обработки апдейта хендлером", ("handler", "update_type"))
+HANDLER_ERRORS = REGISTRY.counter(
+    "dogbot_handler_errors_total", "Исключения в хендлерах", ("handler", "update_type"))
+HANDLER_INFLIGHT = REGISTRY.gauge(
+    "dogbot_handler_inflight", "Апдейты в обработке", ("update_type",))
+
+BROADCAST_RECIPIENTS = REGISTRY.counter(
+    "dogbot_broadcast_recipients_total", "Получатели рассылок заказов")
+BROADCAST_SENT = REGISTRY.counter(
+    "dogbot_broadcast_sent_total", "Успешно доставленные карточки заказов")
+BROADCAST_FAILED = REGISTRY.counter(
+    "dogbot_broadcast_failed_total", "Неудачные отправки карточек заказов")
+BROADCAST_DURATION = REGISTRY.histogram(
+    "dogbot_broadcast_duration_seconds", "Длительность рассылки заказа",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+
+ARCHIVED_ORDERS = REGISTRY.counter(
+    "dogbot_archived_orders_total", "Закрытые заказы, перенесённые в архив")
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    # для таблицы callback'ов настоящий хендлер лежит в callback_route
+    obj = data.get("callback_route") or data.get("handler")
+    callback = getattr(obj, "callback", None)
+    return getattr(callback, "__name__", "unknown")
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware на dp.update: in-flight и задержка апдейта целиком.
+    Имя хендлера, до которого дошёл апдейт, подкладывает HandlerNameMiddleware
+    (inner) в общий для цепочки слот data["metrics_slot"].
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        slot = data["metrics_slot"] = ["unhandled"]
+        inflight = HANDLER_INFLIGHT.labels(update_type)
+        inflight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(slot[0], update_type).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(slot[0], update_type).observe(time.perf_counter() - start)
+            inflight.dec()
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    async def __call__(self, handler, event, data):
+        slot = data.get("metrics_slot")
+        if slot is not None:
+            slot[0] = handler_name(data)
+        return await handler(event, data)
+
+
+async def start_metrics_server(host: str, port: int, registry: Registry = REGISTRY):
+    """Поднять GET /metrics. Возвращает AppRunner — его cleanup() останавливает сервер."""
+    from aiohttp import web
+
+    async def metrics(_request: web.Request) -> web.Response:
+        return web.Response(body=registry.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
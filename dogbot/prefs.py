@@ -0,0 +1,119 @@
+# dogbot/prefs.py
+"""
+Фильтры подписки walker'а: какие заказы ему вообще присылать.
+
+Хранятся в walker_prefs и проверяются прямо в запросе получателей рассылки
+(dogbot.db.prefs_filter) — лишние адресаты отсекаются до вызовов Bot API.
+Услуги и размеры — битовые маски (`mask & бит <> 0` одинаково работает
+в SQLite и Postgres), NULL в любом поле — «без ограничений».
+
+    /prefs services=walk,nanny sizes=small,medium hours=8-20 budget=500 per_day=5
+    /prefs reset
+"""
+
+from __future__ import annotations
+import datetime as dt
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+SERVICES = {"walk": 1, "boarding": 2, "nanny": 4}
+SIZES = {"small": 1, "medium": 2, "large": 4}
+FIELDS = ("services_mask", "sizes_mask", "hour_from", "hour_to", "min_budget", "max_per_day")
+
+
+def mask(names: Iterable[str], bits: Mapping[str, int]) -> int:
+    out = 0
+    for name in names:
+        name = name.strip().lower()
+        if name not in bits:
+            raise ValueError(f"неизвестное значение {name!r}, можно: {', '.join(bits)}")
+        out |= bits[name]
+    return out
+
+
+def unmask(value: Optional[int], bits: Mapping[str, int]) -> str:
+    if not value:
+        return "любые"
+    return ", ".join(name for name, bit in bits.items() if value & bit)
+
+
+def parse(args: str, current: Mapping[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    «services=walk,nanny hours=8-20 budget=any» → значения полей FIELDS поверх current.
+    any/0 снимает ограничение. ValueError с понятным текстом на кривой ввод.
+    """
+    out = {k: (current or {}).get(k) for k in FIELDS}
+    for token in args.split():
+        key, sep, value = token.partition("=")
+        key, value = key.lower(), value.strip().lower()
+        if not sep or not value:
+            raise ValueError(f"ожидалось ключ=значение, а не {token!r}")
+        clear = value in ("any", "0", "-")
+        if key == "services":
+            out["services_mask"] = None if clear else mask(value.split(","), SERVICES)
+        elif key == "sizes":
+            out["sizes_mask"] = None if clear else mask(value.split(","), SIZES)
+        elif key == "hours":
+            if clear:
+                out["hour_from"] = out["hour_to"] = None
+                continue
+            lo, _, hi = value.partition("-")
+            if not (lo.isdigit() and hi.isdigit()) or not (0 <= int(lo) <= 23 and 1 <= int(hi) <= 24):
+                raise ValueError("часы: hours=8-20 (через полночь: hours=22-6)")
+            out["hour_from"], out["hour_to"] = int(lo), int(hi) % 24
+        elif key in ("budget", "per_day"):
+            if not value.isdigit() and not clear:
+                raise ValueError(f"{key}: целое число или any")
+            out["min_budget" if key == "budget" else "max_per_day"] = None if clear else int(value)
+        else:
+            raise ValueError(f"неизвестный ключ {key!r}: services, sizes, hours, budget, per_day")
+    return out
+
+
+def describe(p: Mapping[str, Any] | None) -> str:
+    p = p or {}
+    hours = "любое"
+    if p.get("hour_from") is not None:
+        hours = f"{p['hour_from']:02d}:00–{p['hour_to'] or 24:02d}:00 UTC"
+    return (
+        f"Услуги: {unmask(p.get('services_mask'), SERVICES)}\n"
+        f"Размеры: {unmask(p.get('sizes_mask'), SIZES)}\n"
+        f"Время: {hours}\n"
+        f"Бюджет от: {p.get('min_budget') or '—'}\n"
+        f"Заказов в день: {p.get('max_per_day') or 'без лимита'}"
+    )
+
+
+def order_hour(when_at: Any) -> Optional[int]:
+    """Час начала заказа (UTC); в SQLite when_at — ISO-строка."""
+    if isinstance(when_at, str):
+        try:
+            when_at = dt.datetime.fromisoformat(when_at)
+        except ValueError:
+            return None
+    if not isinstance(when_at, dt.datetime):
+        return None
+    if when_at.tzinfo is not None:
+        when_at = when_at.astimezone(dt.timezone.utc)
+    return when_at.hour
+
+
+def matches(p: Mapping[str, Any] | None, order: Mapping[str, Any]) -> bool:
+    """То же, что условие db.prefs_filter, но для уже выбранной строки (лента /feed). Без max_per_day."""
+    if not p:
+        return True
+    if p.get("services_mask") and order.get("service") in SERVICES \
+            and not p["services_mask"] & SERVICES[order["service"]]:
+        return False
+    if p.get("sizes_mask") and order.get("pet_size") in SIZES \
+            and not p["sizes_mask"] & SIZES[order["pet_size"]]:
+        return False
+    if p.get("min_budget") is not None and order.get("budget") is not None \
+            and order["budget"] < p["min_budget"]:
+        return False
+    hour = order_hour(order.get("when_at"))
+    lo, hi = p.get("hour_from"), p.get("hour_to")
+    if lo is not None and hi is not None and hour is not None and lo != hi:
+        inside = lo <= hour < hi if lo < hi else (hour >= lo or hour < hi)
+        if not inside:
+            return False
+    return True
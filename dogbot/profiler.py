@@ -0,0 +1,182 @@
+# dogbot/profiler.py
+"""
+Сэмплирующий профайлер живого процесса (команда /perf у админа).
+
+Отдельный поток раз в `interval` секунд снимает стек потока event loop
+через sys._current_frames() — сам loop не инструментируется, накладные
+расходы ≈ стоимость обхода одного стека.
+
+Параллельно в loop крутится «пульс»: корутина, обновляющая отметку
+времени каждые `interval`. Если поток-сэмплер видит, что пульс старше
+`block_ms`, loop заблокирован — запоминаем стек виновника и длительность.
+
+Отчёт — текст: горячие функции (self/total), корутины, блокировки loop
+и collapsed stacks (формат flamegraph.pl / speedscope) в конце.
+"""
+
+from __future__ import annotations
+import asyncio
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+Frame = Tuple[str, str, int]  # (файл, функция, строка начала)
+
+MAX_SECONDS = 300
+_running = False
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_filename, code.co_name, code.co_firstlineno
+
+
+def _fmt(key: Frame) -> str:
+    filename, name, line = key
+    for marker in ("/site-packages/", "/dogbot/", "/lib/python"):
+        i = filename.find(marker)
+        if i != -1:
+            filename = filename[i + 1:]
+            break
+    return f"{name} ({filename}:{line})"
+
+
+@dataclass
+class Block:
+    duration: float
+    stack: Tuple[Frame, ...]  # от корня к листу
+
+
+@dataclass
+class Profile:
+    seconds: float
+    interval: float
+    samples: int = 0
+    idle: int = 0
+    stacks: Counter = field(default_factory=Counter)   # Tuple[Frame, ...] → сэмплы
+    coroutines: Counter = field(default_factory=Counter)
+    blocks: List[Block] = field(default_factory=list)
+    max_lag: float = 0.0
+
+    def self_counts(self) -> Counter:
+        c: Counter = Counter()
+        for stack, n in self.stacks.items():
+            c[stack[-1]] += n
+        return c
+
+    def total_counts(self) -> Counter:
+        c: Counter = Counter()
+        for stack, n in self.stacks.items():
+            for key in set(stack):
+                c[key] += n
+        return c
+
+    def render(self, top: int = 25) -> str:
+        busy = self.samples - self.idle
+        ms = self.interval * 1000
+        out = [
+            f"# dogbot profile: {self.seconds:g}s, interval {ms:.0f}ms",
+            f"# samples: {self.samples}, loop busy: {busy} "
+            f"({100 * busy / max(self.samples, 1):.1f}%), max loop lag: {self.max_lag * 1000:.0f}ms",
+            "",
+            "## hot functions (self)",
+        ]
+        for key, n in self.self_counts().most_common(top):
+            out.append(f"{n:7d} {100 * n / max(busy, 1):5.1f}%  {_fmt(key)}")
+        out += ["", "## hot functions (total)"]
+        for key, n in self.total_counts().most_common(top):
+            out.append(f"{n:7d} {100 * n / max(busy, 1):5.1f}%  {_fmt(key)}")
+        out += ["", "## coroutines on CPU (≈ms)"]
+        for key, n in self.coroutines.most_common(top):
+            out.append(f"{n * ms:9.0f}  {_fmt(key)}")
+        out += ["", f"## event loop blocked (>= threshold): {len(self.blocks)}"]
+        for b in sorted(self.blocks, key=lambda b: b.duration, reverse=True)[:top]:
+            out.append(f"- {b.duration * 1000:.0f}ms")
+            out.extend(f"    {_fmt(key)}" for key in reversed(b.stack[-15:]))
+        out += ["", "## collapsed stacks"]
+        for stack, n in self.stacks.most_common():
+            out.append(";".join(_fmt(k) for k in stack) + f" {n}")
+        return "\n".join(out) + "\n"
+
+
+class Sampler:
+    def __init__(self, thread_id: int, interval: float = 0.005, block_ms: float = 100.0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.block_s = block_ms / 1000.0
+        self._beat = time.perf_counter()
+        self._stop = threading.Event()
+
+    def _sample(self, profile: Profile, block: Optional[Block]) -> Optional[Block]:
+        frame = sys._current_frames().get(self.thread_id)
+        lag = time.perf_counter() - self._beat
+        profile.max_lag = max(profile.max_lag, lag)
+        profile.samples += 1
+        stack: List[Frame] = []
+        coro = None
+        while frame is not None:
+            key = _frame_key(frame)
+            stack.append(key)
+            if coro is None and frame.f_code.co_flags & inspect.CO_COROUTINE:
+                coro = key
+            frame = frame.f_back
+        stack.reverse()
+        # loop спит в select() — не считаем это работой
+        if not stack or stack[-1][1] in ("select", "poll", "_run_once") and lag < self.block_s:
+            profile.idle += 1
+            return None
+        profile.stacks[tuple(stack)] += 1
+        if coro is not None:
+            profile.coroutines[coro] += 1
+        if lag >= self.block_s:
+            # одна блокировка — одна запись: обновляем длительность, пока пульс не ожил
+            if block is None:
+                block = Block(lag, tuple(stack))
+                profile.blocks.append(block)
+            block.duration = lag
+            return block
+        return None
+
+    def _run(self, profile: Profile, until: float) -> None:
+        block = None
+        while not self._stop.wait(self.interval) and time.perf_counter() < until:
+            block = self._sample(profile, block)
+
+    async def _heartbeat(self) -> None:
+        while not self._stop.is_set():
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    async def run(self, seconds: float) -> Profile:
+        profile = Profile(seconds=seconds, interval=self.interval)
+        beat = asyncio.create_task(self._heartbeat())
+        thread = threading.Thread(
+            target=self._run, args=(profile, time.perf_counter() + seconds),
+            name="dogbot-profiler", daemon=True,
+        )
+        thread.start()
+        try:
+            while thread.is_alive():
+                await asyncio.sleep(0.1)
+        finally:
+            self._stop.set()
+            beat.cancel()
+            await asyncio.to_thread(thread.join)
+        return profile
+
+
+async def profile_loop(seconds: float, interval: float = 0.005, block_ms: float = 100.0) -> Profile:
+    """Профилировать текущий event loop seconds секунд. Одновременно — только один профиль."""
+    global _running
+    if _running:
+        raise RuntimeError("профилирование уже идёт")
+    _running = True
+    try:
+        sampler = Sampler(threading.get_ident(), interval, block_ms)
+        return await sampler.run(seconds)
+    finally:
+        _running = False
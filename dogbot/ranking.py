@@ -0,0 +1,196 @@
+# dogbot/ranking.py
+"""
+Ранжирование откликов на заказ.
+
+Каждый признак приводится к [0, 1], скор — взвешенная сумма по WEIGHTS.
+С numpy (необязательный, как orjson в http.py) числовые поля всех откликов
+снимаются одним проходом в float-матрицу, дальше всё векторно: признаки,
+скор, сортировка. Без numpy та же формула (_formula) считается по строкам
+на float'ах — медленнее, но результат тот же.
+
+    ranked = rank(order, proposals, stats)   # отклики по убыванию score
+"""
+
+from __future__ import annotations
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from dogbot.areas import SIMILARITY_THRESHOLD, normalize, similarity, split_areas
+
+try:
+    import numpy as np
+except ImportError:  # numpy не установлен — считаем по строкам
+    np = None
+
+WEIGHTS: Dict[str, float] = {
+    "price": 0.25,       # цена относительно бюджета (или лучшей цены)
+    "rate": 0.10,        # базовая ставка исполнителя (price_from)
+    "area": 0.20,        # совпадение района
+    "approved": 0.10,    # профиль одобрен
+    "response": 0.10,    # как быстро откликнулся
+    "completion": 0.10,  # доля доведённых до done назначений
+    "rating": 0.15,      # средняя оценка из отзывов
+}
+
+RESPONSE_HALF_MIN = 30.0  # отклик через 30 минут — половина балла
+# байесовское среднее: RATING_PRIOR_N «виртуальных» оценок RATING_PRIOR —
+# одна пятёрка не обгоняет сотню четвёрок с половиной
+RATING_PRIOR = 4.0
+RATING_PRIOR_N = 3.0
+
+# числовые поля отклика; list_proposals отдаёт все и без NULL — быстрый путь features
+NUMERIC = ("id", "price", "rate", "is_approved", "response_min", "walker_id", "rating_sum", "rating_count")
+_numeric = itemgetter(*NUMERIC)
+# порядок столбцов признаков — порядок аргументов _formula
+FEATURES = ("price", "rate", "area", "approved", "response", "assigned", "done", "rating_sum", "rating_count")
+
+
+def area_match(order_area: str | None, walker_areas: str | None) -> float:
+    """1 — район есть в списке исполнителя (после нормализации), 0.5 — похожее название, 0 — нет."""
+    want = normalize(order_area)
+    if not want:
+        return 0.5
+    have = split_areas(walker_areas)
+    if want in have:
+        return 1.0
+    if any(similarity(want, a) >= SIMILARITY_THRESHOLD for a in have):
+        return 0.5
+    return 0.0
+
+
+def features(order: Mapping[str, Any], proposals: Sequence[Mapping[str, Any]],
+             stats: Mapping[int, Tuple[int, int]] | None = None) -> Dict[str, Sequence[float]]:
+    """Столбцы сырых признаков (массивы numpy или списки). stats: walker_id → (назначений, выполнено)."""
+    order_area = order.get("area")
+    areas = [p.get("areas") for p in proposals]
+    area_of = {a: area_match(order_area, a) for a in set(areas)}  # у разных откликов одни и те же строки районов
+    if np is None:
+        return _features_python(proposals, [area_of[a] for a in areas], stats or {})
+    n = len(proposals)
+    try:
+        # все числовые поля — одним проходом по dict'ам сразу в float-матрицу
+        m = np.fromiter(chain.from_iterable(map(_numeric, proposals)), dtype=float, count=n * len(NUMERIC))
+    except (KeyError, TypeError):  # отклик собран вручную: поля нет или None
+        m = np.array([tuple(p.get(k) for k in NUMERIC) for p in proposals], dtype=float)  # None → nan
+    ids, price, rate, approved, minutes, walker_ids, r_sum, r_count = m.reshape(n, len(NUMERIC)).T
+    assigned, done = _history(walker_ids, stats)
+    return {
+        "id": ids,  # не признак: порядок при равенстве
+        "price": np.nan_to_num(price),
+        "rate": np.nan_to_num(rate),
+        "area": np.fromiter((area_of[a] for a in areas), dtype=float, count=n),
+        "approved": (np.nan_to_num(approved) != 0).astype(float),
+        # минуты от создания заказа (list_proposals считает в SQL); -1 — неизвестно
+        "response": np.where(np.isnan(minutes), -1.0, np.maximum(minutes, 0.0)),
+        "assigned": assigned,
+        "done": done,
+        # агрегаты из walker_profiles — без AVG() по reviews
+        "rating_sum": np.nan_to_num(r_sum),
+        "rating_count": np.nan_to_num(r_count),
+    }
+
+
+def _history(walker_ids, stats: Mapping[int, Tuple[int, int]] | None):
+    """(назначений, выполнено) по walker_id: поиск по отсортированным ключам stats, без цикла по откликам."""
+    if not stats:
+        zeros = np.zeros(len(walker_ids))
+        return zeros, zeros
+    keys = np.fromiter(stats.keys(), dtype=float, count=len(stats))
+    values = np.fromiter(chain.from_iterable(stats.values()), dtype=float, count=2 * len(stats)).reshape(-1, 2)
+    by_key = np.argsort(keys)
+    keys, values = keys[by_key], values[by_key]
+    pos = np.minimum(np.searchsorted(keys, walker_ids), len(keys) - 1)
+    found = keys[pos] == walker_ids
+    return np.where(found, values[pos, 0], 0.0), np.where(found, values[pos, 1], 0.0)
+
+
+def _features_python(proposals: Sequence[Mapping[str, Any]], area: List[float],
+                     stats: Mapping[int, Tuple[int, int]]) -> Dict[str, List[float]]:
+    hist = [stats.get(p["walker_id"], (0, 0)) for p in proposals]
+    return {
+        "id": [p["id"] for p in proposals],
+        "price": [float(p["price"] or 0) for p in proposals],
+        "rate": [float(p.get("rate") or 0) for p in proposals],
+        "area": area,
+        "approved": [1.0 if p.get("is_approved") else 0.0 for p in proposals],
+        "response": [-1.0 if p.get("response_min") is None else max(0.0, float(p["response_min"]))
+                     for p in proposals],
+        "assigned": [float(h[0]) for h in hist],
+        "done": [float(h[1]) for h in hist],
+        "rating_sum": [float(p.get("rating_sum") or 0) for p in proposals],
+        "rating_count": [float(p.get("rating_count") or 0) for p in proposals],
+    }
+
+
+class _Scalar:
+    """Операции _formula для одного отклика на float'ах — как у numpy."""
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+
+    @staticmethod
+    def where(cond, a, b):
+        return a if cond else b
+
+
+def _formula(xp, w, ref, best_rate, price, rate, area, approved, response, assigned, done, r_sum, r_count):
+    """Скор: xp — numpy (столбцы целиком) или _Scalar (один отклик)."""
+    w_price, w_rate, w_area, w_approved, w_response, w_completion, w_rating = w
+    return (
+        w_price * xp.minimum(1.0, ref / price)
+        + w_rate * xp.where(rate > 0, xp.minimum(1.0, best_rate / xp.maximum(rate, 1.0)), 0.5)
+        + w_area * area
+        + w_approved * approved
+        + w_response * xp.where(response >= 0, 1.0 / (1.0 + xp.maximum(response, 0.0) / RESPONSE_HALF_MIN), 0.5)
+        # сглаживание: у новичка без истории 0.5, а не 0 или 1
+        + w_completion * (done + 1.0) / (assigned + 2.0)
+        + w_rating * ((r_sum + RATING_PRIOR * RATING_PRIOR_N) / (r_count + RATING_PRIOR_N) - 1.0) / 4.0
+    )
+
+
+def _scores(cols: Mapping[str, Sequence[float]], budget: float | None, weights: Mapping[str, float]):
+    total = sum(weights.values()) or 1.0
+    w = tuple(weights.get(k, 0.0) / total for k in WEIGHTS)
+    if np is not None:
+        price = np.maximum(np.asarray(cols["price"], dtype=float), 1.0)
+        rate = np.asarray(cols["rate"], dtype=float)
+        known = rate[rate > 0]
+        best_rate = known.min() if known.size else 1.0
+        ref = float(budget) if budget else price.min()
+        rest = (np.asarray(cols[k], dtype=float) for k in FEATURES[2:])
+        return _formula(np, w, ref, best_rate, price, rate, *rest)
+    prices = [max(p, 1.0) for p in cols["price"]]
+    best_rate = min((r for r in cols["rate"] if r > 0), default=1.0)
+    ref = float(budget) if budget else min(prices)
+    return [_formula(_Scalar, w, ref, best_rate, *row)
+            for row in zip(prices, *(cols[k] for k in FEATURES[1:]))]
+
+
+def scores(cols: Mapping[str, Sequence[float]], budget: float | None = None,
+           weights: Mapping[str, float] = WEIGHTS) -> List[float]:
+    """Скор каждого отклика в [0, 1]."""
+    if not len(cols["price"]):
+        return []
+    s = _scores(cols, budget, weights)
+    return s.tolist() if np is not None else s
+
+
+def rank(order: Mapping[str, Any], proposals: Sequence[Dict[str, Any]],
+         stats: Mapping[int, Tuple[int, int]] | None = None,
+         weights: Mapping[str, float] = WEIGHTS) -> List[Dict[str, Any]]:
+    """
+    Отклики по убыванию score (при равенстве — дешевле, потом раньше).
+    score проставляется прямо в dict'ы откликов — копий не делаем.
+    """
+    if not proposals:
+        return []
+    cols = features(order, proposals, stats)
+    s = _scores(cols, order.get("budget"), weights)
+    if np is None:
+        for p, v in zip(proposals, s):
+            p["score"] = round(v, 4)
+        return sorted(proposals, key=lambda p: (-p["score"], p["price"], p["id"]))
+    s = np.round(s, 4)
+    for p, v in zip(proposals, s.tolist()):
+        p["score"] = v
+    return [proposals[i] for i in np.lexsort((cols["id"], cols["price"], -s)).tolist()]
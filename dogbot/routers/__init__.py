@@ -0,0 +1,30 @@
+# dogbot/routers/__init__.py
+"""
+Сборка роутеров. Порядок важен: общие команды (/start, /cancel) должны
+срабатывать раньше хендлеров FSM-состояний, fallback — последним.
+"""
+
+from aiogram import Router
+
+from dogbot.callbacks import CallbackTable
+from dogbot.routers import admin, client, common, onboarding, walker
+
+
+def setup_routers() -> Router:
+    root = Router(name="root")
+
+    table = CallbackTable()
+    client.register_callbacks(table)
+    walker.register_callbacks(table)
+    admin.register_callbacks(table)
+
+    root.include_routers(
+        common.get_router(),
+        table.router(),
+        admin.get_router(),
+        onboarding.get_router(),
+        client.get_router(),
+        walker.get_router(),
+        common.get_fallback_router(),
+    )
+    return root
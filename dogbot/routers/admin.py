@@ -0,0 +1,278 @@
+# dogbot/routers/admin.py
+"""
+Админка: роли, модерация исполнителей, KPI. Доступ — только ADMIN_IDS;
+/orders_open — ещё и из чата менеджеров (DISPATCHER_CHAT_ID).
+
+Модерация пачками: /approve и /reject принимают сразу много id,
+/approve_all [район] одобряет всю очередь — каждое одним запросом в БД,
+уведомления уходят фоном через notify_many (не быстрее лимита Telegram).
+"""
+
+import asyncio
+import datetime as dt
+import tempfile
+import time
+
+from aiogram import Bot, Router
+from aiogram.types import (BufferedInputFile, CallbackQuery, FSInputFile, InlineKeyboardButton,
+                           InlineKeyboardMarkup, Message)
+from aiogram.filters import Command
+
+from dogbot import areas, export, feed, profiler
+from dogbot.callbacks import CallbackTable, ModerateCb, OpenOrdersCb, PendingCb
+from dogbot.sender import notify, notify_many
+from dogbot.settings import Settings
+from dogbot.texts import order_title
+from dogbot import db
+
+OPEN_ORDERS_PAGE = 10
+PENDING_PAGE = 10
+MAX_BULK_IDS = 1000
+
+APPROVED_TEXT = "✅ Твой профиль одобрен. Теперь ты получаешь заказы по своим районам."
+REJECTED_TEXT = "❌ Профиль пока не одобрен. Проверь корректность анкеты и свяжись с менеджером."
+
+
+# ссылки на фоновые задачи (/perf, /export, уведомления модерации), чтобы их не собрал GC
+_background: set = set()
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+def is_admin(settings: Settings, user_id: int) -> bool:
+    return user_id in settings.ADMIN_IDS
+
+def is_dispatcher(settings: Settings, chat_id: int, user_id: int) -> bool:
+    return (bool(settings.DISPATCHER_CHAT_ID) and chat_id == settings.DISPATCHER_CHAT_ID) or is_admin(settings, user_id)
+
+async def cmd_set_role(m: Message, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return await m.answer("Не админ. И не пытайся 😉")
+    parts = (m.text or "").split()
+    if len(parts) != 3:
+        return await m.answer("Использование: /set_role <tg_id> <client|walker|admin>")
+    try:
+        uid = int(parts[1]); role = parts[2].strip()
+        await db.set_user_role(uid, role, actor=m.from_user.id)
+        await m.answer(f"OK: {uid} → {role}")
+    except Exception as e:
+        await m.answer(f"Ошибка: {e}")
+
+def _walker_line(r: dict) -> str:
+    name = r.get("full_name") or f"id {r['tg_id']}"
+    user = f"@{r['username']}" if r.get("username") else ""
+    rate = f"{r.get('rate')}₽/ч" if r.get("rate") else "—"
+    return f"• {name} {user} id={r['tg_id']} | ставка: {rate} | районы: {r.get('areas') or '—'}"
+
+async def _render_pending(after: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    rows = await db.list_pending_walkers(after, PENDING_PAGE + 1)
+    more = len(rows) > PENDING_PAGE
+    rows = rows[:PENDING_PAGE]
+    if not rows:
+        return "Очередь пустая.", None
+    kb = [[InlineKeyboardButton(text=f"✅ {r['tg_id']}", callback_data=ModerateCb(wid=r["tg_id"], ok=True, after=after).pack()),
+           InlineKeyboardButton(text=f"❌ {r['tg_id']}", callback_data=ModerateCb(wid=r["tg_id"], ok=False, after=after).pack())]
+          for r in rows]
+    if more:
+        kb.append([InlineKeyboardButton(text="Ещё ▶", callback_data=PendingCb(after=rows[-1]["tg_id"]).pack())])
+    return "Ожидают одобрения:\n" + "\n".join(_walker_line(r) for r in rows), InlineKeyboardMarkup(inline_keyboard=kb)
+
+async def cmd_pending(m: Message, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return
+    text, kb = await _render_pending(-1)
+    await m.answer(text, reply_markup=kb)
+
+async def cb_pending(cq: CallbackQuery, callback_data: PendingCb, settings: Settings):
+    if not is_admin(settings, cq.from_user.id):
+        return await cq.answer()
+    text, kb = await _render_pending(callback_data.after)
+    await cq.message.answer(text, reply_markup=kb)
+    await cq.answer()
+
+async def cb_moderate(cq: CallbackQuery, callback_data: ModerateCb, bot: Bot, settings: Settings):
+    if not is_admin(settings, cq.from_user.id):
+        return await cq.answer()
+    wid, ok = callback_data.wid, callback_data.ok
+    changed = await db.set_walkers_approval([wid], ok, actor=cq.from_user.id)
+    # та же страница без обработанного walker'а
+    text, kb = await _render_pending(callback_data.after)
+    await cq.message.edit_text(text, reply_markup=kb)
+    await cq.answer(f"{'✅ Одобрен' if ok else '❌ Отклонён'} {wid}" if changed else "Уже обработан")
+    if changed:
+        await notify(bot, wid, APPROVED_TEXT if ok else REJECTED_TEXT)
+
+def _parse_ids(args: str) -> list[int] | None:
+    """«1 2 3» или «1,2,3» → [1, 2, 3]; None — пусто или не числа."""
+    parts = args.replace(",", " ").split()
+    if not parts or not all(p.isdigit() for p in parts):
+        return None
+    return [int(p) for p in parts]
+
+async def _notify_moderated(bot: Bot, chat_id: int, ids: list[int], approved: bool):
+    sent = await notify_many(bot, ids, APPROVED_TEXT if approved else REJECTED_TEXT)
+    if len(ids) > 1:
+        await notify(bot, chat_id, f"📨 Уведомил {sent} из {len(ids)}.")
+
+async def _moderate(m: Message, bot: Bot, settings: Settings, approved: bool):
+    if not is_admin(settings, m.from_user.id):
+        return
+    cmd, _, args = (m.text or "").partition(" ")
+    ids = _parse_ids(args)
+    if ids is None or len(ids) > MAX_BULK_IDS:
+        return await m.answer(f"Использование: {cmd} <tg_id> [tg_id ...] (до {MAX_BULK_IDS} за раз)")
+    changed = await db.set_walkers_approval(ids, approved, actor=m.from_user.id)
+    verb = "✅ Одобрил" if approved else "❌ Отклонил"
+    if len(ids) == 1:
+        await m.answer(f"{verb} walker {ids[0]}" if changed else f"Walker {ids[0]}: уже одобрен или нет в базе.")
+    else:
+        skipped = len(set(ids)) - len(changed)
+        await m.answer(f"{verb}: {len(changed)}" + (f", пропущено {skipped} (уже одобрены или нет в базе)" if skipped else ""))
+    if changed:
+        # сотни адресатов — фоном, с лимитом скорости
+        _spawn(_notify_moderated(bot, m.chat.id, changed, approved))
+
+async def cmd_approve(m: Message, bot: Bot, settings: Settings):
+    await _moderate(m, bot, settings, approved=True)
+
+async def cmd_reject(m: Message, bot: Bot, settings: Settings):
+    await _moderate(m, bot, settings, approved=False)
+
+async def cmd_approve_all(m: Message, bot: Bot, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return
+    _, _, arg = (m.text or "").partition(" ")
+    area = areas.normalize(arg) if arg.strip() else None
+    changed = await db.approve_pending_walkers(area, actor=m.from_user.id)
+    where = f" в районе «{area}»" if area else ""
+    if not changed:
+        return await m.answer(f"Очередь{where} пустая.")
+    await m.answer(f"✅ Одобрил всю очередь{where}: {len(changed)}")
+    _spawn(_notify_moderated(bot, m.chat.id, changed, True))
+
+async def _send_profile(bot: Bot, chat_id: int, seconds: int):
+    try:
+        profile = await profiler.profile_loop(seconds)
+    except RuntimeError as e:
+        return await notify(bot, chat_id, f"Ошибка: {e}")
+    name = time.strftime("profile-%Y%m%d-%H%M%S.txt")
+    caption = (f"Профиль {seconds}с: loop занят {profile.samples - profile.idle}/{profile.samples} сэмплов, "
+               f"блокировок {len(profile.blocks)}, max lag {profile.max_lag * 1000:.0f}ms")
+    await bot.send_document(chat_id, BufferedInputFile(profile.render().encode(), filename=name), caption=caption)
+
+async def cmd_perf(m: Message, bot: Bot, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return
+    parts = (m.text or "").split()
+    if len(parts) > 2 or (len(parts) == 2 and not parts[1].isdigit()):
+        return await m.answer(f"Использование: /perf [секунды, 1..{profiler.MAX_SECONDS}]")
+    seconds = min(max(int(parts[1]) if len(parts) == 2 else 30, 1), profiler.MAX_SECONDS)
+    # профилируем в фоне: хендлер не висит N секунд
+    _spawn(_send_profile(bot, m.chat.id, seconds))
+    await m.answer(f"⏱ Профилирую {seconds}с, пришлю файл.")
+
+
+async def _send_export(bot: Bot, chat_id: int, since: dt.datetime, until: dt.datetime):
+    # файлы на диске, в Telegram уходят потоком (FSInputFile) — в память целиком не читаются
+    with tempfile.TemporaryDirectory(prefix="dogbot-export-") as tmp:
+        for table in export.TABLES:
+            try:
+                path, rows = await export.export_csv(table, since, until, tmp)
+                await bot.send_document(chat_id, FSInputFile(path), caption=f"{table}: {rows} строк")
+            except Exception as e:
+                await notify(bot, chat_id, f"Ошибка выгрузки {table}: {e}")
+
+async def cmd_export(m: Message, bot: Bot, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return
+    _, _, args = (m.text or "").partition(" ")
+    try:
+        since, until = export.parse_range(args)
+    except ValueError as e:
+        return await m.answer(f"Ошибка: {e}")
+    last = until - dt.timedelta(days=1)
+    _spawn(_send_export(bot, m.chat.id, since, until))
+    await m.answer(f"📦 Выгружаю {', '.join(export.TABLES)} за {since:%Y-%m-%d} — {last:%Y-%m-%d}, пришлю файлы.")
+
+def _kpi_line(label: str, s: dict) -> str:
+    if not s["orders"]:
+        return f"{label}: заказов нет"
+    conv = s["assigned"] / s["orders"]
+    line = f"{label}: заказов {s['orders']}, назначено {conv:.0%} {'✅' if conv >= db.KPI_CONVERSION else '⚠️'}"
+    if s["first_proposals"]:
+        avg = s["first_proposal_sec"] / s["first_proposals"] / 60
+        fast = s["first_proposal_fast"] / s["first_proposals"]
+        line += f", 1-й отклик в среднем {avg:.0f} мин, ≤{db.KPI_FIRST_PROPOSAL_SEC // 60} мин — {fast:.0%}"
+    else:
+        line += ", откликов нет"
+    return line + f", выполнено {s['done']}, отменено {s['cancelled']}"
+
+async def cmd_stats(m: Message, settings: Settings):
+    if not is_admin(settings, m.from_user.id):
+        return
+    _, _, arg = (m.text or "").partition(" ")
+    area = areas.normalize(arg) if arg.strip() else db.ALL_AREAS
+    today = dt.datetime.now(dt.timezone.utc).date()
+    out = [f"📊 KPI ({'все районы' if area == db.ALL_AREAS else area}), по дню создания заказа:"]
+    for label, days in (("Сегодня", 1), ("7 дней", 7), ("30 дней", 30)):
+        since = (today - dt.timedelta(days=days - 1)).isoformat()
+        out.append(_kpi_line(label, await db.get_order_stats(since, area)))
+    await m.answer("\n".join(out))
+
+async def _render_open_orders(after: tuple[int, int] | None, show_all: bool) -> tuple[str, InlineKeyboardMarkup | None]:
+    cursor = feed.from_cursor(after) if after else None
+    rows = await db.list_open_orders(cursor, OPEN_ORDERS_PAGE + 1, only_empty=not show_all)
+    more = len(rows) > OPEN_ORDERS_PAGE
+    rows = rows[:OPEN_ORDERS_PAGE]
+    if not rows:
+        return ("Открытых заказов нет." if show_all else "Заказов без откликов нет 🎉"), None
+    now = dt.datetime.now(dt.timezone.utc)
+    lines = []
+    for o in rows:
+        when = feed.when_utc(o["when_at"])
+        late = " ⏰" if when < now else ""
+        lines.append(f"#{o['id']} {order_title(o['service'], o.get('walk_type'))} • {when:%d.%m %H:%M} UTC{late} • "
+                     f"{o.get('area') or '—'} • откликов: {o['proposals_count']} • клиент {o['client_id']}")
+    kb = None
+    if more:
+        last = rows[-1]
+        t, oid = feed.to_cursor((feed.when_utc(last["when_at"]), last["id"]))
+        nxt = OpenOrdersCb(t=t, oid=oid, all=show_all)
+        kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Ещё ▶", callback_data=nxt.pack())]])
+    title = "Активные заказы" if show_all else "Заказы без откликов"
+    return f"📋 {title} (по времени, ⏰ — время прошло):\n" + "\n".join(lines), kb
+
+async def cmd_orders_open(m: Message, settings: Settings):
+    if not is_dispatcher(settings, m.chat.id, m.from_user.id):
+        return
+    show_all = (m.text or "").split()[1:2] == ["all"]
+    text, kb = await _render_open_orders(None, show_all)
+    await m.answer(text, reply_markup=kb)
+
+async def cb_orders_open(cq: CallbackQuery, callback_data: OpenOrdersCb, settings: Settings):
+    if not is_dispatcher(settings, cq.message.chat.id, cq.from_user.id):
+        return await cq.answer()
+    text, kb = await _render_open_orders((callback_data.t, callback_data.oid), callback_data.all)
+    await cq.message.answer(text, reply_markup=kb)
+    await cq.answer()
+
+
+def register_callbacks(table: CallbackTable) -> None:
+    table.add(OpenOrdersCb, cb_orders_open)
+    table.add(PendingCb, cb_pending)
+    table.add(ModerateCb, cb_moderate)
+
+def get_router() -> Router:
+    router = Router(name="admin")
+    router.message.register(cmd_set_role, Command("set_role"))
+    router.message.register(cmd_pending, Command("pending"))
+    router.message.register(cmd_approve, Command("approve"))
+    router.message.register(cmd_reject, Command("reject"))
+    router.message.register(cmd_approve_all, Command("approve_all"))
+    router.message.register(cmd_perf, Command("perf"))
+    router.message.register(cmd_stats, Command("stats"))
+    router.message.register(cmd_orders_open, Command("orders_open"))
+    router.message.register(cmd_export, Command("export"))
+    return router
@@ -0,0 +1,541 @@
+# dogbot/routers/client.py
+"""Клиент: мастер заказа, управление своими заказами, кандидаты и выбор исполнителя."""
+
+import asyncio
+import datetime as dt
+import weakref
+
+from aiogram import Bot, F, Router
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+    ReplyKeyboardRemove,
+)
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+
+from dogbot.broadcast import send_order_to_walkers_by_area
+from dogbot.callbacks import AutoAssignCb, CallbackTable, CandidatesCb, ChooseCb, ProfileCb, RateCb
+from dogbot.sender import notify
+from dogbot.keyboards import main_menu, kb_services, kb_walk_types, kb_location
+from dogbot.ranking import rank
+from dogbot.states import OrderStates, ReviewStates
+from dogbot.texts import order_title, rating
+from dogbot.writebehind import UserWriteBehind
+from dogbot import db
+
+
+MAX_PHOTOS = 10  # больше в sendMediaGroup не влезает
+
+# ====================== Утилиты ======================
+def _clean_int(s: str) -> int | None:
+    s = (s or "").strip().replace(" ", "")
+    return int(s) if s.isdigit() else None
+
+def _area_label(data: dict) -> str:
+    if data.get("area"):
+        return data["area"]
+    if data.get("lat") is not None:
+        return f"📍 {data['lat']:.4f}, {data['lon']:.4f}"
+    return "—"
+
+def _parse_when(txt: str) -> dt.datetime | None:
+    """
+    Поддерживаем:
+    - 'YYYY-MM-DD HH:MM'
+    - 'YYYY-MM-DD HH.MM'
+    - 'сегодня 19:00' / 'завтра 10:30'
+    Возвращаем aware datetime в UTC. (MVP без локализации по TZ юзера)
+    """
+    if not txt:
+        return None
+    t = txt.strip().lower()
+
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H.%M"):
+        try:
+            naive = dt.datetime.strptime(t, fmt)
+            return naive.replace(tzinfo=dt.timezone.utc)
+        except ValueError:
+            pass
+
+    def _hhmm_to_utc(day_offset: int) -> dt.datetime | None:
+        try:
+            parts = t.split(maxsplit=1)
+            if len(parts) < 2:
+                return None
+            hhmm = parts[1].replace(".", ":")
+            hh, mm = [int(x) for x in hhmm.split(":")]
+            local = dt.datetime.now().replace(hour=hh, minute=mm, second=0, microsecond=0)
+            local = local + dt.timedelta(days=day_offset)
+            return local.astimezone(dt.timezone.utc)
+        except Exception:
+            return None
+
+    if t.startswith("сегодня"):
+        return _hhmm_to_utc(0)
+    if t.startswith("завтра"):
+        return _hhmm_to_utc(1)
+    return None
+
+# ====================== Управление своими заказами ======================
+async def cmd_candidates(m: Message):
+    parts = (m.text or "").split()
+    if len(parts) != 2 or not parts[1].isdigit():
+        return await m.answer("Использование: /candidates <order_id>")
+    oid = int(parts[1])
+    order = await db.get_order(oid)
+    if not order or order["client_id"] != m.from_user.id:
+        return await m.answer("Заказ не найден или не ваш.")
+    text, kb = await _render_candidates(oid)
+    await m.answer(text, reply_markup=kb)
+
+async def cmd_cancel_order(m: Message, bot: Bot):
+    parts = (m.text or "").split()
+    if len(parts) != 2 or not parts[1].isdigit():
+        return await m.answer("Использование: /cancel_order <order_id>")
+    oid = int(parts[1])
+    order = await db.get_order(oid)
+    if not order or order["client_id"] != m.from_user.id:
+        return await m.answer("Заказ не найден или не ваш.")
+    if order["status"] in ("done", "cancelled"):
+        return await m.answer(f"Нельзя отменить: статус {order['status']}.")
+    # уведомим назначенного, если есть
+    asg = await db.get_assignment(oid)
+    await db.cancel_order(oid, actor=m.from_user.id)
+    await m.answer("Заказ отменён.")
+    if asg:
+        await notify(bot, asg["walker_id"], f"❗️ Клиент отменил заказ #{oid}.")
+
+async def cmd_reschedule(m: Message):
+    # /reschedule <order_id> <YYYY-MM-DD> <HH:MM> <duration_min>
+    parts = (m.text or "").split()
+    if len(parts) != 5 or not parts[1].isdigit() or not parts[4].isdigit():
+        return await m.answer("Использование: /reschedule <order_id> 2025-09-01 19:00 60")
+    oid = int(parts[1]); duration = int(parts[4])
+    order = await db.get_order(oid)
+    if not order or order["client_id"] != m.from_user.id:
+        return await m.answer("Заказ не найден или не ваш.")
+    if order["status"] in ("done", "cancelled"):
+        return await m.answer(f"Нельзя изменить: статус {order['status']}.")
+    try:
+        when_at = dt.datetime.fromisoformat(parts[2] + " " + parts[3])
+        if when_at.tzinfo is None:
+            when_at = when_at.replace(tzinfo=dt.timezone.utc)  # или твоя TZ
+    except Exception:
+        return await m.answer("Дата/время кривые. Пример: 2025-09-01 19:00")
+    await db.update_order_time(oid, when_at, duration, actor=m.from_user.id)
+    await m.answer(f"Время обновлено: {when_at} ({duration} мин).")
+
+async def cmd_set_address(m: Message):
+    # /set_address <order_id> <адрес целиком>
+    parts = (m.text or "").split(maxsplit=2)
+    if len(parts) < 3 or not parts[1].isdigit():
+        return await m.answer("Использование: /set_address <order_id> Ул. Пример, 1")
+    oid = int(parts[1]); addr = parts[2][:200]
+    order = await db.get_order(oid)
+    if not order or order["client_id"] != m.from_user.id:
+        return await m.answer("Заказ не найден или не ваш.")
+    if order["status"] in ("done", "cancelled"):
+        return await m.answer(f"Нельзя изменить: статус {order['status']}.")
+    await db.update_order_address(oid, addr)
+    await m.answer(f"Адрес обновлён: {addr}")
+
+async def cmd_my_orders(m: Message):
+    orders = await db.list_orders_by_client(m.from_user.id, limit=10)
+    if not orders:
+        return await m.answer("У вас нет заказов.")
+
+    lines = []
+    for o in orders:
+        archived = ", архив" if o["archived"] else ""
+        lines.append(f"#{o['id']} — {o['service']} {o['pet_name']} ({o['status']}{archived})")
+    await m.answer("Ваши заказы:\n" + "\n".join(lines))
+
+# ====================== Главный мастер заказа ======================
+async def on_services(m: Message, state: FSMContext):
+    await state.set_state(OrderStates.choosing_service)
+    await m.answer("Какую услугу выбираем?", reply_markup=kb_services())
+
+async def cb_back_main(cq: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await cq.message.answer("Главное меню:", reply_markup=main_menu())
+    await cq.answer()
+
+async def cb_choose_service(cq: CallbackQuery, state: FSMContext):
+    service = cq.data.split(":", 1)[1]
+    await state.update_data(service=service, walk_type=None)
+    if service == "walk":
+        await state.set_state(OrderStates.choosing_walk_type)
+        await cq.message.edit_text("Выгул — какой нужен?", reply_markup=kb_walk_types())
+    else:
+        await state.set_state(OrderStates.pet_name)
+        await cq.message.edit_text("Как зовут собаку?")
+    await cq.answer()
+
+async def cb_choose_walk_type(cq: CallbackQuery, state: FSMContext):
+    await state.update_data(walk_type=cq.data.split(":", 1)[1])
+    await state.set_state(OrderStates.pet_name)
+    await cq.message.edit_text("Как зовут собаку?")
+    await cq.answer()
+
+async def step_pet_name(m: Message, state: FSMContext):
+    await state.update_data(pet_name=m.text.strip()[:64])
+    await state.set_state(OrderStates.pet_size)
+    await m.answer("Размер собаки? (small/medium/large)")
+
+async def step_pet_size(m: Message, state: FSMContext):
+    size = m.text.strip().lower()
+    if size not in {"small", "medium", "large"}:
+        return await m.reply("Введи один из вариантов: small / medium / large")
+    await state.update_data(pet_size=size)
+    await state.set_state(OrderStates.area)
+    await m.answer("В каком районе нужен исполнитель? (например: Центр, Савёловский, Купчино) "
+                   "Или отправь геопозицию — подберём тех, кто рядом.", reply_markup=kb_location())
+
+async def step_area(m: Message, state: FSMContext):
+    area = m.text.strip()[:64]
+    if len(area) < 2:
+        return await m.reply("Дай название района поконкретнее.")
+    await state.update_data(area=area, lat=None, lon=None)
+    await state.set_state(OrderStates.when_at)
+    await m.answer("Когда? Формат: 2025-08-23 19:00 или «сегодня 19:00», «завтра 10:30». /cancel — отмена.",
+                   reply_markup=ReplyKeyboardRemove())
+
+async def step_area_location(m: Message, state: FSMContext):
+    await state.update_data(area=None, lat=m.location.latitude, lon=m.location.longitude)
+    await state.set_state(OrderStates.when_at)
+    await m.answer("📍 Принято. Когда? Формат: 2025-08-23 19:00 или «сегодня 19:00», «завтра 10:30».",
+                   reply_markup=ReplyKeyboardRemove())
+
+async def step_when(m: Message, state: FSMContext):
+    ts = _parse_when(m.text)
+    if not ts or ts <= dt.datetime.now(dt.timezone.utc):
+        return await m.reply("Не понял дату/время или это уже в прошлом. Пример: 2025-08-23 19:00")
+    await state.update_data(when_at=ts)
+    await state.set_state(OrderStates.duration_min)
+    await m.answer("Длительность в минутах? (например 60)")
+
+async def step_duration(m: Message, state: FSMContext):
+    val = _clean_int(m.text)
+    if not val or val <= 0 or val > 12 * 60:
+        return await m.reply("Минуты должны быть числом > 0 и <= 720.")
+    await state.update_data(duration_min=val)
+    await state.set_state(OrderStates.address)
+    await m.answer("Адрес (улица, дом, подъезд).")
+
+async def step_address(m: Message, state: FSMContext):
+    addr = m.text.strip()
+    if len(addr) < 5:
+        return await m.reply("Слишком короткий адрес, давай точнее.")
+    await state.update_data(address=addr)
+    await state.set_state(OrderStates.budget)
+    await m.answer("Бюджет (руб), опционально. Можешь написать 0 или пропустить командой /skip.")
+
+async def skip_any(m: Message, state: FSMContext):
+    st = await state.get_state()
+    if st == OrderStates.budget.state:
+        await state.update_data(budget=None)
+        await state.set_state(OrderStates.comment)
+        return await m.answer("Комментарий для исполнителя (опционально). /skip если нечего добавить.")
+    if st == OrderStates.comment.state:
+        await state.update_data(comment=None)
+        return await _ask_photos(m, state)
+    if st == OrderStates.photos.state:
+        data = await state.get_data()
+        return await _confirm_order(m, state, data)
+    if st == ReviewStates.waiting_text.state:
+        await state.clear()
+        return await m.answer("Спасибо за оценку!")
+    await m.answer("Эта команда сейчас не к месту :)")
+
+async def _confirm_order(m: Message, state: FSMContext, data: dict):
+    title = order_title(data["service"], data.get("walk_type"))
+    when_local = data["when_at"].astimezone(dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    text = (
+        f"{title}\n"
+        f"Имя: {data['pet_name']} | Размер: {data['pet_size']}\n"
+        f"Район: {_area_label(data)}\n"
+        f"Когда: {when_local} • {data['duration_min']} мин\n"
+        f"Адрес: {data['address']}\n"
+        f"Бюджет: {data.get('budget') if data.get('budget') is not None else '—'}\n"
+        f"Комментарий: {data.get('comment') or '—'}\n"
+        f"Фото: {len(data.get('photos') or []) or '—'}\n\n"
+        f"Отправляю заказ исполнителям?"
+    )
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Да", callback_data="ord:confirm"),
+            InlineKeyboardButton(text="❌ Нет", callback_data="ord:cancel"),
+        ]
+    ])
+    await state.set_state(OrderStates.confirming)
+    await m.answer(text, reply_markup=kb)
+
+async def cb_confirm(cq: CallbackQuery, state: FSMContext, bot: Bot, user_writes: UserWriteBehind):
+    if cq.data == "ord:cancel":
+        await state.clear()
+        await cq.message.edit_text("Окей, отменил. Вернулся в меню.")
+        return await cq.answer()
+
+    data = await state.get_data()
+    await user_writes.ensure(cq.from_user.id)  # FK orders.client_id → users
+    order_id = await db.add_order(
+    client_id=cq.from_user.id,
+    service=data["service"],
+    pet_name=data["pet_name"],
+    pet_size=data["pet_size"],
+    when_at=data["when_at"],
+    duration_min=data["duration_min"],
+    address=data["address"],
+    budget=data.get("budget"),
+    comment=data.get("comment"),
+    walk_type=data.get("walk_type"),
+    area=data.get("area"),
+    lat=data.get("lat"),
+    lon=data.get("lon"),
+    photos=data.get("photos"),
+    )
+    await db.publish_order(order_id, actor=cq.from_user.id)
+
+    title = order_title(data["service"], data.get("walk_type"))
+    card = (
+        f"{title}\n"
+        f"Заказ #{order_id}\n"
+        f"Клиент: {cq.from_user.full_name} @{cq.from_user.username}\n"
+        f"{data['pet_name']} • {data['pet_size']} • {data['duration_min']} мин\n"
+        f"Район: {_area_label(data)}\n"
+        f"Когда: {data['when_at'].astimezone(dt.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}\n"
+        f"Адрес: {data['address']}\n"
+        f"Бюджет: {data.get('budget') if data.get('budget') is not None else '—'}\n"
+        f"Комментарий: {data.get('comment') or '—'}\n"
+    )
+
+    location = (data["lat"], data["lon"]) if data.get("lat") is not None else None
+    # file_id уже лежат на серверах Telegram — рассылка ничего не загружает заново
+    await send_order_to_walkers_by_area(bot, card, data.get("photos"), order_id, data.get("area"), location)
+
+    await cq.message.edit_text(f"Заявка #{order_id} создана ✅ Я разослал её исполнителям.")
+    await state.clear()
+    await cq.answer()
+
+async def step_budget(m: Message, state: FSMContext):
+    val = _clean_int(m.text)
+    if val is None or val < 0 or val > 1_000_000:
+        return await m.reply("Бюджет — неотрицательное число. Или набери /skip, если не важно.")
+    await state.update_data(budget=val)
+    await state.set_state(OrderStates.comment)
+    await m.answer("Комментарий для исполнителя (опционально). /skip если нечего добавить.")
+
+async def step_comment(m: Message, state: FSMContext):
+    await state.update_data(comment=m.text.strip()[:500])
+    await _ask_photos(m, state)
+
+async def _ask_photos(m: Message, state: FSMContext):
+    await state.set_state(OrderStates.photos)
+    await state.update_data(photos=[])
+    await m.answer(f"Фото собаки (можно альбомом, до {MAX_PHOTOS}). /skip — без фото или когда закончишь.")
+
+# альбом приходит пачкой апдейтов, которые обрабатываются параллельно:
+# без блокировки get_data/update_data теряют фото друг друга. Замок живёт,
+# пока его держит хоть один апдейт: брошенный мастер или /cancel не оставляют
+# записи навсегда
+_photo_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+async def step_photo(m: Message, state: FSMContext):
+    lock = _photo_locks.setdefault(m.chat.id, asyncio.Lock())
+    async with lock:
+        data = await state.get_data()
+        photos = list(data.get("photos") or [])
+        if len(photos) >= MAX_PHOTOS:
+            return
+        photos.append(m.photo[-1].file_id)  # самое крупное превью
+        groups = list(data.get("photo_groups") or [])
+        first_in_album = m.media_group_id is None or m.media_group_id not in groups
+        if m.media_group_id is not None and first_in_album:
+            groups.append(m.media_group_id)
+        await state.update_data(photos=photos, photo_groups=groups)
+    # на альбом — один ответ, а не по сообщению на каждую фотографию
+    if first_in_album:
+        await m.answer("📷 Фото добавлено. Ещё фото — или /skip, чтобы перейти к подтверждению.")
+
+async def step_photo_text(m: Message):
+    await m.answer("Жду фото. /skip — продолжить без него.")
+
+# ====================== Кандидаты и выбор исполнителя ======================
+async def _ranked_proposals(order: dict) -> list[dict]:
+    """Отклики заказа по убыванию score (dogbot.ranking)."""
+    props = await db.list_proposals(order["id"])
+    if not props:
+        return []
+    stats = await db.walker_completion_stats([p["walker_id"] for p in props])
+    return rank(order, props, stats)
+
+def _candidate_line(p: dict) -> str:
+    name = p.get("full_name") or f"id {p['walker_id']}"
+    username = f"@{p['username']}" if p.get("username") else ""
+    rate = f", ставка {p['rate']}₽/ч" if p.get("rate") else ""
+    phone = f", {p['phone']}" if p.get("phone") else ""
+    stars = rating(p.get("rating_sum"), p.get("rating_count"))
+    stars = f", {stars}" if stars else ""
+    note = p.get("note") or "—"
+    return f"• {name} {username}{rate}{stars}{phone} — {p['price']}₽ — {note}"
+
+def _candidate_rows(order_id: int, props: list[dict]) -> list[list[InlineKeyboardButton]]:
+    rows = []
+    for p in props:
+        name = p.get("full_name") or f"id {p['walker_id']}"
+        rows.append([
+            InlineKeyboardButton(text=f"✅ Выбрать {name}",
+                                 callback_data=ChooseCb(order_id=order_id, walker_id=p["walker_id"]).pack()),
+            InlineKeyboardButton(text="ℹ️ Профиль",
+                                 callback_data=ProfileCb(order_id=order_id, walker_id=p["walker_id"]).pack()),
+        ])
+    rows.append([InlineKeyboardButton(text="🤖 Выбрать лучшего",
+                                      callback_data=AutoAssignCb(order_id=order_id).pack())])
+    return rows
+
+async def _render_candidates(order_id: int) -> tuple[str, InlineKeyboardMarkup]:
+    order = await db.get_order(order_id)
+    props = await _ranked_proposals(order) if order else []
+    if not props:
+        return "Пока нет откликов.", InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="🔄 Обновить", callback_data=CandidatesCb(order_id=order_id).pack())]
+        ])
+
+    text = "Кандидаты (лучшие сверху):\n" + "\n".join(_candidate_line(p) for p in props)
+    kb = InlineKeyboardMarkup(inline_keyboard=_candidate_rows(order_id, props) + [
+        [InlineKeyboardButton(text="↩️ Назад", callback_data=f"order:{order_id}")]
+    ])
+    return text, kb
+
+async def cb_candidates(cq: CallbackQuery, callback_data: CandidatesCb):
+    order_id = callback_data.order_id
+    order = await db.get_order(order_id)
+    props = await _ranked_proposals(order) if order else []
+    if not props:
+        await cq.message.reply(f"На заказ #{order_id} пока нет откликов.")
+        return await cq.answer()
+    top = props[:20]
+    await cq.message.reply(f"Кандидаты на #{order_id} (лучшие сверху):\n" + "\n".join(_candidate_line(p) for p in top),
+                           reply_markup=InlineKeyboardMarkup(inline_keyboard=_candidate_rows(order_id, top)))
+    await cq.answer()
+
+async def _assign(cq: CallbackQuery, bot: Bot, order_id: int, walker_id: int):
+    ok = await db.assign_walker(order_id, walker_id, actor=cq.from_user.id)
+    if not ok:
+        await cq.message.reply("Не удалось назначить: заказ уже не в статусе open/published.")
+        return await cq.answer()
+    order = await db.get_order(order_id)
+    client_id = order["client_id"]
+    await cq.message.reply(f"Исполнитель назначен на заказ #{order_id}.")
+    # каждому отдельно: сбой у одного не должен лишить уведомления другого
+    await notify(bot, client_id, f"✅ Исполнитель назначен (id {walker_id}). Свяжитесь друг с другом.")
+    await notify(bot, walker_id, f"✅ Вы назначены исполнителем на заказ #{order_id}. Клиент: id {client_id}.")
+    await cq.answer()
+
+async def cb_choose(cq: CallbackQuery, callback_data: ChooseCb, bot: Bot):
+    await _assign(cq, bot, callback_data.order_id, callback_data.walker_id)
+
+async def cb_auto_assign(cq: CallbackQuery, callback_data: AutoAssignCb, bot: Bot):
+    order_id = callback_data.order_id
+    order = await db.get_order(order_id)
+    if not order or order["client_id"] != cq.from_user.id:
+        return await cq.answer("Заказ не найден или не ваш.", show_alert=True)
+    props = await _ranked_proposals(order)
+    if not props:
+        await cq.message.reply(f"На заказ #{order_id} пока нет откликов.")
+        return await cq.answer()
+    best = props[0]
+    await _assign(cq, bot, order_id, best["walker_id"])
+
+async def cb_profile(cq: CallbackQuery, callback_data: ProfileCb):
+    order_id = callback_data.order_id; walker_id = callback_data.walker_id
+
+    u = await db.get_user(walker_id) or {}
+    p = await db.get_walker_profile(walker_id) or {}
+
+    name = u.get("full_name") or f"id {walker_id}"
+    username = f"@{u.get('username')}" if u.get("username") else ""
+    phone = p.get("phone") or "—"
+    rate = f"{p.get('rate')}₽/ч" if p.get("rate") else "—"
+    areas = p.get("areas") or "—"
+    bio = p.get("bio") or "—"
+    stars = rating(p.get("rating_sum"), p.get("rating_count")) or "—"
+
+    text = (
+        f"ℹ️ Профиль исполнителя\n"
+        f"{name} {username}\n"
+        f"Телефон: {phone}\n"
+        f"Ставка: {rate}\n"
+        f"Рейтинг: {stars}\n"
+        f"Районы: {areas}\n"
+        f"О себе: {bio}"
+    )
+
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"✅ Выбрать {name}",
+                              callback_data=ChooseCb(order_id=order_id, walker_id=walker_id).pack())],
+        [InlineKeyboardButton(text="⬅️ Назад к кандидатам",
+                              callback_data=CandidatesCb(order_id=order_id).pack())],
+    ])
+
+    await cq.message.reply(text, reply_markup=kb)
+    await cq.answer()
+
+# ====================== Отзывы ======================
+async def cb_rate(cq: CallbackQuery, callback_data: RateCb, state: FSMContext):
+    order_id = callback_data.order_id
+    if not 1 <= callback_data.stars <= 5:
+        return await cq.answer()
+    ok = await db.add_review(order_id, cq.from_user.id, callback_data.stars)
+    if not ok:
+        return await cq.answer("Оценить можно только свой выполненный заказ.", show_alert=True)
+    await state.set_state(ReviewStates.waiting_text)
+    await state.update_data(order_id=order_id)
+    await cq.message.edit_text(f"Заказ #{order_id}: {'⭐' * callback_data.stars}\n"
+                               f"Пара слов об исполнителе? /skip — без отзыва.")
+    await cq.answer()
+
+async def step_review_text(m: Message, state: FSMContext):
+    data = await state.get_data()
+    await db.set_review_text(data["order_id"], m.from_user.id, m.text.strip()[:1000])
+    await state.clear()
+    await m.answer("Спасибо за отзыв!")
+
+
+def register_callbacks(table: CallbackTable) -> None:
+    table.add(CandidatesCb, cb_candidates)
+    table.add(ChooseCb, cb_choose)
+    table.add(ProfileCb, cb_profile)
+    table.add(AutoAssignCb, cb_auto_assign)
+    table.add(RateCb, cb_rate)
+
+def get_router() -> Router:
+    router = Router(name="client")
+    router.message.register(cmd_candidates, Command("candidates"))
+    router.message.register(cmd_cancel_order, Command("cancel_order"))
+    router.message.register(cmd_reschedule, Command("reschedule"))
+    router.message.register(cmd_set_address, Command("set_address"))
+    router.message.register(cmd_my_orders, Command("my_orders"))
+
+    router.message.register(on_services, F.text == "🐶 Услуги для собак")
+    router.callback_query.register(cb_back_main, F.data == "back:main")
+    router.callback_query.register(cb_choose_service, OrderStates.choosing_service, F.data.startswith("srv:"))
+    router.callback_query.register(cb_choose_walk_type, OrderStates.choosing_walk_type, F.data.startswith("walk:"))
+    router.message.register(step_pet_name, OrderStates.pet_name, F.text)
+    router.message.register(step_pet_size, OrderStates.pet_size, F.text)
+    router.message.register(step_area, OrderStates.area, F.text)
+    router.message.register(step_area_location, OrderStates.area, F.location)
+    router.message.register(step_when, OrderStates.when_at, F.text)
+    router.message.register(step_duration, OrderStates.duration_min, F.text)
+    router.message.register(step_address, OrderStates.address, F.text)
+    router.message.register(skip_any, Command("skip"))
+    router.callback_query.register(cb_confirm, OrderStates.confirming, F.data.in_({"ord:confirm", "ord:cancel"}))
+    router.message.register(step_budget, OrderStates.budget, F.text)
+    router.message.register(step_comment, OrderStates.comment, F.text)
+    router.message.register(step_photo, OrderStates.photos, F.photo)
+    router.message.register(step_photo_text, OrderStates.photos, F.text)
+    router.message.register(step_review_text, ReviewStates.waiting_text, F.text)
+    return router
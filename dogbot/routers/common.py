@@ -0,0 +1,71 @@
+# dogbot/routers/common.py
+"""Базовые команды и пункты главного меню, общие для всех ролей."""
+
+from aiogram import Bot, F, Router
+from aiogram.types import Message
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+
+from dogbot.sender import notify
+from dogbot.settings import Settings
+from dogbot.keyboards import main_menu
+from dogbot.writebehind import UserWriteBehind
+from dogbot import db
+
+
+async def whoami_cmd(m: Message):
+    await m.answer(f"Твой Telegram ID: {m.from_user.id}")
+
+async def cmd_start(m: Message, state: FSMContext, user_writes: UserWriteBehind):
+    await state.clear()
+    # не ждём БД: запись уйдёт пачкой, а если ничего не поменялось — не уйдёт вовсе
+    await user_writes.upsert_user(m.from_user.id, m.from_user.username, m.from_user.full_name)
+    await m.answer("Привет! Это DogBot: выгул/передержка/няня. Выбирай ниже 👇", reply_markup=main_menu())
+
+async def cmd_help(m: Message):
+    await m.answer("Команды: /start, /help, /my_orders, /cancel, /role")
+
+async def check_state(m: Message, state: FSMContext):
+    await m.answer(f"state: {await state.get_state()}")
+
+async def cmd_cancel(m: Message, state: FSMContext):
+    await state.clear()
+    await m.answer("Окей, отменил. Возвращаюсь в меню.", reply_markup=main_menu())
+
+async def cmd_role(m: Message):
+    role = await db.get_user_role(m.from_user.id)
+    await m.answer(f"Твоя роль: {role or 'не зарегистрирован'}")
+
+async def on_call_manager(m: Message, bot: Bot, settings: Settings):
+    if not settings.DISPATCHER_CHAT_ID:
+        return await m.answer("Чат менеджеров не настроен. Добавь DISPATCHER_CHAT_ID в .env")
+    ok = await notify(bot, settings.DISPATCHER_CHAT_ID,
+                      f"📞 Запрос менеджера: {m.from_user.full_name} @{m.from_user.username} (id {m.from_user.id})")
+    if not ok:
+        return await m.answer("Не получилось дозвать менеджера, попробуй чуть позже.")
+    await m.answer("Зову менеджера. Он свяжется с тобой в лс.")
+
+async def on_faq(m: Message):
+    await m.answer("FAQ прикрутим позже. Сейчас главный сценарий — заявки/отклики/выбор.")
+
+async def fallback(m: Message):
+    await m.answer("Ткни в меню ниже, не забивай голову 🙂", reply_markup=main_menu())
+
+
+def get_router() -> Router:
+    router = Router(name="common")
+    router.message.register(whoami_cmd, Command("whoami"))
+    router.message.register(cmd_start, Command("start"))
+    router.message.register(cmd_help, Command("help"))
+    router.message.register(check_state, Command("state"))
+    router.message.register(cmd_cancel, Command("cancel"))
+    router.message.register(cmd_role, Command("role"))
+    router.message.register(on_call_manager, F.text == "📞 Позвать менеджера")
+    router.message.register(on_faq, F.text == "❓ Общие вопросы")
+    return router
+
+def get_fallback_router() -> Router:
+    # отдельным роутером, чтобы подключить его последним
+    router = Router(name="fallback")
+    router.message.register(fallback)
+    return router
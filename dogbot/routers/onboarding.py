@@ -0,0 +1,84 @@
+# dogbot/routers/onboarding.py
+"""Анкета исполнителя: «👤 Работать у нас» → имя → телефон → опыт → районы."""
+
+import re
+
+from aiogram import F, Router
+from aiogram.types import Message
+from aiogram.fsm.context import FSMContext
+
+from dogbot.states import WorkStates
+from dogbot.writebehind import UserWriteBehind
+from dogbot import db
+
+
+async def on_work(m: Message, state: FSMContext):
+    await state.set_state(WorkStates.collecting_name)
+    await m.answer("Как к тебе обращаться? (Имя и, если хочешь, коротко о себе)")
+
+async def work_name(m: Message, state: FSMContext):
+    name = m.text.strip()[:64]
+    await state.update_data(name=name)
+    await state.set_state(WorkStates.collecting_phone)
+    await m.answer("Телефон для связи (пример: +79990000000).")
+
+async def work_phone(m: Message, state: FSMContext):
+    phone = m.text.strip().replace(" ", "")
+    if not phone.startswith("+") or len(phone) < 10:
+        return await m.reply("Дай нормальный телефон с +, ок? Например +79990000000")
+    await state.update_data(phone=phone)
+    await state.set_state(WorkStates.collecting_exp)
+    await m.answer("Коротко об опыте: породы, сколько водишь, особенности. Можно указать ставку числом (руб/ч).")
+
+async def work_exp(m: Message, state: FSMContext):
+    bio = m.text.strip()[:500]
+    # вытащим ставку (первое число 3-5 цифр)
+    rate = None
+    m_rate = re.search(r"\b(\d{3,5})\b", bio)
+    if m_rate:
+        try:
+            rate = int(m_rate.group(1))
+        except ValueError:
+            rate = None
+    await state.update_data(bio=bio, rate=rate)
+    await state.set_state(WorkStates.collecting_areas)
+    await m.answer("В каких районах работаешь? Укажи через запятую (например: Центр, Савёловский, Купчино).")
+
+async def work_areas(m: Message, state: FSMContext, user_writes: UserWriteBehind):
+    areas = m.text.strip()[:200]
+    data = await state.get_data()
+
+    # Создаём/обновляем пользователя и профиль
+    await db.upsert_user(
+        tg_id=m.from_user.id,
+        username=m.from_user.username,
+        full_name=data["name"],
+        role="walker",
+        actor=m.from_user.id,
+    )
+    # отложенная запись из /start легла бы позже и вернула имя из Telegram
+    user_writes.discard(m.from_user.id)
+    await db.upsert_walker_profile(
+        walker_id=m.from_user.id,
+        phone=data.get("phone"),
+        bio=data.get("bio"),
+        rate=data.get("rate"),
+        areas=areas,
+    )
+
+    await state.clear()
+    msg = "Готово! Профиль исполнителя создан и роль выдана (walker).\n"
+    if data.get("rate"):
+        msg += f"Ставка: {data['rate']}₽/час.\n"
+    msg += f"Районы: {areas or '—'}\nТеперь ты можешь откликаться на заявки."
+    await m.answer(msg)
+
+
+def get_router() -> Router:
+    router = Router(name="onboarding")
+    router.message.register(on_work, F.text == "👤 Работать у нас")
+    router.message.register(work_name, WorkStates.collecting_name, F.text)
+    router.message.register(work_phone, WorkStates.collecting_phone, F.text)
+    router.message.register(work_exp, WorkStates.collecting_exp, F.text)
+    router.message.register(work_areas, WorkStates.collecting_areas, F.text)
+    return router
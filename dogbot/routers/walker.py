@@ -0,0 +1,246 @@
+# dogbot/routers/walker.py
+"""Исполнитель: отклики на заказы и управление своим профилем."""
+
+from aiogram import Bot, F, Router
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+    ReplyKeyboardRemove,
+)
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+
+from dogbot.callbacks import CallbackTable, ProposalCb, CandidatesCb, ChooseCb, FeedCb
+from dogbot.keyboards import kb_location, kb_rate
+from dogbot.sender import notify
+from dogbot.states import ProposalStates, WalkerGeoStates
+from dogbot.texts import order_title, rating
+from dogbot import db, feed, geo, prefs
+
+
+async def require_walker(user_id: int) -> bool:
+    role = await db.get_user_role(user_id)
+    return role == "walker"
+
+# ====================== Отклики исполнителей ======================
+async def cb_proposal_start(cq: CallbackQuery, callback_data: ProposalCb, state: FSMContext):
+    order_id = callback_data.order_id
+    if not await require_walker(cq.from_user.id):
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="👤 Стать исполнителем", callback_data="become:walker")]
+        ])
+        await cq.message.reply("Откликаться могут только исполнители (walker).", reply_markup=kb)
+        return await cq.answer()
+
+    await state.set_state(ProposalStates.waiting_price)
+    await state.update_data(order_id=order_id)
+    await cq.message.reply(f"Отклик на заказ #{order_id}. Ваша цена (числом)?")
+    await cq.answer()
+
+async def cb_become_walker(cq: CallbackQuery):
+    await db.set_user_role(cq.from_user.id, "walker", actor=cq.from_user.id)
+    await cq.message.reply("Готово. Теперь у тебя роль walker. Можно откликаться.")
+    await cq.answer()
+
+async def proposal_price(m: Message, state: FSMContext):
+    txt = (m.text or "").strip().replace(" ", "")
+    if not txt.isdigit():
+        return await m.reply("Цена должна быть числом, без пробелов. Ещё раз:")
+    await state.update_data(price=int(txt))
+    await state.set_state(ProposalStates.waiting_note)
+    await m.reply("Короткий комментарий (опционально).")
+
+async def proposal_note(m: Message, state: FSMContext, bot: Bot):
+    data = await state.get_data()
+    order_id = data["order_id"]
+    price = data["price"]
+    note = m.text.strip() or None
+
+    prop_id = await db.add_proposal(order_id, m.from_user.id, price, note)
+
+    order = await db.get_order(order_id)
+    client_id = order["client_id"]
+    walker_tag = f"{m.from_user.full_name} @{m.from_user.username}" if m.from_user.username else f"{m.from_user.full_name}"
+    msg = (
+        f"📝 Новый отклик на заказ #{order_id}\n"
+        f"Исполнитель: {walker_tag}\n"
+        f"Цена: {price}\n"
+        f"Комментарий: {note or '—'}"
+    )
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Выбрать этого исполнителя",
+                              callback_data=ChooseCb(order_id=order_id, walker_id=m.from_user.id).pack())],
+        [InlineKeyboardButton(text="👀 Все кандидаты", callback_data=CandidatesCb(order_id=order_id).pack())],
+    ])
+    await notify(bot, client_id, msg, reply_markup=kb)
+
+    await m.reply(f"Отклик отправлен (#{prop_id}). Ждите решения клиента.")
+    await state.clear()
+
+async def cmd_done(m: Message, bot: Bot):
+    parts = (m.text or "").split()
+    if len(parts) != 2 or not parts[1].isdigit():
+        return await m.answer("Использование: /done <order_id>")
+    oid = int(parts[1])
+    asg = await db.get_assignment(oid)
+    order = await db.get_order(oid)
+    if not asg or not order or asg["walker_id"] != m.from_user.id:
+        return await m.answer("Заказ не найден или назначен не вам.")
+    if order["status"] != "assigned":
+        return await m.answer(f"Нельзя завершить: статус {order['status']}.")
+    await db.mark_done(oid, actor=m.from_user.id)
+    await m.answer(f"Заказ #{oid} завершён. Спасибо!")
+    await notify(bot, order["client_id"], f"🐾 Заказ #{oid} выполнен. Оцените исполнителя:",
+                 reply_markup=kb_rate(oid))
+
+# ====================== Профиль исполнителя ======================
+async def cmd_profile(m: Message):
+    p = await db.get_walker_profile(m.from_user.id)
+    if not p:
+        return await m.answer("Профиль не найден. Нажми «👤 Работать у нас» и заполни анкету.")
+    rate = f"{p.get('rate')}₽/ч" if p.get('rate') else "—"
+    areas = p.get('areas') or "—"
+    phone = p.get('phone') or "—"
+    stars = rating(p.get("rating_sum"), p.get("rating_count")) or "—"
+    await m.answer(
+        f"👤 Твой профиль исполнителя\n"
+        f"Телефон: {phone}\n"
+        f"Ставка: {rate}\n"
+        f"Районы: {areas}\n"
+        f"Рейтинг: {stars}"
+    )
+
+async def cmd_set_areas(m: Message):
+    txt = (m.text or "")
+    parts = txt.split(maxsplit=1)
+    if len(parts) < 2:
+        return await m.answer("Использование: /set_areas Центр, Купчино")
+    areas = parts[1][:200]
+    # подтянем текущий профиль (чтобы не затереть другое)
+    p = await db.get_walker_profile(m.from_user.id) or {}
+    await db.upsert_walker_profile(
+        walker_id=m.from_user.id,
+        phone=p.get("phone"),
+        bio=p.get("bio"),
+        price_from=p.get("rate"),
+        areas=areas,
+    )
+    await m.answer(f"Районы обновлены: {areas}")
+
+async def cmd_set_rate(m: Message):
+    txt = (m.text or "").replace(" ", "")
+    parts = txt.split(maxsplit=1)
+    if len(parts) < 2 or not parts[1].isdigit():
+        return await m.answer("Использование: /set_rate 600")
+    rate = int(parts[1])
+    p = await db.get_walker_profile(m.from_user.id) or {}
+    await db.upsert_walker_profile(
+        walker_id=m.from_user.id,
+        phone=p.get("phone"),
+        bio=p.get("bio"),
+        price_from=rate,
+        areas=p.get("areas"),
+    )
+    await m.answer(f"Ставка обновлена: {rate}₽/ч")
+
+async def cmd_set_home(m: Message, state: FSMContext):
+    if not await require_walker(m.from_user.id):
+        return await m.answer("Команда для исполнителей.")
+    await state.set_state(WalkerGeoStates.waiting_home)
+    await m.answer("Отправь геопозицию, от которой готов работать. Заказы придут в радиусе "
+                   "/set_radius км (по умолчанию 3).", reply_markup=kb_location())
+
+async def step_home_location(m: Message, state: FSMContext):
+    await db.set_walker_location(m.from_user.id, m.location.latitude, m.location.longitude)
+    await state.clear()
+    p = await db.get_walker_profile(m.from_user.id) or {}
+    await m.answer(f"📍 Точка сохранена, радиус {p.get('radius_km') or 0:g} км.", reply_markup=ReplyKeyboardRemove())
+
+async def cmd_set_radius(m: Message):
+    parts = (m.text or "").split()
+    try:
+        radius = float(parts[1].replace(",", ".")) if len(parts) == 2 else 0.0
+    except ValueError:
+        radius = 0.0
+    if radius <= 0:
+        return await m.answer(f"Использование: /set_radius 3 (км, не больше {geo.MAX_RADIUS_KM:g})")
+    if not await db.set_walker_radius(m.from_user.id, radius):
+        return await m.answer("Сначала укажи точку: /set_home")
+    await m.answer(f"Радиус обновлён: {min(radius, geo.MAX_RADIUS_KM):g} км")
+
+async def cmd_prefs(m: Message):
+    # /prefs — показать; /prefs services=walk sizes=small,medium hours=8-20 budget=500 per_day=5; /prefs reset
+    if not await require_walker(m.from_user.id):
+        return await m.answer("Команда для исполнителей.")
+    parts = (m.text or "").split(maxsplit=1)
+    args = parts[1].strip() if len(parts) > 1 else ""
+    if args:
+        if args.lower() == "reset":
+            values = {}
+        else:
+            try:
+                values = prefs.parse(args, await db.get_walker_prefs(m.from_user.id))
+            except ValueError as e:
+                return await m.answer(f"Не понял: {e}")
+        await db.set_walker_prefs(m.from_user.id, **values)
+    current = await db.get_walker_prefs(m.from_user.id)
+    await m.answer(
+        "🎯 Какие заказы присылать\n" + prefs.describe(current) + "\n\n"
+        "Изменить: /prefs services=walk,nanny sizes=small,medium hours=8-20 budget=500 per_day=5\n"
+        "any — без ограничения, /prefs reset — сбросить всё."
+    )
+
+# ====================== Лента заказов ======================
+def _render_feed(page: feed.FeedPage) -> tuple[str, InlineKeyboardMarkup | None]:
+    if not page.orders:
+        return "Подходящих открытых заказов пока нет.", None
+    lines, rows = [], []
+    for o in page.orders:
+        when = feed.when_utc(o["when_at"]).strftime("%d.%m %H:%M")
+        budget = f" • {o['budget']}₽" if o.get("budget") else ""
+        lines.append(f"#{o['id']} {order_title(o['service'], o.get('walk_type'))} • {when} UTC • "
+                     f"{o['pet_size']} • {o['duration_min']} мин • {o.get('area') or '—'}{budget}")
+        rows.append([InlineKeyboardButton(text=f"✋ Откликнуться на #{o['id']}",
+                                          callback_data=ProposalCb(order_id=o["id"]).pack())])
+    if page.next:
+        rows.append([InlineKeyboardButton(text="Ещё ▶", callback_data=FeedCb(t=page.next[0], oid=page.next[1]).pack())])
+    return "📋 Открытые заказы в твоих районах:\n" + "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=rows)
+
+async def cmd_feed(m: Message):
+    if not await require_walker(m.from_user.id):
+        return await m.answer("Лента — для исполнителей.")
+    if not await db.get_walker_areas(m.from_user.id):
+        return await m.answer("Сначала укажи районы: /set_areas Центр, Купчино")
+    text, kb = _render_feed(await feed.feed_page(m.from_user.id))
+    await m.answer(text, reply_markup=kb)
+
+async def cb_feed(cq: CallbackQuery, callback_data: FeedCb):
+    if not await require_walker(cq.from_user.id):
+        return await cq.answer("Лента — для исполнителей.", show_alert=True)
+    page = await feed.feed_page(cq.from_user.id, (callback_data.t, callback_data.oid))
+    text, kb = _render_feed(page)
+    await cq.message.answer(text, reply_markup=kb)
+    await cq.answer()
+
+
+def register_callbacks(table: CallbackTable) -> None:
+    table.add(ProposalCb, cb_proposal_start)
+    table.add(FeedCb, cb_feed)
+
+def get_router() -> Router:
+    router = Router(name="walker")
+    router.callback_query.register(cb_become_walker, F.data == "become:walker")
+    router.message.register(proposal_price, ProposalStates.waiting_price, F.text)
+    router.message.register(proposal_note, ProposalStates.waiting_note, F.text)
+    router.message.register(cmd_profile, Command("profile"))
+    router.message.register(cmd_set_areas, Command("set_areas"))
+    router.message.register(cmd_set_rate, Command("set_rate"))
+    router.message.register(cmd_done, Command("done"))
+    router.message.register(cmd_set_home, Command("set_home"))
+    router.message.register(cmd_set_radius, Command("set_radius"))
+    router.message.register(cmd_prefs, Command("prefs"))
+    router.message.register(cmd_feed, Command("feed"))
+    router.message.register(step_home_location, WalkerGeoStates.waiting_home, F.location)
+    return router
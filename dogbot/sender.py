@@ -0,0 +1,197 @@
+# dogbot/sender.py
+"""
+Единый слой исходящих вызовов Bot API.
+
+ResilienceMiddleware вешается на session бота, поэтому через него идут
+все запросы (send_message, answer, edit_text, ...):
+- сетевые ошибки и 5xx — повтор с экспоненциальной задержкой и джиттером;
+- RetryAfter — ждём ровно столько, сколько просит Telegram;
+- при серии сбоев подряд размыкается circuit breaker и запросы
+  сразу падают, пока Bot API не оживёт;
+- счётчики по классам ошибок.
+
+notify() — «отправить и не уронить хендлер» вместо try/except: pass.
+notify_many() — то же для сотен адресатов, не быстрее NOTIFY_PER_SECOND;
+send_paced() — тот же лимит для любых отправок (рассылка заказов).
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Iterable, List, Sequence, TypeVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods import GetUpdates
+
+from dogbot.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# Telegram режет ~30 сообщений/с на бота; как рассылка заказов — 25 в секунду
+NOTIFY_PER_SECOND = 25
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(TelegramNetworkError):
+    """Bot API считается недоступным — запрос даже не отправляли."""
+
+
+class CircuitBreaker:
+    """
+    closed → (threshold сбоев подряд) → open → (cooldown) → half-open → closed/open.
+
+    В half-open пропускаем один пробный запрос; остальные падают сразу,
+    как в open, пока проба не решится (или не зависнет дольше cooldown).
+    """
+
+    def __init__(self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probe_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        now = self.clock()
+        # отменённая проба не вызовет ни success, ни failure — через cooldown пускаем следующую
+        if self.probe_at is not None and now - self.probe_at < self.cooldown:
+            return False
+        self.probe_at = now
+        return True
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.threshold:
+            self.opened_at = self.clock()
+        self.probe_at = None
+
+
+class ResilienceMiddleware(BaseRequestMiddleware):
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        retry_after_max: float = 60.0,
+        breaker: CircuitBreaker | None = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.breaker = breaker or CircuitBreaker(threshold=10, cooldown=30.0)
+        self.sleep = sleep
+        self.sent = 0
+        self.errors: Counter[str] = Counter()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResilienceMiddleware":
+        return cls(
+            retries=settings.SEND_RETRIES,
+            backoff_base=settings.SEND_BACKOFF_BASE,
+            backoff_max=settings.SEND_BACKOFF_MAX,
+            retry_after_max=settings.SEND_RETRY_AFTER_MAX,
+            breaker=CircuitBreaker(settings.BREAKER_THRESHOLD, settings.BREAKER_COOLDOWN),
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: равномерно в [0, base * 2^attempt], не больше max
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def __call__(self, make_request, bot: Bot, method):
+        # long polling у aiogram со своим back-off, не мешаем ему
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.errors["CircuitOpenError"] += 1
+                raise CircuitOpenError(method=method, message="Bot API circuit is open")
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.errors["TelegramRetryAfter"] += 1
+                if attempt >= self.retries or e.retry_after > self.retry_after_max:
+                    raise
+                await self.sleep(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                self.errors[type(e).__name__] += 1
+                self.breaker.failure()
+                if attempt >= self.retries:
+                    raise
+                await self.sleep(self._backoff(attempt))
+            except TelegramAPIError as e:
+                # 4xx (заблокировал бота, чат не найден, ...) — повтор не поможет,
+                # но Bot API ответил: для breaker это успех (и конец пробы)
+                self.errors[type(e).__name__] += 1
+                self.breaker.success()
+                raise
+            else:
+                self.breaker.success()
+                self.sent += 1
+                return response
+            attempt += 1
+
+
+async def notify(bot: Bot, chat_id: int, text: str, **kwargs: Any) -> bool:
+    """Отправить сообщение; ошибку (после всех повторов) только логируем."""
+    try:
+        await bot.send_message(chat_id, text, **kwargs)
+        return True
+    except TelegramAPIError as e:
+        log.warning("send to %s failed: %s", chat_id, e)
+        return False
+
+
+async def send_paced(items: Sequence[T], send: Callable[[T], Awaitable[Any]],
+                     per_second: int = NOTIFY_PER_SECOND, cost: int = 1) -> List[Any]:
+    """
+    send(item) для всех items не быстрее per_second сообщений в секунду;
+    cost — сколько сообщений Bot API уходит на один item (альбом из N фото
+    + карточка — N + 1). Пауза только между пачками, после последней — нет.
+    → результаты по порядку items, исключения — значениями, как у gather.
+    """
+    step = max(1, per_second // max(cost, 1))
+    results: List[Any] = []
+    for i in range(0, len(items), step):
+        if i:
+            await asyncio.sleep(1)
+        results += await asyncio.gather(*(send(x) for x in items[i:i + step]), return_exceptions=True)
+    return results
+
+
+async def notify_many(bot: Bot, chat_ids: Iterable[int], text: str, per_second: int = NOTIFY_PER_SECOND,
+                      **kwargs: Any) -> int:
+    """Разослать один текст многим через send_paced. → доставлено."""
+    results = await send_paced(list(chat_ids), lambda cid: notify(bot, cid, text, **kwargs), per_second)
+    return sum(r is True for r in results)
@@ -13,6 +13,7 @@ class OrderStates(StatesGroup):
     budget = State()
     comment = State()
     collecting_description = comment
+    photos = State()
     confirming = State()
 
 class WorkStates(StatesGroup):
@@ -25,4 +26,10 @@ class ProposalStates(StatesGroup):
     waiting_price = State()
     waiting_note = State()
 
+class ReviewStates(StatesGroup):
+    waiting_text = State()
+
+class WalkerGeoStates(StatesGroup):
+    waiting_home = State()
+
 
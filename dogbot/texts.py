@@ -14,3 +14,17 @@ FAQ = {
     "price": "💰 Стоимость зависит от услуги и длительности.",
     "pay": "💳 Оплата: наличные/перевод/по ссылке.",
 }
+
+def order_title(service: str, walk_type: str | None) -> str:
+    title = {"walk": "🦮 Выгул", "boarding": "🏡 Передержка", "nanny": "👩‍🍼 Няня"}.get(service, "🐶 Услуга")
+    if service == "walk" and walk_type:
+        sub = {"normal": "Обычный", "active": "Активный"}.get(walk_type, "")
+        if sub:
+            title += f" ({sub})"
+    return title
+
+def rating(rating_sum: int | None, rating_count: int | None) -> str:
+    """«⭐ 4.7 (12)» по агрегатам из walker_profiles; без отзывов — пустая строка."""
+    if not rating_count:
+        return ""
+    return f"⭐ {rating_sum / rating_count:.1f} ({rating_count})"
@@ -0,0 +1,151 @@
+# dogbot/throttling.py
+"""
+Антифлуд: token bucket на пользователя и на «тяжёлые» команды.
+Middleware вешается как outer — лишние апдейты отбрасываются
+до фильтров и хендлеров, т.е. до БД и Bot API.
+"""
+
+from __future__ import annotations
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from dogbot import db
+
+# (токенов в секунду, ёмкость ведра) для дорогих команд/кнопок.
+# Ключ — команда ("/start") или префикс callback_data ("cands").
+COMMAND_LIMITS: Dict[str, Tuple[float, int]] = {
+    "/start": (0.1, 2),       # запись users (пачками, см. dogbot.writebehind)
+    "/my_orders": (0.5, 3),
+    "/candidates": (0.5, 3),
+    "/pending": (0.5, 3),
+    "cands": (0.5, 3),        # list_proposals + ответ
+    "prof": (0.5, 3),
+    "choose": (0.5, 2),
+    "auto": (0.5, 2),         # ранжирование + назначение
+    "rate": (0.5, 2),         # отзыв: транзакция с пересчётом агрегатов
+    "/feed": (0.5, 3),
+    "feed": (1.0, 5),         # листание ленты
+    "/orders_open": (0.5, 3),
+    "oo": (1.0, 5),           # листание /orders_open
+    "/export": (0.05, 1),     # тяжёлая выгрузка — не чаще раза в 20 с
+    "/approve_all": (0.1, 1), # одобрение всей очереди одним запросом + рассылка
+    "pend": (1.0, 5),         # листание /pending
+    "mod": (2.0, 10),         # ✅/❌ подряд по странице
+}
+
+# кнопки, где разные callback_data — разные действия (✅ разным walker'ам):
+# склеиваем только повтор той же кнопки, а не весь префикс
+COALESCE_BY_DATA = {"mod"}
+
+
+class MemoryBucketBackend:
+    """Ведра в памяти процесса. Самые старые ключи вытесняются при переполнении."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, rate: float, burst: int) -> bool:
+        now = self.clock()
+        tokens, ts = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - ts) * rate)
+        ok = tokens >= 1.0
+        if ok:
+            tokens -= 1.0
+        self._buckets[key] = (tokens, now)  # переставляем в конец — «свежий» ключ
+        if len(self._buckets) > self.max_keys:
+            self._buckets.pop(next(iter(self._buckets)))
+        return ok
+
+
+class SqlBucketBackend:
+    """Общие ведра в таблице throttle_buckets — для нескольких инстансов бота."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+
+    async def take(self, key: str, rate: float, burst: int) -> bool:
+        return await db.take_throttle_token(key, rate, burst, self.clock())
+
+
+def make_backend(name: str):
+    if name == "sql":
+        return SqlBucketBackend()
+    return MemoryBucketBackend()
+
+
+def command_key(event: TelegramObject) -> Optional[str]:
+    """Команда или префикс callback_data, по которому ищем лимит в COMMAND_LIMITS."""
+    if isinstance(event, CallbackQuery):
+        return (event.data or "").split(":", 1)[0] or None
+    text = getattr(event, "text", None) or ""
+    if text.startswith("/"):
+        return text.split(maxsplit=1)[0].split("@", 1)[0].lower()
+    return None
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Два уровня ведер: общее на пользователя и отдельное на команду.
+    Повторы того же действия, пока предыдущее ещё обрабатывается, склеиваются
+    (coalesce) — второй раз хендлер не вызываем.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        backend=None,
+        command_limits: Dict[str, Tuple[float, int]] | None = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.backend = backend or MemoryBucketBackend()
+        self.command_limits = COMMAND_LIMITS if command_limits is None else command_limits
+        self.rejected: Counter[str] = Counter()
+        self._inflight: set[Tuple[int, str]] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        cmd = command_key(event)
+        flight = event.data if cmd in COALESCE_BY_DATA and isinstance(event, CallbackQuery) else cmd
+        if flight is not None and (user.id, flight) in self._inflight:
+            return await self._reject(event, "coalesced")
+
+        if not await self.backend.take(f"u:{user.id}", self.rate, self.burst):
+            return await self._reject(event, "user")
+
+        limit = self.command_limits.get(cmd) if cmd else None
+        if limit and not await self.backend.take(f"c:{user.id}:{cmd}", *limit):
+            return await self._reject(event, f"command:{cmd}")
+
+        if cmd is None:
+            return await handler(event, data)
+        self._inflight.add((user.id, flight))
+        try:
+            return await handler(event, data)
+        finally:
+            self._inflight.discard((user.id, flight))
+
+    async def _reject(self, event: TelegramObject, reason: str) -> None:
+        self.rejected[reason] += 1
+        # у callback'а надо снять «часики», иначе кнопка крутится до таймаута
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer()
+            except Exception:
+                pass
+        return None
@@ -0,0 +1,271 @@
+# dogbot/tracing.py
+"""
+Трассировка: апдейт → хендлер → функции dogbot.db → запросы Bot API.
+
+Контекст трейса живёт в contextvar, поэтому дочерние спаны корректно
+цепляются и внутри asyncio.gather (рассылки). Решение о сэмплировании
+принимается на корневом спане; несэмплированный трейс почти ничего не стоит.
+
+Экспорт: JSON Lines в файл или OTLP/HTTP (JSON) в коллектор.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import GetUpdates
+from aiogram.types import TelegramObject, Update
+
+from dogbot.settings import Settings
+
+log = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Спан несэмплированного трейса: дети тоже не пишутся."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current: ContextVar[Span | _NoopSpan | None] = ContextVar("dogbot_span", default=None)
+
+
+class FileExporter:
+    """JSON Lines, пишем пачками, чтобы не дёргать диск на каждый спан."""
+
+    def __init__(self, path: str, batch: int = 200):
+        self.path = path
+        self.batch = batch
+        self._buf: List[str] = []
+
+    def export(self, span: Span) -> None:
+        self._buf.append(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+        if len(self._buf) >= self.batch:
+            self._write()
+
+    def _write(self) -> None:
+        if not self._buf:
+            return
+        lines, self._buf = self._buf, []
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def flush(self) -> None:
+        self._write()
+
+
+class OTLPHttpExporter:
+    """OTLP/HTTP с JSON-телом (`/v1/traces`). Сброс — фоновой задачей раз в interval секунд."""
+
+    def __init__(self, endpoint: str, service_name: str = "dogbot", max_queue: int = 10_000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self._buf: List[Span] = []
+        self.dropped = 0
+
+    def export(self, span: Span) -> None:
+        if len(self._buf) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._buf.append(span)
+
+    @staticmethod
+    def _attr(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [self._attr("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "dogbot"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [self._attr(k, v) for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                } for s in spans],
+            }],
+        }]}
+
+    async def flush(self) -> None:
+        if not self._buf:
+            return
+        import aiohttp
+
+        spans, self._buf = self._buf, []
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                async with session.post(self.endpoint, json=self._payload(spans)) as resp:
+                    if resp.status >= 400:
+                        log.warning("OTLP export failed: HTTP %s", resp.status)
+        except Exception as e:
+            self.dropped += len(spans)
+            log.warning("OTLP export failed: %s", e)
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, exporter=None, flush_interval: float = 5.0):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        parent = _current.get()
+        if parent is NOOP_SPAN or (parent is None and not self._sample()):
+            token = _current.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current.reset(token)
+            return
+
+        trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        span = Span(trace_id, parent.span_id if parent is not None else None, name, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            self.exporter.export(span)
+
+    def _sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.exporter.flush()
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.exporter is not None:
+            await self.exporter.flush()
+
+
+tracer = Tracer()
+
+
+def configure(settings: Settings) -> Tracer:
+    """Настроить глобальный tracer по settings (TRACE_SAMPLE_RATE=0 — выключено)."""
+    exporter = None
+    if settings.TRACE_SAMPLE_RATE > 0:
+        if settings.TRACE_EXPORTER == "otlp":
+            exporter = OTLPHttpExporter(settings.OTLP_ENDPOINT)
+        else:
+            exporter = FileExporter(settings.TRACE_FILE)
+    tracer.sample_rate = settings.TRACE_SAMPLE_RATE
+    tracer.exporter = exporter
+    return tracer
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer на dp.update: корневой спан на каждый апдейт."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not tracer.enabled:
+            return await handler(event, data)
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        with tracer.span("update", update_type=update_type, update_id=getattr(event, "update_id", 0)) as span:
+            user = data.get("event_from_user")
+            if user is not None:
+                span.set_attribute("user_id", user.id)
+            return await handler(event, data)
+
+
+class TracingHandlerMiddleware(BaseMiddleware):
+    """Inner: дочерний спан с именем хендлера."""
+
+    async def __call__(self, handler, event, data):
+        if not tracer.enabled:
+            return await handler(event, data)
+        from dogbot.metrics import handler_name
+
+        with tracer.span(f"handler {handler_name(data)}"):
+            return await handler(event, data)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """Спан на каждый исходящий запрос Bot API (вместе с повторами)."""
+
+    async def __call__(self, make_request, bot, method):
+        if not tracer.enabled or isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        attrs = {"method": method.__api_method__}
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            attrs["chat_id"] = chat_id
+        with tracer.span(f"bot_api {method.__api_method__}", **attrs):
+            return await make_request(bot, method)
@@ -0,0 +1,115 @@
+# dogbot/writebehind.py
+"""
+Отложенная запись (write-behind) для неважных обновлений профиля: username
+и имя из /start.
+
+/start приходит на каждый перезапуск бота пользователем, и почти всегда
+ничего не меняет. Поэтому:
+  * отпечаток (username, full_name) последней записи держим в LRU — повтор
+    без изменений в БД не идёт вовсе;
+  * остальное копится в буфере (по последнему значению на пользователя) и
+    уходит одним executemany (db.upsert_users_batch) через flush_interval
+    секунд или сразу при max_rows строк;
+  * пачка не записалась — строки остаются в буфере до следующей попытки;
+  * stop() дописывает буфер — на выключении ничего не теряется.
+
+На users ссылаются orders, proposals и др. (FK): перед такой записью
+хендлер зовёт ensure(tg_id) — строка пользователя ляжет синхронно.
+
+Роль здесь не пишется: запись может лечь позже set_user_role/анкеты и не
+должна их перетирать. Кто пишет users напрямую, зовёт discard(tg_id).
+
+    writes = UserWriteBehind(flush_interval=0.2, max_rows=500)
+    await writes.upsert_user(tg_id, username, full_name)
+    ...
+    await writes.stop()
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dogbot import db
+
+log = logging.getLogger(__name__)
+
+Fingerprint = Tuple[Optional[str], Optional[str]]
+
+
+class UserWriteBehind:
+    def __init__(self, flush_interval: float = 0.2, max_rows: int = 500, cache_size: int = 100_000):
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.cache_size = cache_size
+        self._seen: "OrderedDict[int, Fingerprint]" = OrderedDict()
+        self._pending: Dict[int, Dict[str, object]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.stats: Counter[str] = Counter()  # skipped / buffered / flushed / batches / failed
+
+    async def upsert_user(self, tg_id: int, username: Optional[str], full_name: Optional[str]) -> None:
+        fp = (username, full_name)
+        if self._seen.get(tg_id) == fp:
+            self._seen.move_to_end(tg_id)
+            self.stats["skipped"] += 1
+            return
+        self._remember(tg_id, fp)
+        self._pending[tg_id] = {"tg_id": tg_id, "username": username, "full_name": full_name}
+        self.stats["buffered"] += 1
+        if len(self._pending) >= self.max_rows:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def ensure(self, tg_id: int) -> None:
+        """Строка пользователя должна быть в БД до записи, которая на неё ссылается."""
+        # locked — строка может быть в пачке, которая пишется прямо сейчас
+        if tg_id in self._pending or self._lock.locked():
+            await self.flush()
+
+    def discard(self, tg_id: int) -> None:
+        """Пользователя только что записали напрямую: отложенная запись устарела."""
+        self._pending.pop(tg_id, None)
+        self._seen.pop(tg_id, None)
+
+    async def flush(self) -> int:
+        async with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+            if not rows:
+                return 0
+            try:
+                await db.upsert_users_batch(rows)
+            except Exception:
+                # назад в буфер; пришедшее за время записи новее — его не трогаем
+                for r in rows:
+                    self._pending.setdefault(r["tg_id"], r)
+                self.stats["failed"] += len(rows)
+                log.exception("write-behind flush failed, %d rows kept for retry", len(rows))
+                return 0
+            self.stats["flushed"] += len(rows)
+            self.stats["batches"] += 1
+            return len(rows)
+
+    async def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+            self._timer = None
+            await self.flush()
+            if self._pending and self._timer is None:  # не записалось или пришло новое
+                self._timer = asyncio.create_task(self._flush_later())
+        except asyncio.CancelledError:
+            pass
+
+    def _remember(self, tg_id: int, fp: Fingerprint) -> None:
+        self._seen[tg_id] = fp
+        self._seen.move_to_end(tg_id)
+        if len(self._seen) > self.cache_size:
+            self._seen.popitem(last=False)
@@ -0,0 +1,22 @@
+import pytest, pytest_asyncio
+
+from dogbot.settings import Settings
+
+
+@pytest.fixture
+def settings():
+    # без .env и без перезагрузки модулей: всё нужное передаём явно
+    return Settings(
+        BOT_TOKEN="12345:TEST",
+        DATABASE_URL="sqlite+aiosqlite:///:memory:",
+        ADMIN_IDS={1000},
+    )
+
+
+@pytest_asyncio.fixture
+async def sqlite_db(settings):
+    from dogbot import db
+    db.configure(settings)
+    await db.init_db()
+    yield db
+    await db.dispose_engine()
@@ -0,0 +1,99 @@
+import datetime as dt
+
+import pytest
+
+from dogbot.archiver import Archiver
+
+
+async def _order(db, status=None, walker=None, days_ago=0):
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None)
+    if walker:
+        await db.add_proposal(oid, walker, 500, None)
+        await db.assign_walker(oid, walker)
+    if status == "done":
+        await db.mark_done(oid)
+    elif status == "cancelled":
+        await db.cancel_order(oid)
+    if days_ago:
+        async with db.get_engine().begin() as conn:
+            await conn.exec_driver_sql(
+                f"UPDATE orders SET created_at=datetime('now', '-{days_ago} days') WHERE id=?", (oid,))
+    return oid
+
+
+async def _count(db, table, oid):
+    key = "id" if table.startswith("orders") else "order_id"
+    async with db.get_engine().connect() as conn:
+        res = await conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table} WHERE {key}=?", (oid,))
+        return res.scalar()
+
+
+@pytest.mark.asyncio
+async def test_archiver_moves_old_closed_orders(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    old_done = await _order(db, "done", walker=2, days_ago=100)
+    assert await db.add_review(old_done, 1, 5)
+    old_cancelled = await _order(db, "cancelled", days_ago=100)
+    old_active = await _order(db, days_ago=100)
+    fresh_done = await _order(db, "done", walker=2)
+    stats_before = await db.walker_completion_stats([2])
+
+    archiver = Archiver(after_days=90, batch=1, pause=0)
+    assert await archiver.run_once() == 2
+    assert await archiver.run_once() == 0
+
+    for table in ("orders", "proposals", "assignments", "reviews"):
+        assert await _count(db, table, old_done) == 0
+        assert await _count(db, f"{table}_archive", old_done) == 1
+    assert await db.get_order(old_active) and await db.get_order(fresh_done)
+    # доля выполненных считается и по архиву
+    assert await db.walker_completion_stats([2]) == stats_before == {2: (2, 2)}
+
+    orders = await db.list_orders_by_client(1)
+    assert [(o["id"], o["archived"]) for o in orders] == [
+        (fresh_done, False), (old_active, False), (old_cancelled, True), (old_done, True)]
+    # страницы по 2: вторая целиком из архива
+    page = await db.list_orders_by_client(1, limit=2)
+    assert [o["id"] for o in page] == [fresh_done, old_active]
+    page = await db.list_orders_by_client(1, limit=2, before_id=page[-1]["id"])
+    assert [o["id"] for o in page] == [old_cancelled, old_done]
+
+
+@pytest.mark.asyncio
+async def test_list_orders_merges_archive_inside_page(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    stuck = await _order(db, days_ago=100)             # старый, но всё ещё активный
+    archived = await _order(db, "cancelled", days_ago=100)
+    fresh = await _order(db)
+    await Archiver(after_days=90).run_once()
+    # горячих хватает на страницу, но архивный заказ новее застрявшего
+    page = await db.list_orders_by_client(1, limit=2)
+    assert [o["id"] for o in page] == [fresh, archived]
+    assert stuck < archived
+
+
+@pytest.mark.asyncio
+async def test_archive_refuses_to_drop_new_columns(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    oid = await _order(db, "done", walker=2, days_ago=100)
+    before = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=90)
+    async with db.get_engine().begin() as conn:
+        await conn.exec_driver_sql("ALTER TABLE proposals ADD COLUMN extra TEXT")
+    with pytest.raises(RuntimeError, match="extra"):
+        await db.archive_orders(before)
+    assert await _count(db, "orders", oid) == 1        # транзакция откатилась, ничего не потеряли
+
+    async with db.get_engine().begin() as conn:
+        await conn.exec_driver_sql("ALTER TABLE proposals_archive ADD COLUMN extra TEXT")
+        await conn.exec_driver_sql("UPDATE proposals SET extra='x' WHERE order_id=?", (oid,))
+    assert await db.archive_orders(before) == 1
+    async with db.get_engine().connect() as conn:
+        res = await conn.exec_driver_sql("SELECT extra FROM proposals_archive WHERE order_id=?", (oid,))
+        assert res.scalar() == "x"
@@ -1,13 +1,8 @@
-import os, importlib, datetime as dt, pytest
+import datetime as dt, pytest
 
 @pytest.mark.asyncio
-async def test_area_broadcast_filter(monkeypatch):
-    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
-    monkeypatch.setenv("BOT_TOKEN", "12345:TEST")
-
-    from dogbot import db
-    importlib.reload(db)
-    await db.init_db()
+async def test_area_broadcast_filter(sqlite_db):
+    db = sqlite_db
 
     # двое исполнителей
     await db.upsert_user(10, "walker1", "W1", role="walker")
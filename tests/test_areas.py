@@ -0,0 +1,39 @@
+import pytest
+
+from dogbot import areas
+
+
+@pytest.mark.parametrize("raw, norm", [
+    ("Савёловский р-н", "савеловский"),
+    ("  КУПЧИНО ", "купчино"),
+    ("Savelovskiy", "савеловский"),
+    ("Петроградка", "петроградский"),
+])
+def test_normalize(raw, norm):
+    assert areas.normalize(raw) == norm
+
+
+def test_ngram_index_prefers_exact_then_similar():
+    idx = areas.NgramIndex(["купчино", "купчино 2", "центр", "савеловский"])
+    assert idx.search("купчино") == ["купчино"]
+    assert idx.search("купчина") == ["купчино"]
+    assert idx.search("хамовники") == []
+
+
+@pytest.mark.asyncio
+async def test_walkers_found_despite_typos(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(10, "w1", "W1", role="walker")
+    await db.upsert_walker_profile(10, areas="Купчино, савеловский, центр", is_approved=1)
+    await db.upsert_user(11, "w2", "W2", role="walker")
+    await db.upsert_walker_profile(11, areas="Петроградка", is_approved=1)
+
+    assert await db.list_walkers_by_area("Купчина") == [10]
+    assert await db.list_walkers_by_area("Савёловский") == [10]
+    assert await db.list_walkers_by_area("Петроградский район") == [11]
+    assert await db.list_walkers_by_area("Хамовники") == []
+
+    # районы перезаписываются целиком, индекс видит новые названия
+    await db.upsert_walker_profile(11, areas="Хамовники", is_approved=1)
+    assert await db.list_walkers_by_area("Петроградка") == []
+    assert await db.list_walkers_by_area("хамовники") == [11]
@@ -0,0 +1,29 @@
+import pytest
+
+from bench import db as dbbench
+from bench.seed import SeedSizes, seed
+
+
+@pytest.mark.asyncio
+async def test_seed_and_bench_small(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/seed.db"
+    counts = await seed(url, SeedSizes(walkers=50, clients=100, orders=300, areas=10))
+    assert counts["users"] == 150 and counts["walker_profiles"] == 50 and counts["orders"] == 300
+    assert counts["proposals"] > 0 and counts["assignments"] > 0
+
+    results = await dbbench.bench(url, calls=5)
+    assert {"list_walkers_by_area", "list_proposals", "list_orders_by_client",
+            "list_pending_walkers"} <= set(results)
+    assert any("ix_proposals_order" in line for line in results["list_proposals"].plan)
+    assert not results["get_order"].full_scan
+    # /orders_open — по частичному индексу активных заказов, не по всей истории
+    assert any("ix_orders_open" in line for line in results["list_open_orders"].plan)
+
+
+def test_compare_flags_regressions():
+    r = dbbench.Result("list_proposals", p50_ms=3.0, p99_ms=5.0, calls=10, full_scan=True)
+    base = {"list_proposals": {"p50_ms": 1.0, "full_scan": False}}
+    assert len(dbbench.compare({"list_proposals": r}, base)) == 2
+    # в пределах шума — не регрессия
+    r = dbbench.Result("list_proposals", p50_ms=1.1, p99_ms=5.0, calls=10)
+    assert dbbench.compare({"list_proposals": r}, base) == []
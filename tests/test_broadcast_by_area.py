@@ -1,13 +1,12 @@
-import os, importlib, pytest, datetime as dt, asyncio
+import pytest, datetime as dt
 
-@pytest.mark.asyncio
-async def test_send_by_area(monkeypatch):
-    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
-    monkeypatch.setenv("BOT_TOKEN", "12345:TEST")
+from dogbot import broadcast
+from dogbot.bot import create_app
 
-    from dogbot import db, bot as bot_mod
-    importlib.reload(db); importlib.reload(bot_mod)
-    await db.init_db()
+@pytest.mark.asyncio
+async def test_send_by_area(monkeypatch, settings, sqlite_db):
+    db = sqlite_db
+    app = create_app(settings)
 
     # walker'ы
     await db.upsert_user(1, "w1", "W1", role="walker")
@@ -21,14 +20,14 @@ async def test_send_by_area(monkeypatch):
     async def fake_send_photo(chat_id, photo, caption, reply_markup=None):
         sent.append(("photo", chat_id, caption))
 
-    monkeypatch.setattr(bot_mod.bot, "send_message", fake_send_message)
-    monkeypatch.setattr(bot_mod.bot, "send_photo", fake_send_photo)
+    monkeypatch.setattr(app.bot, "send_message", fake_send_message)
+    monkeypatch.setattr(app.bot, "send_photo", fake_send_photo)
 
     # заказ с районом Купчино
     when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=2)
     oid = await db.add_order(3, "walk", "Бублик", "medium", when, 60, "ул.", 1000, "", "normal", area="Купчино")
     await db.publish_order(oid)
 
-    await bot_mod.send_order_to_walkers_by_area("CARD", None, oid, "Купчино")
+    await broadcast.send_order_to_walkers_by_area(app.bot, "CARD", None, oid, "Купчино")
 
     assert {x[1] for x in sent} == {1}  # только W1
@@ -0,0 +1,27 @@
+import pytest
+
+from dogbot.callbacks import CallbackTable, ChooseCb, CandidatesCb
+
+
+def test_prefix_table_resolves_typed_data():
+    async def on_choose(cq, callback_data):
+        return callback_data
+
+    table = CallbackTable()
+    table.add(ChooseCb, on_choose)
+
+    hit = table.resolve(ChooseCb(order_id=7, walker_id=42).pack())
+    assert hit["callback_data"] == ChooseCb(order_id=7, walker_id=42)
+    assert table.resolve("choose:7:42") is not None  # формат старых кнопок совместим
+    assert table.resolve(CandidatesCb(order_id=7).pack()) is None
+    assert table.resolve("choose:x:y") is None
+
+
+def test_prefix_must_be_unique():
+    async def h(cq):
+        pass
+
+    table = CallbackTable()
+    table.add(ChooseCb, h)
+    with pytest.raises(ValueError):
+        table.add(ChooseCb, h)
@@ -1,19 +1,10 @@
-import os
 import datetime as dt
-import importlib
 import pytest
 
 @pytest.mark.asyncio
-async def test_db_crud(monkeypatch):
-    # Гоним тесты на SQLite in-memory, чтобы не трогать Postgres
-    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
-
-    # Импорт после подмены env, чтобы engine собрался с правильным URL
-    from dogbot import db
-    importlib.reload(db)
-
-    # init DDL
-    await db.init_db()
+async def test_db_crud(sqlite_db):
+    # Гоним тесты на SQLite in-memory (фикстура sqlite_db), чтобы не трогать Postgres
+    db = sqlite_db
 
     # пользователи
     await db.upsert_user(1, "client", "Client User")
@@ -58,3 +49,22 @@ async def test_db_crud(monkeypatch):
     order = await db.get_order(order_id)
     assert order is not None
     assert order["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_init_db_rerun_survives_failed_alters(sqlite_db):
+    # повторный старт: все ALTER'ы падают («колонка уже есть»), а бэкфиллы после них
+    # должны отработать в той же транзакции
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None, area="Центр")
+    await db.publish_order(oid)
+    async with db.get_engine().begin() as conn:
+        await conn.exec_driver_sql("UPDATE orders SET area_norm=NULL WHERE id=?", (oid,))
+        await conn.exec_driver_sql("DELETE FROM order_stats")
+
+    await db.init_db()
+    assert (await db.get_order(oid))["area_norm"] == "центр"
+    assert (await db.get_order_stats("2000-01-01"))["orders"] == 1
@@ -0,0 +1,51 @@
+import datetime as dt
+import logging, pytest
+
+from dogbot.dbstats import DB_CALL_SECONDS, DB_STATEMENT_SECONDS, mask_params
+
+
+def test_phone_masking():
+    assert mask_params({"phone": "+79991234567", "n": 5}) == {"phone": "+*********67", "n": 5}
+    assert mask_params(("звони +7 999 123-45-67",)) == ("звони +* *** ***-**-67",)
+    assert mask_params({"p": "8 (999) 123 45 67"}) == {"p": "* (***) *** ** 67"}
+
+
+def test_datetimes_and_ids_not_masked():
+    when = dt.datetime(2030, 1, 1, 8, 0, tzinfo=dt.timezone.utc)
+    params = {"when": "2030-01-01 08:00:00.250000+00:00", "at": when, "iso": when.isoformat(),
+              "oid": "1700000000", "day": "2030-08-01"}
+    assert mask_params(params) == params
+
+
+@pytest.mark.asyncio
+async def test_statements_attributed_to_db_function(settings, caplog):
+    from dogbot import db
+    settings.SLOW_QUERY_MS = 0  # всё «медленное» — проверим лог
+    db.configure(settings)
+    await db.init_db()
+    before = DB_STATEMENT_SECONDS.labels("upsert_user").count
+
+    with caplog.at_level(logging.WARNING, logger="dogbot.db.slow"):
+        await db.upsert_user(5, "u", "U", phone="+79991234567")
+
+    assert DB_STATEMENT_SECONDS.labels("upsert_user").count > before
+    assert DB_CALL_SECONDS.labels("upsert_user").count >= 1
+    slow = [r.getMessage() for r in caplog.records if "upsert_user" in r.getMessage() and "INSERT" in r.getMessage()]
+    assert slow and "+79991234567" not in slow[0] and "+*********67" in slow[0]
+    await db.dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_failed_statement_pops_start_mark(settings):
+    from sqlalchemy import text
+    from dogbot import db
+    db.configure(settings)
+    engine = db.get_engine()
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.rollback()
+        raw = await conn.get_raw_connection()
+        assert not raw.info.get("dogbot_query_start")
+    await db.dispose_engine()
@@ -0,0 +1,103 @@
+import asyncio
+import datetime as dt
+
+import pytest
+
+from dogbot.events import EventLog, journal
+
+
+@pytest.mark.asyncio
+async def test_transitions_journaled_after_flush(sqlite_db):
+    db = sqlite_db
+    journal._buf.clear()
+    await db.upsert_user(1, "c", "Client")
+    await db.set_user_role(2, "walker", actor=2)
+    await db.set_user_role(2, "walker", actor=2)   # та же роль — не событие
+    await db.set_walker_approval(2, True, actor=99)
+    await db.set_walker_approval(2, True, actor=99)  # повторный /approve — тоже
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=2)
+    oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None)
+    await db.publish_order(oid, actor=1)
+    await db.publish_order(oid, actor=1)             # уже опубликован
+    await db.update_order_time(oid, when + dt.timedelta(hours=1), 90, actor=1)
+    assert await db.assign_walker(oid, 2, actor=1)
+    await db.mark_done(oid, actor=2)
+    await db.cancel_order(oid, actor=1)
+    await db.cancel_order(oid, actor=1)            # уже отменён — не событие
+
+    assert await db.list_events("order", oid) == []   # пока только в буфере
+    assert await journal.flush() == 8 and journal.depth == 0
+
+    kinds = [(e["kind"], e["actor_id"]) for e in await db.list_events("order", oid)]
+    assert kinds == [("order.cancelled", 1), ("order.done", 2), ("order.assigned", 1), ("order.rescheduled", 1),
+                     ("order.published", 1), ("order.created", 1)]
+    assigned = (await db.list_events("order", oid))[2]
+    assert assigned["data"] == {"walker_id": 2, "was": "published"}
+    assert [e["data"] for e in await db.list_events("walker", 2)] == [{"approved": True, "was": None}]
+    assert [e["data"] for e in await db.list_events("user", 2)] == [{"role": "walker", "was": None}]
+
+    journal._buf.clear()
+    await db.set_walker_approval(2, False, actor=99)
+    await db.set_walker_approval(2, False, actor=99)
+    await db.set_user_role(2, "client", actor=99)
+    assert await journal.flush() == 2
+    assert (await db.list_events("walker", 2))[0]["data"] == {"approved": False, "was": "approved"}
+    assert (await db.list_events("user", 2))[0]["data"] == {"role": "client", "was": "walker"}
+
+
+@pytest.mark.asyncio
+async def test_overflow_and_failed_flush_bounded(sqlite_db, monkeypatch):
+    db = sqlite_db
+    log = EventLog(capacity=5, batch=2)
+    for i in range(8):
+        log.record("user.role", "user", i)
+    assert log.depth == 5 and log.stats["dropped"] == 3   # вытеснены самые старые
+
+    async def down(rows):
+        raise OSError("db down")
+
+    monkeypatch.setattr(db, "insert_events", down)
+    assert await log.flush() == 0
+    assert log.depth == 5 and log.stats["failed_batches"] == 1   # пачка вернулась в буфер
+    monkeypatch.undo()
+
+    assert await log.flush() == 5
+    assert [len(await db.list_events("user", i)) for i in range(8)] == [0, 0, 0, 1, 1, 1, 1, 1]
+    assert log.stats["flushed"] == 5 and log.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_onboarding_role_change_journaled(sqlite_db):
+    db = sqlite_db
+    journal._buf.clear()
+    await db.upsert_user(3, "c", "Client")                       # новый клиент — не событие
+    await db.upsert_user(3, "c", "Walker", role="walker", actor=3)
+    await db.upsert_user(3, "c", "Walker", role="walker", actor=3)   # роль та же
+    assert await journal.flush() == 1
+    [e] = await db.list_events("user", 3)
+    assert e["actor_id"] == 3 and e["data"] == {"role": "walker", "was": "client"}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_keeps_batch_of_cancelled_flush(sqlite_db, monkeypatch):
+    db = sqlite_db
+    log = EventLog(capacity=10, batch=10, flush_interval=0)
+    for i in range(3):
+        log.record("user.role", "user", 100 + i)
+    started = asyncio.Event()
+    real_insert = db.insert_events
+
+    async def hang(rows):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(db, "insert_events", hang)
+    log.start()
+    await started.wait()
+    assert log.depth == 0                          # пачка снята с буфера и «в полёте»
+    monkeypatch.setattr(db, "insert_events", real_insert)
+
+    await log.shutdown()
+    assert log.depth == 0 and log.stats["flushed"] == 3
+    assert [len(await db.list_events("user", 100 + i)) for i in range(3)] == [1, 1, 1]
@@ -0,0 +1,62 @@
+import csv
+import datetime as dt
+import gzip
+
+import pytest
+
+from dogbot import export
+
+
+def test_parse_range():
+    today = dt.date(2024, 5, 31)
+    utc = dt.timezone.utc
+    assert export.parse_range("", today) == (dt.datetime(2024, 5, 2, tzinfo=utc), dt.datetime(2024, 6, 1, tzinfo=utc))
+    assert export.parse_range("2024-05-01 2024-05-01", today) == (
+        dt.datetime(2024, 5, 1, tzinfo=utc), dt.datetime(2024, 5, 2, tzinfo=utc))
+    for bad in ("2024-05-31 2024-05-01", "31.05.2024", "2020-01-01 2024-01-01", "a b c"):
+        with pytest.raises(ValueError):
+            export.parse_range(bad, today)
+
+
+async def _order(db):
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    return await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                              duration_min=60, address="Ул. 1, кв. \"5\"", budget=None, comment=None)
+
+
+@pytest.mark.asyncio
+async def test_export_streams_range_in_batches(sqlite_db, tmp_path):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    ids = [await _order(db) for _ in range(5)]
+    for oid in ids:
+        await db.add_proposal(oid, 2, 500, "ок")
+    await db.assign_walker(ids[0], 2)
+    await db.mark_done(ids[0])
+    # закрытый заказ унесён в архив — в выгрузке он остаётся
+    assert await db.archive_orders(dt.datetime.now(dt.timezone.utc) + dt.timedelta(days=1)) == 1
+    # старый заказ — вне периода
+    engine = db.get_engine()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("UPDATE orders SET created_at='2020-01-01 12:00:00' WHERE id=?", (ids[-1],))
+
+    since, until = export.parse_range("")
+    batches = []
+
+    async def sink(rows):
+        batches.append(len(rows))
+
+    assert await db.export_rows("proposals", since, until, sink, batch=2) == 4
+    assert batches == [2, 2]
+
+    path, n = await export.export_csv("orders", since, until, tmp_path)
+    assert n == 4 and path.name.endswith(".csv.gz")
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(db.EXPORT_COLUMNS["orders"])
+    assert [int(r[0]) for r in rows[1:]] == ids[:4]
+    assert rows[1][rows[0].index("address")] == "Ул. 1, кв. \"5\""
+
+    _, n = await export.export_csv("assignments", since, until, tmp_path)
+    assert n == 1
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from dogbot import geo
+
+
+def test_encode_known_value():
+    # классический пример из описания геохеша
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_covering_cells_contain_every_point_in_radius():
+    rnd = random.Random(1)
+    lat0, lon0 = 59.93, 30.31
+    cells = set(geo.covering_cells(lat0, lon0, 5.0))
+    for _ in range(2000):
+        lat = lat0 + rnd.uniform(-0.05, 0.05)
+        lon = lon0 + rnd.uniform(-0.1, 0.1)
+        if geo.haversine_km(lat0, lon0, lat, lon) <= 5.0:
+            assert geo.encode(lat, lon) in cells
+
+
+@pytest.mark.asyncio
+async def test_list_walkers_near_respects_walker_radius(sqlite_db):
+    db = sqlite_db
+    home = (55.75, 37.62)
+    # 1 — в 1 км, радиус 3; 2 — в ~4 км, радиус 3 (не дотягивается); 3 — в ~4 км, радиус 5; 4 — не одобрен
+    points = {1: (55.759, 37.62, 3), 2: (55.786, 37.62, 3), 3: (55.786, 37.62, 5), 4: (55.75, 37.62, 3)}
+    for wid, (lat, lon, r) in points.items():
+        await db.upsert_user(wid, f"w{wid}", f"W{wid}", role="walker")
+        await db.upsert_walker_profile(wid, areas="Центр", is_approved=0 if wid == 4 else 1)
+        await db.set_walker_location(wid, lat, lon, r)
+
+    assert sorted(await db.list_walkers_near(*home)) == [1, 3]
+
+    # новая точка пересчитывает ячейку, радиус сохраняется
+    await db.set_walker_location(2, 55.751, 37.62)
+    assert sorted(await db.list_walkers_near(*home)) == [1, 2, 3]
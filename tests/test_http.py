@@ -0,0 +1,13 @@
+from dogbot.http import make_session
+
+
+def test_session_uses_settings(settings):
+    settings.HTTP_POOL_LIMIT = 42
+    settings.HTTP_TIMEOUT = 7.0
+    settings.BOT_API_URL = "http://127.0.0.1:8081"
+    s = make_session(settings)
+    assert s._connector_init["limit"] == 42
+    assert s._connector_init["keepalive_timeout"] == settings.HTTP_KEEPALIVE
+    assert s.timeout == 7.0
+    assert s.api.api_url("T", "getMe") == "http://127.0.0.1:8081/botT/getMe"
+    assert s.json_loads(s.json_dumps({"a": [1, "б"]})) == {"a": [1, "б"]}
@@ -0,0 +1,28 @@
+import pytest
+
+from bench import load
+
+
+@pytest.mark.asyncio
+async def test_load_smoke(tmp_path):
+    # маленький прогон: сценарий бенчмарка не сломан изменениями в хендлерах
+    res = await load.run(clients=6, walkers=12, areas=3, proposals=2, concurrency=6,
+                         db_url=f"sqlite+aiosqlite:///{tmp_path}/load.db")
+    stages = res["stages"]
+    assert not any(s.errors for s in stages.values())
+    assert res["orders"] == 6
+    assert res["fanout_messages"] == 6 * 4          # 4 walker'а в районе
+    assert len(stages["proposal"].latencies) == 6 * 2 * 3
+    assert len(stages["assign"].latencies) == 6
+    # 12 /start: половина — повторы без изменений, остальное одним-двумя executemany
+    assert res["user_writes"]["skipped"] == 6 and res["user_writes"]["flushed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_load_album_reuses_file_ids(tmp_path):
+    res = await load.run(clients=4, walkers=8, areas=2, proposals=1, concurrency=4,
+                         db_url=f"sqlite+aiosqlite:///{tmp_path}/load.db", photos=3)
+    assert not any(s.errors for s in res["stages"].values())
+    assert res["fanout_messages"] == 4 * 4
+    assert res["api_calls"]["sendMediaGroup"] == 4 * 4
+    assert res["fanout_uploads"] == 0                  # только file_id, без повторной загрузки
@@ -0,0 +1,48 @@
+import datetime as dt, pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+
+from dogbot.metrics import (
+    HANDLER_LATENCY, HANDLER_ERRORS, HandlerNameMiddleware, MetricsMiddleware, Registry,
+)
+
+
+def make_update(text):
+    user = User(id=1, is_bot=False, first_name="u")
+    msg = Message(message_id=1, date=dt.datetime.now(), chat=Chat(id=1, type="private"), from_user=user, text=text)
+    return Update(update_id=1, message=msg)
+
+
+@pytest.mark.asyncio
+async def test_handler_latency_and_errors_are_labelled():
+    async def metrics_ping(m: Message):
+        if m.text == "boom":
+            raise RuntimeError("boom")
+
+    router = Router()
+    router.message.register(metrics_ping)
+    dp = Dispatcher()
+    dp.update.outer_middleware(MetricsMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.include_router(router)
+    bot = Bot("12345:TEST")
+
+    await dp.feed_update(bot, make_update("hi"))
+    with pytest.raises(RuntimeError):
+        await dp.feed_update(bot, make_update("boom"))
+
+    assert HANDLER_LATENCY.labels("metrics_ping", "message").count == 2
+    assert HANDLER_ERRORS.labels("metrics_ping", "message").value == 1
+
+
+def test_prometheus_text_format():
+    reg = Registry()
+    h = reg.histogram("lat_seconds", "latency", ("handler",), buckets=(0.1, 1))
+    h.labels("a").observe(0.05)
+    h.labels("a").observe(5)
+    reg.add_collector("rejected_total", "rejected", "counter", "reason", lambda: {"user": 3})
+    text = reg.render()
+    assert 'lat_seconds_bucket{handler="a",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{handler="a",le="+Inf"} 2' in text
+    assert 'lat_seconds_count{handler="a"} 2' in text
+    assert 'rejected_total{reason="user"} 3' in text
@@ -0,0 +1,60 @@
+import pytest
+
+from dogbot import sender
+
+
+@pytest.mark.asyncio
+async def test_bulk_approval_single_statement_and_pages(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    for wid in range(10, 20):
+        await db.upsert_user(wid, f"w{wid}", "Walker", role="walker")
+    await db.upsert_walker_profile(10, areas="Центр")
+    await db.upsert_walker_profile(11, areas="Купчино")
+
+    page = await db.list_pending_walkers(limit=4)
+    assert [r["tg_id"] for r in page] == [10, 11, 12, 13]
+    assert [r["tg_id"] for r in await db.list_pending_walkers(13, 4)] == [14, 15, 16, 17]
+
+    # клиента и несуществующего не трогаем, повтор — пустой
+    assert await db.set_walkers_approval([12, 13, 13, 1, 999], True, actor=7) == [12, 13]
+    assert await db.set_walkers_approval([12, 13], True) == []
+    assert [r["tg_id"] for r in await db.list_pending_walkers()] == [10, 11, 14, 15, 16, 17, 18, 19]
+
+    # отказ — отдельное состояние: из очереди уходит, /approve_all его не трогает
+    assert await db.set_walkers_approval([14, 15], False) == [14, 15]
+    assert await db.set_walkers_approval([15], False) == []     # повторный отказ — без уведомления
+    assert [r["tg_id"] for r in await db.list_pending_walkers()] == [10, 11, 16, 17, 18, 19]
+
+    assert await db.approve_pending_walkers("центр", actor=7) == [10]
+    assert await db.approve_pending_walkers(actor=7) == [11, 16, 17, 18, 19]
+    assert await db.list_pending_walkers() == []
+
+    # явное одобрение по id снимает отказ; отказ одобренному — тоже смена статуса
+    assert await db.set_walkers_approval([14], True) == [14]
+    assert await db.set_walkers_approval([16], False) == [16]
+    await db.set_walker_approval(17, False)
+    assert await db.list_pending_walkers() == []
+    assert await db.approve_pending_walkers() == []
+
+
+class _Bot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+
+@pytest.mark.asyncio
+async def test_notify_many_paced(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(sec):
+        sleeps.append(sec)
+
+    monkeypatch.setattr(sender.asyncio, "sleep", fake_sleep)
+    bot = _Bot()
+    assert await sender.notify_many(bot, range(60), "hi", per_second=25) == 60
+    assert sorted(bot.sent) == list(range(60))
+    assert sleeps == [1, 1]                        # 25 + 25 + 10
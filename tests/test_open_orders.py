@@ -0,0 +1,97 @@
+import datetime as dt
+import types
+
+import pytest
+
+
+async def _order(db, hours):
+    when = dt.datetime(2030, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(hours=hours)
+    oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None, area="Центр")
+    await db.publish_order(oid)
+    return oid
+
+
+@pytest.mark.asyncio
+async def test_open_orders_pages_and_counts(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    for wid in (2, 3):
+        await db.upsert_user(wid, f"w{wid}", "Walker", role="walker")
+    ids = [await _order(db, h) for h in range(5)]
+
+    await db.add_proposal(ids[1], 2, 500, None)
+    await db.add_proposal(ids[1], 2, 400, None)    # правка — счётчик не растёт
+    await db.add_proposal(ids[1], 3, 600, None)
+    assert await db.assign_walker(ids[3], 2)       # назначенный — уже не активный
+
+    rows = await db.list_open_orders()
+    assert [r["id"] for r in rows] == [ids[0], ids[2], ids[4]]
+
+    first = await db.list_open_orders(limit=2, only_empty=False)
+    assert [(r["id"], r["proposals_count"]) for r in first] == [(ids[0], 0), (ids[1], 2)]
+    last = first[-1]
+    rest = await db.list_open_orders((last["when_at"], last["id"]), limit=2, only_empty=False)
+    assert [r["id"] for r in rest] == [ids[2], ids[4]]
+
+
+
+class _Answers:
+    def __init__(self):
+        self.texts = []
+
+    async def answer(self, text, reply_markup=None, **kwargs):
+        self.texts.append((text, reply_markup))
+
+
+@pytest.mark.asyncio
+async def test_orders_open_next_page_handler(sqlite_db, settings, monkeypatch):
+    from dogbot.callbacks import OpenOrdersCb
+    from dogbot.routers import admin
+
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    ids = [await _order(db, h) for h in range(3)]
+    monkeypatch.setattr(admin, "OPEN_ORDERS_PAGE", 2)
+
+    msg = _Answers()
+    m = types.SimpleNamespace(text="/orders_open", chat=types.SimpleNamespace(id=1000),
+                              from_user=types.SimpleNamespace(id=1000), answer=msg.answer)
+    await admin.cmd_orders_open(m, settings)
+    text, kb = msg.texts[-1]
+    assert f"#{ids[0]}" in text and f"#{ids[2]}" not in text
+
+    # «Ещё ▶»: курсор из callback_data — epoch-микросекунды, не datetime
+    cb = OpenOrdersCb.unpack(kb.inline_keyboard[0][0].callback_data)
+    acked = []
+    async def ack(*args, **kwargs):
+        acked.append(True)
+    cq = types.SimpleNamespace(message=m, from_user=m.from_user, answer=ack)
+    await admin.cb_orders_open(cq, cb, settings)
+    text, kb = msg.texts[-1]
+    assert f"#{ids[2]}" in text and f"#{ids[0]}" not in text and kb is None
+    assert acked
+
+
+@pytest.mark.asyncio
+async def test_orders_open_cursor_keeps_fractional_seconds(sqlite_db, settings, monkeypatch):
+    from dogbot.callbacks import OpenOrdersCb
+    from dogbot.routers import admin
+
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    base = dt.datetime(2030, 1, 1, 8, tzinfo=dt.timezone.utc)
+    ids = []
+    for ms in (300, 700):                          # оба заказа в одной секунде
+        oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small",
+                                 when_at=base + dt.timedelta(milliseconds=ms), duration_min=60,
+                                 address="Ул. 1", budget=None, comment=None, area="Центр")
+        await db.publish_order(oid)
+        ids.append(oid)
+    monkeypatch.setattr(admin, "OPEN_ORDERS_PAGE", 1)
+
+    text, kb = await admin._render_open_orders(None, False)
+    assert f"#{ids[0]}" in text
+    cb = OpenOrdersCb.unpack(kb.inline_keyboard[0][0].callback_data)
+    text, kb = await admin._render_open_orders((cb.t, cb.oid), False)
+    assert f"#{ids[1]}" in text and f"#{ids[0]}" not in text and kb is None
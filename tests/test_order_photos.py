@@ -0,0 +1,37 @@
+import asyncio
+import gc
+import types
+
+import pytest
+
+from dogbot.routers import client
+
+
+class _State:
+    def __init__(self):
+        self.data = {"photos": []}
+
+    async def get_data(self):
+        await asyncio.sleep(0)                     # уступаем: апдейты альбома идут вперемешку
+        return dict(self.data)
+
+    async def update_data(self, **kwargs):
+        await asyncio.sleep(0)
+        self.data.update(kwargs)
+
+
+@pytest.mark.asyncio
+async def test_album_photos_kept_and_lock_released():
+    state, answers = _State(), []
+
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    def photo(i):
+        return types.SimpleNamespace(chat=types.SimpleNamespace(id=42), media_group_id="g1", answer=answer,
+                                     photo=[types.SimpleNamespace(file_id=f"f{i}")])
+
+    await asyncio.gather(*(client.step_photo(photo(i), state) for i in range(3)))
+    assert sorted(state.data["photos"]) == ["f0", "f1", "f2"] and len(answers) == 1
+    gc.collect()
+    assert 42 not in client._photo_locks           # брошенный мастер не держит запись
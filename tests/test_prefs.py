@@ -0,0 +1,44 @@
+import datetime as dt
+
+import pytest
+
+from dogbot import prefs
+
+
+def test_parse_merges_and_validates():
+    p = prefs.parse("services=walk,nanny hours=22-6 budget=500")
+    assert p["services_mask"] == prefs.SERVICES["walk"] | prefs.SERVICES["nanny"]
+    assert (p["hour_from"], p["hour_to"], p["min_budget"]) == (22, 6, 500)
+    p = prefs.parse("budget=any per_day=3", p)
+    assert p["min_budget"] is None and p["max_per_day"] == 3 and p["hour_from"] == 22
+    with pytest.raises(ValueError):
+        prefs.parse("services=cats")
+
+
+async def _walker(db, wid, **values):
+    await db.upsert_user(wid, f"w{wid}", f"W{wid}", role="walker")
+    await db.upsert_walker_profile(wid, areas="Центр", is_approved=1)
+    if values:
+        await db.set_walker_prefs(wid, **prefs.parse(" ".join(f"{k}={v}" for k, v in values.items())))
+
+
+@pytest.mark.asyncio
+async def test_recipients_filtered_by_prefs_in_sql(sqlite_db):
+    db = sqlite_db
+    await _walker(db, 1)                          # без фильтров
+    await _walker(db, 2, services="boarding")     # только передержка
+    await _walker(db, 3, sizes="small")           # только маленькие
+    await _walker(db, 4, hours="22-6")            # ночь
+    await _walker(db, 5, budget=1000)             # от 1000
+    await _walker(db, 6, per_day=1)               # не больше одного в день
+
+    when = dt.datetime(2030, 1, 1, 19, 0, tzinfo=dt.timezone.utc)
+    oid = await db.add_order(client_id=100, service="walk", pet_name="Б", pet_size="medium", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=800, comment=None, area="Центр")
+    order = await db.get_order(oid)
+
+    assert sorted(await db.list_walkers_by_area("Центр", order)) == [1, 6]
+    assert sorted(await db.list_walkers_by_area("Центр")) == [1, 2, 3, 4, 5, 6]  # без заказа — как раньше
+
+    await db.record_deliveries([1, 6])
+    assert sorted(await db.list_walkers_ids(order)) == [1]
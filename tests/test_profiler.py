@@ -0,0 +1,39 @@
+import asyncio, time
+
+import pytest
+
+from dogbot import profiler
+
+
+def spin(seconds):
+    t = time.perf_counter()
+    while time.perf_counter() - t < seconds:
+        pass
+
+
+async def blocker():
+    await asyncio.sleep(0.05)
+    spin(0.2)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_reported():
+    task = asyncio.create_task(blocker())
+    profile = await profiler.profile_loop(0.5, block_ms=50)
+    await task
+
+    assert profile.samples > 0
+    assert profile.self_counts().most_common(1)[0][0][1] == "spin"
+    assert any(b.duration >= 0.1 and b.stack[-1][1] == "spin" for b in profile.blocks)
+    assert any(key[1] == "blocker" for key in profile.coroutines)
+    report = profile.render()
+    assert "## event loop blocked" in report and "spin (" in report
+
+
+@pytest.mark.asyncio
+async def test_single_profile_at_a_time():
+    first = asyncio.create_task(profiler.profile_loop(0.2))
+    await asyncio.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        await profiler.profile_loop(0.2)
+    await first
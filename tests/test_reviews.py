@@ -0,0 +1,64 @@
+import datetime as dt
+
+import pytest
+
+from dogbot import ranking
+
+
+async def _done_order(db, client_id, walker_id):
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    oid = await db.add_order(client_id=client_id, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None)
+    await db.assign_walker(oid, walker_id)
+    await db.mark_done(oid)
+    return oid
+
+
+@pytest.mark.asyncio
+async def test_review_updates_profile_aggregates(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    a = await _done_order(db, 1, 2)
+    b = await _done_order(db, 1, 2)
+
+    assert await db.add_review(a, 1, 5)
+    assert await db.add_review(b, 1, 3, "опоздал")
+    p = await db.get_walker_profile(2)
+    assert (p["rating_sum"], p["rating_count"]) == (8, 2)
+
+    # повторная оценка того же заказа — дельта, а не второй отзыв
+    assert await db.add_review(b, 1, 4)
+    p = await db.get_walker_profile(2)
+    assert (p["rating_sum"], p["rating_count"]) == (9, 2)
+
+    props_order = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small",
+                                     when_at=dt.datetime.now(dt.timezone.utc), duration_min=60,
+                                     address="Ул. 1", budget=None, comment=None)
+    await db.add_proposal(props_order, 2, 500, None)
+    (prop,) = await db.list_proposals(props_order)
+    assert (prop["rating_sum"], prop["rating_count"]) == (9, 2)
+
+
+@pytest.mark.asyncio
+async def test_review_rejected_for_foreign_or_unfinished_order(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    oid = await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                             duration_min=60, address="Ул. 1", budget=None, comment=None)
+    await db.assign_walker(oid, 2)
+    assert not await db.add_review(oid, 1, 5)   # ещё не done
+    await db.mark_done(oid)
+    assert not await db.add_review(oid, 99, 5)  # чужой заказ
+    assert (await db.get_walker_profile(2) or {}).get("rating_count", 0) == 0
+
+
+def test_rating_prior_keeps_single_five_behind_many_good():
+    order = {"area": None, "budget": None}
+    props = [
+        {"id": 1, "walker_id": 1, "price": 500, "rating_sum": 5, "rating_count": 1},
+        {"id": 2, "walker_id": 2, "price": 500, "rating_sum": 470, "rating_count": 100},
+    ]
+    assert [p["id"] for p in ranking.rank(order, props)] == [2, 1]
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import SendMessage
+
+from dogbot.sender import CircuitBreaker, CircuitOpenError, ResilienceMiddleware
+
+METHOD = SendMessage(chat_id=1, text="hi")
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+    def __call__(self):
+        return self.t
+
+
+def make_mw(**kw):
+    slept = []
+    async def sleep(s):
+        slept.append(s)
+    return ResilienceMiddleware(sleep=sleep, **kw), slept
+
+
+def flaky(*errors):
+    errors = list(errors)
+    calls = []
+    async def make_request(bot, method):
+        calls.append(method)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return make_request, calls
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors_and_respects_retry_after():
+    mw, slept = make_mw(retries=3)
+    make_request, calls = flaky(
+        TelegramServerError(METHOD, "502"),
+        TelegramRetryAfter(METHOD, "flood", retry_after=4),
+    )
+    assert await mw(make_request, None, METHOD) == "ok"
+    assert len(calls) == 3
+    assert slept[1] == 4
+    assert mw.errors == {"TelegramServerError": 1, "TelegramRetryAfter": 1}
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    mw, slept = make_mw()
+    make_request, calls = flaky(TelegramForbiddenError(METHOD, "blocked"))
+    with pytest.raises(TelegramForbiddenError):
+        await mw(make_request, None, METHOD)
+    assert len(calls) == 1 and slept == []
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_recovers():
+    clock = FakeClock()
+    mw, _ = make_mw(retries=0, breaker=CircuitBreaker(threshold=2, cooldown=10, clock=clock))
+    for _ in range(2):
+        make_request, _ = flaky(TelegramServerError(METHOD, "500"))
+        with pytest.raises(TelegramServerError):
+            await mw(make_request, None, METHOD)
+
+    make_request, calls = flaky()
+    with pytest.raises(CircuitOpenError):
+        await mw(make_request, None, METHOD)
+    assert calls == []
+
+    clock.t = 10
+    assert await mw(make_request, None, METHOD) == "ok"
+    assert mw.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_half_open_lets_through_a_single_probe():
+    clock = FakeClock()
+    mw, _ = make_mw(retries=0, breaker=CircuitBreaker(threshold=1, cooldown=10, clock=clock))
+    make_request, _ = flaky(TelegramServerError(METHOD, "500"))
+    with pytest.raises(TelegramServerError):
+        await mw(make_request, None, METHOD)
+
+    clock.t = 10
+    gate, calls = asyncio.Event(), []
+    async def slow(bot, method):
+        calls.append(method)
+        await gate.wait()
+        return "ok"
+
+    probe = asyncio.create_task(mw(slow, None, METHOD))
+    await asyncio.sleep(0)
+    for _ in range(3):                             # пока проба в полёте — остальные сразу падают
+        with pytest.raises(CircuitOpenError):
+            await mw(slow, None, METHOD)
+    assert len(calls) == 1
+
+    gate.set()
+    assert await probe == "ok"
+    assert mw.breaker.state == "closed"
+    assert await mw(slow, None, METHOD) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_send_paced_counts_messages_not_recipients(monkeypatch):
+    from dogbot import sender
+
+    sleeps = []
+    async def fake_sleep(sec):
+        sleeps.append(sec)
+    monkeypatch.setattr(sender.asyncio, "sleep", fake_sleep)
+
+    async def send(x):
+        if x == 3:
+            raise RuntimeError("boom")
+        return x
+
+    # альбом из 4 фото + карточка — 5 сообщений на получателя: по 5 получателей в секунду
+    res = await sender.send_paced(list(range(12)), send, per_second=25, cost=5)
+    assert res[:3] == [0, 1, 2] and isinstance(res[3], RuntimeError) and len(res) == 12
+    assert sleeps == [1, 1]                        # 5 + 5 + 2, после последней пачки не ждём
@@ -0,0 +1,38 @@
+import subprocess, sys, json
+
+import pytest
+
+# бюджет на `import dogbot.bot` в холодном процессе (секунды)
+IMPORT_BUDGET_S = 0.3
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import dogbot.bot
+dt = time.perf_counter() - t
+heavy = sorted(m for m in ("aiogram", "sqlalchemy", "dogbot.db", "dogbot.routers") if m in sys.modules)
+print(json.dumps({"seconds": dt, "heavy": heavy}))
+"""
+
+
+def test_import_is_lazy_and_within_budget():
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    res = json.loads(out.stdout)
+    assert res["heavy"] == []
+    assert res["seconds"] < IMPORT_BUDGET_S
+
+
+def test_create_app_does_not_touch_network_or_db(settings):
+    from dogbot.bot import create_app
+    app = create_app(settings)
+    assert app._bot is None          # Bot создаётся лениво
+    assert app.bot is app.bot
+    assert app.dp["settings"] is settings
+
+
+def test_empty_token_fails_only_on_bot_access(settings):
+    from dogbot.bot import create_app
+    settings.BOT_TOKEN = ""
+    app = create_app(settings)
+    with pytest.raises(RuntimeError):
+        app.bot
@@ -0,0 +1,69 @@
+import datetime as dt
+
+import pytest
+
+
+async def _order(db, area="Купчино"):
+    when = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=2)
+    return await db.add_order(client_id=1, service="walk", pet_name="Б", pet_size="small", when_at=when,
+                              duration_min=60, address="Ул. 1", budget=None, comment=None, area=area)
+
+
+def _since():
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d")
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_order_lifecycle(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    for wid in (2, 3):
+        await db.upsert_user(wid, f"w{wid}", "Walker", role="walker")
+    a, b, c = await _order(db), await _order(db), await _order(db, area="Центр")
+
+    await db.add_proposal(a, 2, 500, None)
+    await db.add_proposal(a, 2, 450, "дешевле")   # правка своего отклика — не новый
+    await db.add_proposal(a, 3, 600, None)
+    # второй заказ: первый отклик через 20 минут — мимо KPI
+    engine = db.get_engine()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "UPDATE orders SET created_at=datetime(created_at, '-20 minutes') WHERE id=?", (b,))
+    await db.add_proposal(b, 3, 700, None)
+
+    assert await db.assign_walker(a, 2)
+    assert not await db.assign_walker(a, 3)        # уже назначен — не считаем
+    await db.mark_done(a)
+    await db.mark_done(a)
+    await db.cancel_order(c)
+    await db.cancel_order(c)
+
+    s = await db.get_order_stats(_since())
+    assert s["orders"] == 3
+    assert s["proposals"] == 3
+    assert s["first_proposals"] == 2 and s["first_proposal_fast"] == 1
+    assert 1200 <= s["first_proposal_sec"] < 1260
+    assert (s["assigned"], s["done"], s["cancelled"]) == (1, 1, 1)
+
+    kupchino = await db.get_order_stats(_since(), "купчино")
+    assert (kupchino["orders"], kupchino["cancelled"]) == (2, 0)
+    assert (await db.get_order_stats(_since(), "центр"))["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_init_db_rebuilds_stats_for_old_data(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "c", "Client")
+    await db.upsert_user(2, "w", "Walker", role="walker")
+    a, _ = await _order(db), await _order(db)
+    await db.add_proposal(a, 2, 500, None)
+    await db.assign_walker(a, 2)
+    before = await db.get_order_stats(_since())
+
+    # БД до order_stats: таблица пуста, first_proposal_at не заполнен
+    engine = db.get_engine()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("DELETE FROM order_stats")
+        await conn.exec_driver_sql("UPDATE orders SET first_proposal_at=NULL")
+    await db.init_db()
+    assert await db.get_order_stats(_since()) == before
@@ -0,0 +1,70 @@
+import types, pytest
+
+from dogbot.throttling import MemoryBucketBackend, ThrottlingMiddleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+    def __call__(self):
+        return self.t
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills():
+    clock = FakeClock()
+    b = MemoryBucketBackend(clock=clock)
+    assert [await b.take("k", 1.0, 2) for _ in range(3)] == [True, True, False]
+    clock.t = 1.0
+    assert await b.take("k", 1.0, 2) is True
+    assert await b.take("k", 1.0, 2) is False
+
+
+@pytest.mark.asyncio
+async def test_middleware_drops_spam():
+    clock = FakeClock()
+    mw = ThrottlingMiddleware(rate=100, burst=100, backend=MemoryBucketBackend(clock=clock),
+                              command_limits={"/start": (0.1, 2)})
+    calls = []
+    async def handler(event, data):
+        calls.append(event.text)
+
+    user = types.SimpleNamespace(id=1)
+    for _ in range(5):
+        await mw(handler, types.SimpleNamespace(text="/start"), {"event_from_user": user})
+    await mw(handler, types.SimpleNamespace(text="привет"), {"event_from_user": user})
+
+    assert calls == ["/start", "/start", "привет"]
+    assert mw.rejected["command:/start"] == 3
+
+
+@pytest.mark.asyncio
+async def test_moderation_clicks_coalesce_per_button(monkeypatch):
+    import asyncio
+    from aiogram.types import CallbackQuery
+
+    async def no_answer(self, *args, **kwargs):
+        pass
+
+    monkeypatch.setattr(CallbackQuery, "answer", no_answer)
+    mw = ThrottlingMiddleware(rate=100, burst=100)
+    started, release = asyncio.Event(), asyncio.Event()
+    calls = []
+    async def handler(event, data):
+        calls.append(event.data)
+        started.set()
+        await release.wait()
+
+    user = types.SimpleNamespace(id=1)
+    def click(data):
+        return CallbackQuery.model_construct(id="1", data=data, chat_instance="c")
+
+    first = asyncio.create_task(mw(handler, click("mod:10:1:-1"), {"event_from_user": user}))
+    await started.wait()
+    # другой walker — своё действие; та же кнопка второй раз — склеивается
+    other = asyncio.create_task(mw(handler, click("mod:11:0:-1"), {"event_from_user": user}))
+    await mw(handler, click("mod:10:1:-1"), {"event_from_user": user})
+    release.set()
+    await asyncio.gather(first, other)
+    assert calls == ["mod:10:1:-1", "mod:11:0:-1"]
+    assert mw.rejected["coalesced"] == 1
@@ -0,0 +1,62 @@
+import pytest
+
+from dogbot.tracing import NOOP_SPAN, Tracer
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    async def flush(self):
+        pass
+
+
+def test_child_spans_share_trace():
+    exp = ListExporter()
+    tr = Tracer(sample_rate=1.0, exporter=exp)
+    with tr.span("update") as root:
+        with tr.span("handler h") as h:
+            with tr.span("db get_order"):
+                pass
+    db_span, handler, update = exp.spans
+    assert update is root and update.parent_id is None
+    assert handler.parent_id == root.span_id and db_span.parent_id == h.span_id
+    assert {s.trace_id for s in exp.spans} == {root.trace_id}
+
+
+def test_error_recorded():
+    exp = ListExporter()
+    tr = Tracer(sample_rate=1.0, exporter=exp)
+    with pytest.raises(ValueError):
+        with tr.span("update"):
+            raise ValueError("boom")
+    assert exp.spans[0].error == "ValueError: boom"
+
+
+def test_unsampled_trace_is_noop():
+    exp = ListExporter()
+    tr = Tracer(sample_rate=1e-12, exporter=exp)
+    with tr.span("update") as root:
+        with tr.span("db get_order") as child:
+            pass
+    assert root is NOOP_SPAN and child is NOOP_SPAN
+    assert exp.spans == []
+
+
+@pytest.mark.asyncio
+async def test_db_calls_traced(settings, sqlite_db):
+    from dogbot import tracing
+    exp = ListExporter()
+    old = tracing.tracer.sample_rate, tracing.tracer.exporter
+    tracing.tracer.sample_rate, tracing.tracer.exporter = 1.0, exp
+    try:
+        with tracing.tracer.span("update"):
+            await sqlite_db.upsert_user(7, "u", "U")
+    finally:
+        tracing.tracer.sample_rate, tracing.tracer.exporter = old
+    names = [s.name for s in exp.spans]
+    assert names == ["db upsert_user", "update"]
+    assert exp.spans[0].parent_id == exp.spans[1].span_id
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from dogbot.writebehind import UserWriteBehind
+
+
+@pytest.mark.asyncio
+async def test_noop_upserts_skipped_and_rest_batched(sqlite_db):
+    db = sqlite_db
+    w = UserWriteBehind(flush_interval=0.05, max_rows=1000)
+    for _ in range(3):
+        for uid in range(1, 101):
+            await w.upsert_user(uid, f"u{uid}", f"User {uid}")
+    assert w.stats["buffered"] == 100 and w.stats["skipped"] == 200
+    assert await db.get_user(1) is None            # ещё в буфере
+
+    await asyncio.sleep(0.1)
+    assert w.stats["batches"] == 1 and w.stats["flushed"] == 100
+    assert (await db.get_user(100))["username"] == "u100"
+
+    await w.upsert_user(1, "renamed", "User 1")
+    await w.stop()                                 # выключение дописывает буфер
+    assert (await db.get_user(1))["username"] == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_flush_by_rows_and_role_kept(sqlite_db):
+    db = sqlite_db
+    await db.upsert_user(1, "w", "Walker", role="walker")
+    w = UserWriteBehind(flush_interval=60, max_rows=2)
+    await w.upsert_user(1, "w2", None)
+    await w.upsert_user(2, "c", "Client")          # вторая строка — сброс сразу
+    assert w.stats["batches"] == 1
+    u = await db.get_user(1)
+    assert (u["username"], u["full_name"]) == ("w2", "Walker")
+    assert await db.get_user_role(1) == "walker"
+    assert await db.get_user_role(2) == "client"
+
+    w.discard(2)                                   # прямую запись отложенная не перетирает
+    await w.upsert_user(2, "c", "Client")
+    assert w.stats["buffered"] == 3
+    await w.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_and_ensure_writes_now(sqlite_db, monkeypatch):
+    db = sqlite_db
+    w = UserWriteBehind(flush_interval=60, max_rows=1000)
+    await w.upsert_user(1, "a", "A")
+    await w.upsert_user(2, "b", "B")
+
+    real = db.upsert_users_batch
+
+    async def down(rows):
+        raise OSError("db down")
+
+    monkeypatch.setattr(db, "upsert_users_batch", down)
+    assert await w.flush() == 0
+    assert w.stats["failed"] == 2
+    await w.upsert_user(2, "b2", "B")              # новое значение не перетирается старым
+    monkeypatch.setattr(db, "upsert_users_batch", real)
+
+    await w.ensure(3)                              # нет в буфере — в БД не ходим
+    assert await db.get_user(1) is None
+    await w.ensure(1)                              # перед заказом: строка уже в БД
+    assert (await db.get_user(1))["username"] == "a"
+    assert (await db.get_user(2))["username"] == "b2"
+    assert w.stats["flushed"] == 2
+    await w.stop()